@@ -8,6 +8,7 @@ multiple scripts.  Values can still be overridden via environment
 variables at runtime (see utils/db.py for database settings).
 """
 
+import os
 from pathlib import Path
 
 # ---------------------------------------------------------------------------
@@ -25,6 +26,18 @@ EMBEDDING_MODEL: str = "paraphrase-multilingual-MiniLM-L12-v2"
 
 SIMILARITY_THRESHOLD: float = 0.90
 
+# Number of strings sent to the embedding model per forward pass when the
+# matcher runs in batched mode.  Larger batches are faster on GPU but use
+# more memory.
+
+EMBEDDING_BATCH_SIZE: int = 256
+
+# Maximum number of matching strings kept in the on‑disk embedding cache
+# (see utils/embedding_cache.py).  Least recently used strings are evicted
+# beyond this size.  At 384 float32 dimensions, 200k entries take ~300 MB.
+
+EMBEDDING_CACHE_MAX_ENTRIES: int = 200_000
+
 # ---------------------------------------------------------------------------
 # Data sources configuration
 #
@@ -62,12 +75,148 @@ UNIVERS_CATEGORIES = [
     {"name": "Produits coreens", "url": "https://universparadiscount.ma/863-produits-coreens"},
 ]
 
+# ---------------------------------------------------------------------------
+# Scraping configuration
+#
+# Maximum number of requests in flight against a single host when the
+# scrapers run on the asyncio engine (see pipeline/scrapers/engine.py).
+# Keep this low enough to stay polite towards the source sites.
+
+SCRAPER_CONCURRENCY_PER_HOST: int = 4
+
+# Staged scraping (see pipeline/scrapers/staged.py): fetcher threads push
+# raw HTML into a bounded queue of SCRAPER_QUEUE_SIZE pages, drained by a
+# pool of parser processes.
+
+SCRAPER_FETCH_WORKERS: int = 4
+SCRAPER_PARSE_WORKERS: int = max(1, (os.cpu_count() or 2) - 1)
+SCRAPER_QUEUE_SIZE: int = 8
+
+# HTTP client settings shared by both scrapers (see pipeline/utils/http.py).
+# The pool size bounds the number of keep‑alive connections per host and
+# should be at least SCRAPER_CONCURRENCY_PER_HOST.  Failed requests are
+# retried up to HTTP_MAX_RETRIES times with exponential backoff (base and
+# cap in seconds) and full jitter.
+
+HTTP_POOL_SIZE: int = 16
+HTTP_TIMEOUT: float = 30.0
+HTTP_MAX_RETRIES: int = 4
+HTTP_BACKOFF_BASE: float = 1.0
+HTTP_BACKOFF_MAX: float = 60.0
+
+# Adaptive per‑host rate limiting (see pipeline/utils/rate_limit.py).  Each
+# host starts at RATE_LIMIT_INITIAL_RATE requests per second with
+# RATE_LIMIT_INITIAL_CONCURRENCY requests in flight; both grow while the
+# host answers quickly and are multiplied by RATE_LIMIT_DECREASE_FACTOR on
+# 429/503 responses, network errors or responses slower than
+# RATE_LIMIT_LATENCY_TARGET seconds.
+
+RATE_LIMIT_ENABLED: bool = True
+RATE_LIMIT_INITIAL_RATE: float = 4.0
+RATE_LIMIT_MIN_RATE: float = 0.2
+RATE_LIMIT_MAX_RATE: float = 20.0
+RATE_LIMIT_BURST: float = 4.0
+RATE_LIMIT_INITIAL_CONCURRENCY: float = 4.0
+RATE_LIMIT_MAX_CONCURRENCY: float = 16.0
+RATE_LIMIT_DECREASE_FACTOR: float = 0.5
+RATE_LIMIT_LATENCY_TARGET: float = 10.0
+
+# HTML parser backend used to extract product cards, per site.  One of
+# "html.parser" (pure Python, always available), "lxml" or "selectolax"
+# (both much faster; see pipeline/scrapers/parsing.py).  Unavailable
+# backends fall back to "html.parser".
+
+PARSER_BACKENDS = {
+    "parapharma.ma": "html.parser",
+    "universparadiscount.ma": "html.parser",
+}
+
+# Univers listing pages hold thousands of cards.  When streaming is on the
+# response is read in STREAM_CHUNK_SIZE‑byte chunks and parsed card by
+# card, so memory stays flat regardless of page size (the conditional‑GET
+# page cache is bypassed in this mode).
+
+UNIVERS_STREAMING: bool = False
+STREAM_CHUNK_SIZE: int = 64 * 1024
+
+# Incremental crawling (see pipeline/scrapers/sitemap.py).  Product pages
+# listed in each site's sitemap with a lastmod newer than their last fetch
+# are re‑scraped individually; a full listing crawl still runs every
+# SITEMAP_FULL_CRAWL_INTERVAL seconds to catch deleted products.
+
+SITEMAP_URLS = {
+    "parapharma.ma": "https://parapharma.ma/1_index_sitemap.xml",
+    "universparadiscount.ma": "https://universparadiscount.ma/1_index_sitemap.xml",
+}
+SITEMAP_FULL_CRAWL_INTERVAL: float = 7 * 24 * 3600
+
+# ---------------------------------------------------------------------------
+# Storage configuration
+#
+# Number of documents sent to MongoDB per insert_many/bulk_write call.
+#
+# WRITE_MODE selects how run_pipeline refreshes para_univer_merged and
+# matches: "upsert" writes only new or changed documents, keyed by site and
+# product URL, and deletes the ones that disappeared (see
+# pipeline/utils/db.py); "replace" wipes each collection and re‑inserts
+# everything.
+
+WRITE_BATCH_SIZE: int = 1000
+WRITE_MODE: str = "upsert"
+
+# MongoDB client settings (see pipeline/utils/db.py).  One client, with its
+# connection pool, is shared by every thread of a process.  Each value can
+# be overridden by the environment variable of the same name.
+# MONGO_WRITE_CONCERN is the "w" option: a number of nodes or "majority".
+
+MONGO_MAX_POOL_SIZE: int = 50
+MONGO_MIN_POOL_SIZE: int = 0
+MONGO_MAX_IDLE_TIME_MS: int = 300_000
+MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 30_000
+MONGO_WRITE_CONCERN: str = "1"
+MONGO_JOURNAL: bool = False
+
+# Price history (see pipeline/price_history.py).  Every price, discount or
+# availability change of a cleaned product is appended to a day bucket in
+# PRICE_HISTORY_COLLECTION; PRICE_LATEST_COLLECTION keeps the last recorded
+# values to detect changes.
+
+PRICE_HISTORY_COLLECTION: str = "price_history"
+PRICE_LATEST_COLLECTION: str = "price_latest"
+
+# Per‑brand and per‑category price comparison figures computed from the
+# matches after every run (see pipeline/aggregates.py).
+# AGGREGATE_MEMBERS_COLLECTION records the content hash and groups of every
+# aggregated match, so only the groups of changed matches are recomputed.
+
+AGGREGATES_COLLECTION: str = "match_aggregates"
+AGGREGATE_MEMBERS_COLLECTION: str = "match_aggregate_members"
+
+# Scraped pages are checkpointed under DATA_DIR/checkpoints while a run is in
+# progress (see pipeline/utils/checkpoint.py).  A resumed run ignores
+# checkpoints older than this many seconds and fetches those pages again.
+
+CHECKPOINT_MAX_AGE: float = 6 * 3600
+
+# Distributed scraping (see pipeline/utils/work_queue.py).  Page tasks live
+# in WORK_QUEUE_COLLECTION and their products in
+# WORK_QUEUE_RESULTS_COLLECTION.  A leased task returns to the queue if its
+# worker sends no heartbeat for WORK_QUEUE_VISIBILITY_TIMEOUT seconds, and
+# is given up after WORK_QUEUE_MAX_ATTEMPTS attempts.
+
+WORK_QUEUE_COLLECTION: str = "scrape_tasks"
+WORK_QUEUE_RESULTS_COLLECTION: str = "scrape_results"
+WORK_QUEUE_VISIBILITY_TIMEOUT: float = 120.0
+WORK_QUEUE_HEARTBEAT_INTERVAL: float = 30.0
+WORK_QUEUE_MAX_ATTEMPTS: int = 5
+WORK_QUEUE_POLL_INTERVAL: float = 1.0
+
 # ---------------------------------------------------------------------------
 # Brand configuration
 #
-# A curated list of known brands.  The order is important – longer brand
-# names should appear before shorter ones so that prefix matching finds
-# the most specific brand.  You can extend this list as new brands appear.
+# A curated list of known brands, in any order: extract_brand looks them up
+# in a token trie and keeps the longest brand that starts the product name.
+# You can extend this list as new brands appear.
 
 KNOWN_BRANDS = [
     "la roche-posay", "la roche posay", "eau thermale avene", "vichy",
@@ -83,6 +232,34 @@ KNOWN_BRANDS = [
     "hydralin", "dermedic", "8882", "photo white"
 ]
 
+# MongoDB collection of additional brands ({"name": ...} documents).  They
+# are added to KNOWN_BRANDS when run_pipeline starts (see
+# pipeline/utils/cleaning.py:reload_brands).
+
+BRANDS_COLLECTION: str = "brands"
+
+# Engine used by transform.merge_and_clean: "python" cleans one document at
+# a time, "pandas" cleans whole columns (pandas is an optional dependency)
+# and "auto" uses pandas, when installed, from TRANSFORM_COLUMNAR_MIN_ROWS
+# documents on.  Both engines return the same documents.
+
+TRANSFORM_ENGINE: str = "auto"
+TRANSFORM_COLUMNAR_MIN_ROWS: int = 20_000
+
+# Parallel cleaning of large raw batches (e.g. historical dumps): the input
+# is split into chunks of TRANSFORM_CHUNK_SIZE documents cleaned by
+# TRANSFORM_WORKERS processes.  run_pipeline uses TRANSFORM_WORKERS; 1 cleans
+# in the main process.
+
+TRANSFORM_WORKERS: int = 1
+TRANSFORM_CHUNK_SIZE: int = 50_000
+
+# Size of the LRU caches memoising cleaned names and their size/brand
+# (see pipeline/utils/cleaning.py).  Names repeat a lot across runs,
+# categories and the two sites.
+
+NORMALIZE_CACHE_SIZE: int = 65536
+
 # A blacklist of tokens that should never be considered a brand.  This
 # prevents common product terms (e.g. “applicateur”, “brosse”) from being
 # misclassified as brands during heuristic extraction.
@@ -109,7 +286,27 @@ PACKAGE_ROOT = Path(__file__).resolve().parent
 DATA_DIR = PACKAGE_ROOT / "data"
 
 __all__ = [
-    "EMBEDDING_MODEL", "SIMILARITY_THRESHOLD", "PARAPHARMA_CATEGORIES",
-    "UNIVERS_CATEGORIES", "KNOWN_BRANDS", "BRAND_BLACKLIST", "PACKAGE_ROOT",
-    "DATA_DIR",
+    "EMBEDDING_MODEL", "SIMILARITY_THRESHOLD", "EMBEDDING_BATCH_SIZE",
+    "EMBEDDING_CACHE_MAX_ENTRIES",
+    "PARAPHARMA_CATEGORIES", "UNIVERS_CATEGORIES",
+    "SCRAPER_CONCURRENCY_PER_HOST", "SCRAPER_FETCH_WORKERS",
+    "SCRAPER_PARSE_WORKERS", "SCRAPER_QUEUE_SIZE", "HTTP_POOL_SIZE", "HTTP_TIMEOUT",
+    "HTTP_MAX_RETRIES", "HTTP_BACKOFF_BASE", "HTTP_BACKOFF_MAX",
+    "RATE_LIMIT_ENABLED", "RATE_LIMIT_INITIAL_RATE", "RATE_LIMIT_MIN_RATE",
+    "RATE_LIMIT_MAX_RATE", "RATE_LIMIT_BURST", "RATE_LIMIT_INITIAL_CONCURRENCY",
+    "RATE_LIMIT_MAX_CONCURRENCY", "RATE_LIMIT_DECREASE_FACTOR",
+    "RATE_LIMIT_LATENCY_TARGET",
+    "PARSER_BACKENDS", "UNIVERS_STREAMING", "STREAM_CHUNK_SIZE",
+    "SITEMAP_URLS", "SITEMAP_FULL_CRAWL_INTERVAL",
+    "WRITE_BATCH_SIZE", "WRITE_MODE", "MONGO_MAX_POOL_SIZE", "MONGO_MIN_POOL_SIZE",
+    "MONGO_MAX_IDLE_TIME_MS", "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+    "MONGO_WRITE_CONCERN", "MONGO_JOURNAL", "PRICE_HISTORY_COLLECTION",
+    "PRICE_LATEST_COLLECTION", "AGGREGATES_COLLECTION",
+    "AGGREGATE_MEMBERS_COLLECTION", "CHECKPOINT_MAX_AGE",
+    "WORK_QUEUE_COLLECTION", "WORK_QUEUE_RESULTS_COLLECTION",
+    "WORK_QUEUE_VISIBILITY_TIMEOUT", "WORK_QUEUE_HEARTBEAT_INTERVAL",
+    "WORK_QUEUE_MAX_ATTEMPTS", "WORK_QUEUE_POLL_INTERVAL", "KNOWN_BRANDS",
+    "BRANDS_COLLECTION", "BRAND_BLACKLIST", "NORMALIZE_CACHE_SIZE",
+    "TRANSFORM_ENGINE", "TRANSFORM_COLUMNAR_MIN_ROWS", "TRANSFORM_WORKERS",
+    "TRANSFORM_CHUNK_SIZE", "PACKAGE_ROOT", "DATA_DIR",
 ]
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Materialised price‑comparison aggregates.
+
+Dashboards compare the prices of matched products per brand and per
+category.  Recomputing those figures from every ``matches`` document on
+each query is O(matches); :func:`refresh_aggregates` precomputes them
+after matching into a summary collection holding one document per
+group, so reads are O(groups).
+
+Groups are keyed by a ``dimension`` (``"brand"``, ``"main_category"`` or
+``"all"``) and its ``value``, taken from the Parapharma side of each
+match (``product_a``; matches are made within a brand, but categories
+may be labelled differently on the two sites).  For every group the
+summary holds:
+
+* ``n_matches`` and ``n_priced`` (pairs with both prices known);
+* ``median_price_gap`` and ``median_price_gap_pct``: median of
+  ``price_b - price_a``, in MAD and relative to ``price_a``;
+* ``share_cheaper_a``, ``share_cheaper_b`` and ``share_same_price``;
+* ``discount_rate_a`` / ``discount_rate_b``: share of discounted
+  products on each site;
+* ``availability_a`` / ``availability_b``: share of available products.
+
+The summary is refreshed incrementally.  A members collection records
+the content hash (see :func:`.utils.db.content_hash`) and the groups of
+every aggregated match; a refresh compares the new matches with it and
+only regroups and re‑summarises the groups that gained, lost or changed
+a match.  Of those, groups whose figures did not change are not written
+and groups without matches any more are deleted.  Diffing the hashes is
+still a linear pass over the matches, and any change touches the
+``"all"`` group, which is recomputed from every match (a median cannot
+be updated from a delta).
+"""
+
+from __future__ import annotations
+
+from statistics import median
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from pymongo import ASCENDING, DESCENDING, DeleteOne, UpdateOne
+
+from ..config import AGGREGATE_MEMBERS_COLLECTION, AGGREGATES_COLLECTION, WRITE_BATCH_SIZE
+from .utils.db import content_hash, document_key, get_collection
+
+DIMENSIONS = ("all", "brand", "main_category")
+
+
+def group_key(doc: Dict) -> str:
+    """Return the key of an aggregate document."""
+    return f"{doc['dimension']}|{doc['value']}"
+
+
+def _groups(match: Dict) -> List[str]:
+    """Return the keys of the groups a match belongs to."""
+    product = match["product_a"]
+    keys = ["all|all"]
+    for dimension in DIMENSIONS[1:]:
+        keys.append(group_key({"dimension": dimension, "value": product.get(dimension) or "Inconnu"}))
+    return keys
+
+
+def _share(count: int, total: int) -> Optional[float]:
+    return round(count / total, 4) if total else None
+
+
+def _summarise(dimension: str, value: str, matches: List[Dict]) -> Dict:
+    """Compute the figures of one group."""
+    gaps: List[float] = []
+    gaps_pct: List[float] = []
+    cheaper_a = cheaper_b = discounted_a = discounted_b = available_a = available_b = 0
+    for match in matches:
+        a, b = match["product_a"], match["product_b"]
+        discounted_a += bool(a.get("is_discounted"))
+        discounted_b += bool(b.get("is_discounted"))
+        available_a += a.get("availability") == "disponible"
+        available_b += b.get("availability") == "disponible"
+        price_a, price_b = a.get("price"), b.get("price")
+        if price_a is None or price_b is None:
+            continue
+        gap = price_b - price_a
+        gaps.append(gap)
+        if price_a:
+            gaps_pct.append(gap / price_a)
+        cheaper_a += gap > 0
+        cheaper_b += gap < 0
+    n, n_priced = len(matches), len(gaps)
+    return {
+        "dimension": dimension,
+        "value": value,
+        "n_matches": n,
+        "n_priced": n_priced,
+        "median_price_gap": round(median(gaps), 2) if gaps else None,
+        "median_price_gap_pct": round(median(gaps_pct), 4) if gaps_pct else None,
+        "share_cheaper_a": _share(cheaper_a, n_priced),
+        "share_cheaper_b": _share(cheaper_b, n_priced),
+        "share_same_price": _share(n_priced - cheaper_a - cheaper_b, n_priced),
+        "discount_rate_a": _share(discounted_a, n),
+        "discount_rate_b": _share(discounted_b, n),
+        "availability_a": _share(available_a, n),
+        "availability_b": _share(available_b, n),
+    }
+
+
+def compute_aggregates(matches: Iterable[Dict]) -> List[Dict]:
+    """Return the aggregate documents of every group, largest groups first."""
+    groups: Dict[str, List[Dict]] = {}
+    for match in matches:
+        for key in _groups(match):
+            groups.setdefault(key, []).append(match)
+    docs = [_summarise(*key.split("|", 1), members) for key, members in groups.items()]
+    docs.sort(key=lambda doc: (doc["dimension"], -doc["n_matches"], doc["value"]))
+    return docs
+
+
+def refresh_aggregates(
+    matches: Iterable[Dict],
+    *,
+    collection=None,
+    members=None,
+    batch_size: int = WRITE_BATCH_SIZE,
+) -> Dict[str, int]:
+    """Recompute the groups whose matches changed and write those that differ.
+
+    Parameters
+    ----------
+    matches : iterable of dict
+        The complete set of matches of the run.
+    collection : Collection, optional
+        Summary collection.  Defaults to ``config.AGGREGATES_COLLECTION``.
+    members : Collection, optional
+        Hash and groups of every aggregated match.  Defaults to
+        ``config.AGGREGATE_MEMBERS_COLLECTION``.
+    batch_size : int, optional
+        Operations per ``bulk_write`` call.
+
+    Returns
+    -------
+    dict
+        Counts of ``inserted``, ``updated``, ``unchanged`` and ``removed``
+        groups, as for :func:`.utils.db.upsert_by_key`.
+    """
+    if collection is None:
+        collection = get_collection(AGGREGATES_COLLECTION)
+    if members is None:
+        members = get_collection(AGGREGATE_MEMBERS_COLLECTION)
+    collection.create_index([("dimension", ASCENDING), ("n_matches", DESCENDING)])
+    collection.create_index([("_key", ASCENDING)], unique=True)
+    previous = {d["_id"]: d for d in members.find({}, {"_hash": 1, "groups": 1})}
+    current: Dict[str, tuple] = {}
+    for match in matches:
+        h = content_hash(match)
+        base = k = document_key(match)
+        n = 1
+        while k in current:
+            n += 1
+            k = f"{base}#{h[:12]}" if n == 2 else f"{base}#{h[:12]}-{n - 1}"
+        current[k] = (h, match)
+    member_ops: List = []
+    affected = set()
+    for k, (h, match) in current.items():
+        old = previous.get(k)
+        if old is not None and old.get("_hash") == h:
+            continue
+        groups = _groups(match)
+        affected.update(groups)
+        if old is not None:
+            affected.update(old.get("groups", []))
+        member_ops.append(UpdateOne({"_id": k}, {"$set": {"_hash": h, "groups": groups}}, upsert=True))
+    for k, old in previous.items():
+        if k not in current:
+            affected.update(old.get("groups", []))
+            member_ops.append(DeleteOne({"_id": k}))
+    if not previous:
+        # First refresh, or members were lost: rebuild every stored group
+        affected.update(collection.distinct("_key"))
+    stored = {
+        d["_key"]: d.get("_hash")
+        for d in collection.find({"_key": {"$in": sorted(affected)}}, {"_key": 1, "_hash": 1})
+    }
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    counts["unchanged"] = collection.count_documents({}) - len(stored)
+    by_group: Dict[str, List[Dict]] = {}
+    for _, match in current.values():
+        for key in _groups(match):
+            if key in affected:
+                by_group.setdefault(key, []).append(match)
+    ops: List = []
+    for key, group in by_group.items():
+        dimension, value = key.split("|", 1)
+        doc = _summarise(dimension, value, group)
+        h = content_hash(doc)
+        if stored.get(key) == h:
+            counts["unchanged"] += 1
+            continue
+        counts["updated" if key in stored else "inserted"] += 1
+        ops.append(UpdateOne({"_key": key}, {"$set": {**doc, "_key": key, "_hash": h}}, upsert=True))
+    empty = [key for key in stored if key not in by_group]
+    counts["removed"] = len(empty)
+    ops += [DeleteOne({"_key": key}) for key in empty]
+    # Groups first: if the process dies in between, the next refresh sees
+    # the old members and recomputes the same groups again.
+    for target, operations in ((collection, ops), (members, member_ops)):
+        for start in range(0, len(operations), batch_size):
+            target.bulk_write(operations[start:start + batch_size], ordered=False)
+    return counts
+
+
+def get_aggregates(
+    dimension: str = "brand",
+    *,
+    values: Optional[Sequence[str]] = None,
+    collection=None,
+) -> List[Dict]:
+    """Read the aggregates of one dimension, largest groups first.
+
+    Parameters
+    ----------
+    dimension : {"all", "brand", "main_category"}, optional
+        Grouping to read.
+    values : sequence of str, optional
+        Only return these brands or categories.
+    collection : Collection, optional
+        Summary collection.  Defaults to ``config.AGGREGATES_COLLECTION``.
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"dimension must be one of {DIMENSIONS}, not {dimension!r}")
+    if collection is None:
+        collection = get_collection(AGGREGATES_COLLECTION)
+    query: Dict = {"dimension": dimension}
+    if values is not None:
+        query["value"] = {"$in": list(values)}
+    projection = {"_id": 0, "_key": 0, "_hash": 0}
+    return list(collection.find(query, projection).sort("n_matches", DESCENDING))
+
+
+__all__ = [
+    "DIMENSIONS",
+    "group_key",
+    "compute_aggregates",
+    "refresh_aggregates",
+    "get_aggregates",
+]
@@ -12,24 +12,325 @@ Run this module as a script to execute the full pipeline::
 
 Make sure your environment variables for MongoDB are configured (see
 ``utils/db.py``) before running.
+
+By default the two sites are handled concurrently: each site is scraped
+and cleaned in its own thread, so the cleaning of one site overlaps with
+the scraping of the other.  Cleaning is per site (duplicates are only
+removed within a site), so the result is the same as cleaning the two
+lists together.  The wall time of every stage is reported at the end of
+the run to show which one is on the critical path.
 """
 
 from __future__ import annotations
 
-from typing import Optional, List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional, List, Dict, Tuple
+
+from itertools import chain
 
-from .scrapers.parapharma import scrape_all as scrape_parapharma
-from .scrapers.univers import scrape_all as scrape_univers
-from ..config import PARAPHARMA_CATEGORIES, UNIVERS_CATEGORIES
-from .transform import merge_and_clean
+from .scrapers.parapharma import scrape_all as scrape_parapharma, iter_all as iter_parapharma
+from .scrapers.univers import scrape_all as scrape_univers, iter_all as iter_univers
+from .scrapers import parapharma, univers
+from .scrapers.distributed import scrape_distributed
+from ..config import (
+    PARAPHARMA_CATEGORIES,
+    UNIVERS_CATEGORIES,
+    SCRAPER_CONCURRENCY_PER_HOST,
+    WRITE_BATCH_SIZE,
+    WRITE_MODE,
+)
+from .transform import merge_and_clean, iter_merge_and_clean
 from .matcher import match_products
-from .utils.db import get_collection
+from .aggregates import refresh_aggregates
+from .price_history import record_prices
+from .snapshot import write_snapshot
+from .utils.db import ensure_indexes, get_collection, insert_in_batches, upsert_by_key
+from .utils.embedding_cache import EmbeddingCache
+from .utils.http_cache import PageCache
+from .utils.checkpoint import CheckpointStore
+from .utils.cleaning import reload_brands
+from .utils.rate_limit import get_rate_limiter
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """Record the wall time of the enclosed block under ``timings[stage]``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+def _print_timings(timings: Dict[str, float]) -> None:
+    """Print the wall time of each stage, slowest first."""
+    print("⏱️ Stage wall times:")
+    for stage, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        print(f"   {stage:<24} {seconds:8.2f}s")
+
+
+def _save(collection_name: str, docs: Iterable[Dict], *, write_mode: str, batch_size: int, label: str) -> int:
+    """Replace the content of a collection with ``docs``; return how many were saved.
+
+    With ``write_mode="upsert"`` the collection is refreshed in place by
+    keyed bulk upserts that only touch changed documents (see
+    :func:`.utils.db.upsert_by_key`); with ``"replace"`` it is cleared
+    and every document inserted again.  An empty ``docs`` leaves the
+    collection untouched.
+    """
+    docs = iter(docs)
+    first = next(docs, None)
+    if first is None:
+        print(f"⚠️ No {label} to save")
+        return 0
+    collection = get_collection(collection_name)
+    if write_mode == "upsert":
+        counts = upsert_by_key(collection, chain([first], docs), batch_size=batch_size)
+        total = counts["inserted"] + counts["updated"] + counts["unchanged"]
+        print(
+            f"💾 Saved {total} {label} to {collection_name}: {counts['inserted']} new, "
+            f"{counts['updated']} changed, {counts['unchanged']} unchanged, {counts['removed']} removed"
+        )
+        return total
+    collection.delete_many({})
+    total = insert_in_batches(collection, chain([first], docs), batch_size=batch_size)
+    print(f"💾 Saved {total} {label} to {collection_name}")
+    return total
+
+
+def _scrape_and_clean_site(
+    label: str,
+    scrape: Callable[..., List[Dict]],
+    categories: List[Dict],
+    clean: Callable[[List[Dict]], List[Dict]],
+    timings: Dict[str, float],
+    **scrape_kwargs,
+) -> List[Dict]:
+    """Scrape one site and clean its products, timing both stages."""
+    with _timed(timings, f"scrape {label}"):
+        raw = scrape(categories, **scrape_kwargs)
+    print(f"✅ Scraped {len(raw)} {label} products")
+    with _timed(timings, f"clean {label}"):
+        cleaned = clean(raw)
+    print(f"🧹 Cleaned {label}: {len(cleaned)} products")
+    return cleaned
+
+
+def _concurrent_scrape_and_clean(
+    *,
+    max_pages_parapharma: Optional[int],
+    max_pages_univers: Optional[int],
+    scrape_concurrency: Optional[int],
+    parse_workers: Optional[int],
+    page_cache: Optional[PageCache],
+    checkpoints: Optional[CheckpointStore],
+    incremental: bool,
+    timings: Dict[str, float],
+    write_mode: str,
+    write_batch_size: int,
+) -> Tuple[List[Dict], List[Dict]]:
+    """Scrape and clean both sites in parallel, then replace ``para_univer_merged``.
+
+    Each site runs in its own thread; a site's products are cleaned as
+    soon as its scrape finishes, while the other site may still be
+    downloading.  Returns the cleaned Parapharma and Univers products.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        parapharma_future = executor.submit(
+            _scrape_and_clean_site,
+            "Parapharma",
+            parapharma.scrape_incremental if incremental else scrape_parapharma,
+            PARAPHARMA_CATEGORIES,
+            lambda raw: merge_and_clean(raw, []),
+            timings,
+            max_pages=max_pages_parapharma,
+            concurrency=scrape_concurrency,
+            parse_workers=parse_workers,
+            page_cache=page_cache,
+            checkpoints=checkpoints,
+        )
+        univers_future = executor.submit(
+            _scrape_and_clean_site,
+            "Univers",
+            univers.scrape_incremental if incremental else scrape_univers,
+            UNIVERS_CATEGORIES,
+            lambda raw: merge_and_clean([], raw),
+            timings,
+            max_pages=max_pages_univers,
+            concurrency=scrape_concurrency,
+            parse_workers=parse_workers,
+            page_cache=page_cache,
+            checkpoints=checkpoints,
+        )
+        parapharma_clean = parapharma_future.result()
+        univers_clean = univers_future.result()
+    cleaned = parapharma_clean + univers_clean
+    print(f"✅ Produced {len(cleaned)} cleaned products")
+    with _timed(timings, "save cleaned"):
+        _save(
+            "para_univer_merged", cleaned,
+            write_mode=write_mode, batch_size=write_batch_size, label="cleaned products",
+        )
+    return parapharma_clean, univers_clean
+
+
+def _distributed_scrape_and_clean(
+    *,
+    max_pages_parapharma: Optional[int],
+    max_pages_univers: Optional[int],
+    local_workers: int,
+    page_cache: Optional[PageCache],
+    timings: Dict[str, float],
+    write_mode: str,
+    write_batch_size: int,
+) -> Tuple[List[Dict], List[Dict]]:
+    """Crawl both sites through the MongoDB work queue, then clean and save.
+
+    Page tasks are picked up by workers on any node (plus
+    ``local_workers`` threads here); cleaning only starts once the
+    queue has drained.  Returns the cleaned Parapharma and Univers
+    products.
+    """
+    with _timed(timings, "scrape (work queue)"):
+        raw = scrape_distributed(
+            [
+                (parapharma.SITE, PARAPHARMA_CATEGORIES, max_pages_parapharma),
+                (univers.SITE, UNIVERS_CATEGORIES, max_pages_univers),
+            ],
+            local_workers=local_workers,
+            page_cache=page_cache,
+        )
+    parapharma_raw = raw[parapharma.SITE.name]
+    univers_raw = raw[univers.SITE.name]
+    print(f"✅ Scraped {len(parapharma_raw)} Parapharma products and {len(univers_raw)} Univers products")
+    print("🧹 Cleaning and merging data...")
+    with _timed(timings, "clean"):
+        cleaned = merge_and_clean(parapharma_raw, univers_raw)
+    print(f"✅ Produced {len(cleaned)} cleaned products")
+    with _timed(timings, "save cleaned"):
+        _save(
+            "para_univer_merged", cleaned,
+            write_mode=write_mode, batch_size=write_batch_size, label="cleaned products",
+        )
+    parapharma_clean = [d for d in cleaned if d.get("site") == parapharma.SITE.name]
+    univers_clean = [d for d in cleaned if d.get("site") == univers.SITE.name]
+    return parapharma_clean, univers_clean
+
+
+def _scrape_and_clean(
+    *,
+    max_pages_parapharma: Optional[int],
+    max_pages_univers: Optional[int],
+    scrape_concurrency: Optional[int],
+    parse_workers: Optional[int],
+    page_cache: Optional[PageCache],
+    checkpoints: Optional[CheckpointStore],
+    incremental: bool,
+    write_mode: str,
+    write_batch_size: int,
+) -> Tuple[List[Dict], List[Dict]]:
+    """Scrape both sites, clean the results and replace ``para_univer_merged``.
+
+    Returns the cleaned Parapharma and Univers products.
+    """
+    # Step 1: scrape raw data
+    scrape_parapharma_fn = parapharma.scrape_incremental if incremental else scrape_parapharma
+    scrape_univers_fn = univers.scrape_incremental if incremental else scrape_univers
+    parapharma_raw = scrape_parapharma_fn(
+        PARAPHARMA_CATEGORIES,
+        max_pages=max_pages_parapharma,
+        concurrency=scrape_concurrency,
+        parse_workers=parse_workers,
+        page_cache=page_cache,
+        checkpoints=checkpoints,
+    )
+    univers_raw = scrape_univers_fn(
+        UNIVERS_CATEGORIES,
+        max_pages=max_pages_univers,
+        concurrency=scrape_concurrency,
+        parse_workers=parse_workers,
+        page_cache=page_cache,
+        checkpoints=checkpoints,
+    )
+    print(f"✅ Scraped {len(parapharma_raw)} Parapharma products and {len(univers_raw)} Univers products")
+    # Step 2: clean and merge
+    print("🧹 Cleaning and merging data...")
+    cleaned = merge_and_clean(parapharma_raw, univers_raw)
+    print(f"✅ Produced {len(cleaned)} cleaned products")
+    # Persist cleaned data
+    _save(
+        "para_univer_merged", cleaned,
+        write_mode=write_mode, batch_size=write_batch_size, label="cleaned products",
+    )
+    parapharma_clean = [d for d in cleaned if d.get("site") == "parapharma.ma"]
+    univers_clean = [d for d in cleaned if d.get("site") == "universparadiscount.ma"]
+    return parapharma_clean, univers_clean
+
+
+def _stream_scrape_and_clean(
+    *,
+    max_pages_parapharma: Optional[int],
+    max_pages_univers: Optional[int],
+    page_cache: Optional[PageCache],
+    checkpoints: Optional[CheckpointStore],
+    write_batch_size: int,
+    write_mode: str,
+) -> Tuple[List[Dict], List[Dict]]:
+    """Stream scraped products through cleaning into ``para_univer_merged``.
+
+    Raw products are pulled page by page from the scrapers, cleaned
+    lazily and written in batches, so peak memory depends on the batch
+    size rather than on the size of the catalogue.  The existing
+    collection is only touched once the first cleaned product is ready.
+
+    Returns the cleaned Parapharma and Univers products, read back from
+    MongoDB for the matching stage.
+    """
+    print("🌊 Streaming scrape → clean → MongoDB...")
+    cleaned = iter_merge_and_clean(
+        iter_parapharma(
+            PARAPHARMA_CATEGORIES, max_pages=max_pages_parapharma, page_cache=page_cache, checkpoints=checkpoints
+        ),
+        iter_univers(
+            UNIVERS_CATEGORIES, max_pages=max_pages_univers, page_cache=page_cache, checkpoints=checkpoints
+        ),
+    )
+    _save(
+        "para_univer_merged", cleaned,
+        write_mode=write_mode, batch_size=write_batch_size, label="cleaned products",
+    )
+    merged_col = get_collection("para_univer_merged")
+    # Live products only, without the storage bookkeeping fields
+    projection = {"_id": 0, "_key": 0, "_hash": 0}
+    live = {"removed_at": {"$exists": False}}
+    parapharma_clean = list(merged_col.find({"site": "parapharma.ma", **live}, projection))
+    univers_clean = list(merged_col.find({"site": "universparadiscount.ma", **live}, projection))
+    return parapharma_clean, univers_clean
 
 
 def run_pipeline(
     *,
     max_pages_parapharma: Optional[int] = 156,
-    max_pages_univers: Optional[int] = 1
+    max_pages_univers: Optional[int] = 1,
+    scrape_concurrency: Optional[int] = SCRAPER_CONCURRENCY_PER_HOST,
+    parse_workers: Optional[int] = None,
+    use_page_cache: bool = True,
+    use_embedding_cache: bool = True,
+    stream: bool = False,
+    write_batch_size: int = WRITE_BATCH_SIZE,
+    write_mode: str = WRITE_MODE,
+    concurrent_sites: bool = True,
+    use_checkpoints: bool = True,
+    resume: bool = False,
+    run_id: str = "default",
+    distributed: bool = False,
+    local_workers: int = 0,
+    incremental: bool = False,
+    track_prices: bool = True,
+    snapshot: bool = True,
+    aggregate: bool = True,
 ) -> None:
     """Execute the full scraping, transformation and matching pipeline.
 
@@ -39,37 +340,173 @@ def run_pipeline(
         Page limit for Parapharma scraper.
     max_pages_univers : int, optional
         Page limit for Univers scraper.
+    scrape_concurrency : int, optional
+        Requests in flight per site when crawling categories concurrently.
+        ``None`` scrapes categories one after another.
+    parse_workers : int, optional
+        Parse pages in this many worker processes while
+        ``scrape_concurrency`` fetcher threads keep downloading (see
+        :mod:`.scrapers.staged`).  ``None`` parses in the fetching thread.
+    use_page_cache : bool, optional
+        Send conditional requests and reuse the parsed products of pages
+        that did not change since the previous run.
+    use_embedding_cache : bool, optional
+        Reuse embeddings persisted under ``config.DATA_DIR`` from previous
+        runs so only new or changed product strings are encoded.
+    stream : bool, optional
+        Stream products from the scrapers through cleaning into MongoDB
+        in batches of ``write_batch_size`` instead of materialising each
+        stage as a list.  Pages are scraped sequentially in this mode
+        (``scrape_concurrency``, ``parse_workers`` and ``concurrent_sites``
+        are ignored, with a warning for ``parse_workers``) and matching
+        reads the cleaned products back from MongoDB.  Cannot be combined
+        with ``distributed`` or ``incremental``.
+    write_batch_size : int, optional
+        Documents per ``insert_many``/``bulk_write`` call.
+    write_mode : {"upsert", "replace"}, optional
+        ``"upsert"`` refreshes ``para_univer_merged`` and ``matches`` in
+        place, writing only changed documents and deleting those that
+        disappeared; ``"replace"`` wipes and re‑inserts them.
+    concurrent_sites : bool, optional
+        Scrape and clean the two sites in parallel threads.  ``False``
+        runs the sites one after the other and cleans them together.
+        Ignored in streaming and distributed mode.
+    use_checkpoints : bool, optional
+        Durably record every scraped page under ``config.DATA_DIR`` so an
+        interrupted run can be resumed.  Checkpoints are discarded once
+        the cleaned products have been saved.
+    resume : bool, optional
+        Reuse the checkpoints left by an interrupted run with the same
+        ``run_id`` (younger than ``config.CHECKPOINT_MAX_AGE``) instead
+        of fetching those pages again.
+    run_id : str, optional
+        Name of the run, identifying its checkpoints.
+    distributed : bool, optional
+        Enqueue every category page into the MongoDB work queue and let
+        workers (``python -m paraMed_pipeline.pipeline.scrapers.distributed``
+        on any node) scrape them; cleaning starts once the queue has
+        drained.  Checkpoints and the other scraping options do not
+        apply in this mode; ``stream``, ``resume`` and ``incremental``
+        raise a ``ValueError``.
+    local_workers : int, optional
+        Worker threads started by this process in distributed mode.
+    incremental : bool, optional
+        Read each site's sitemap and only fetch product pages that are
+        new or changed since they were stored, falling back to a full
+        crawl when one is due (see :mod:`.scrapers.sitemap`).  Not
+        available in streaming or distributed mode (``ValueError``).
+    track_prices : bool, optional
+        Append the products whose price, discount or availability
+        changed to the price history (see :mod:`.price_history`).
+    snapshot : bool, optional
+        Write the cleaned products and matches as Parquet datasets,
+        partitioned by site and run date, under ``config.DATA_DIR``
+        (see :mod:`.snapshot`; requires pyarrow).
+    aggregate : bool, optional
+        Refresh the per‑brand and per‑category price comparison summary
+        of the matches (see :mod:`.aggregates`).
     """
+    if distributed and stream:
+        raise ValueError("stream and distributed cannot be combined")
+    if distributed and resume:
+        raise ValueError("resume is not available in distributed mode (the work queue tracks progress)")
+    if incremental and (stream or distributed):
+        raise ValueError("incremental is not available in streaming or distributed mode")
+    if parse_workers is not None and (stream or distributed):
+        print(f"⚠️ parse_workers is ignored in {'distributed' if distributed else 'streaming'} mode")
+    ensure_indexes(get_collection("para_univer_merged"))
+    print(f"🏷️ Brand index: {reload_brands()} brands")
     print("🚀 Starting scraping...")
-    # Step 1: scrape raw data
-    parapharma_raw = scrape_parapharma(PARAPHARMA_CATEGORIES, max_pages=max_pages_parapharma)
-    univers_raw = scrape_univers(UNIVERS_CATEGORIES, max_pages=max_pages_univers)
-    print(f"✅ Scraped {len(parapharma_raw)} Parapharma products and {len(univers_raw)} Univers products")
-    # Step 2: clean and merge
-    print("🧹 Cleaning and merging data...")
-    cleaned = merge_and_clean(parapharma_raw, univers_raw)
-    print(f"✅ Produced {len(cleaned)} cleaned products")
-    # Persist cleaned data
-    merged_col = get_collection("para_univer_merged")
-    if cleaned:
-        merged_col.delete_many({})
-        merged_col.insert_many(cleaned)
-        print(f"💾 Saved cleaned products to para_univer_merged")
+    timings: Dict[str, float] = {}
+    page_cache = PageCache() if use_page_cache else None
+    checkpoints = CheckpointStore(run_id, resume=resume) if use_checkpoints or resume else None
+    if distributed:
+        parapharma_clean, univers_clean = _distributed_scrape_and_clean(
+            max_pages_parapharma=max_pages_parapharma,
+            max_pages_univers=max_pages_univers,
+            local_workers=local_workers,
+            page_cache=page_cache,
+            write_mode=write_mode,
+            write_batch_size=write_batch_size,
+            timings=timings,
+        )
+    elif stream:
+        with _timed(timings, "scrape + clean + save"):
+            parapharma_clean, univers_clean = _stream_scrape_and_clean(
+                max_pages_parapharma=max_pages_parapharma,
+                max_pages_univers=max_pages_univers,
+                page_cache=page_cache,
+                checkpoints=checkpoints,
+                write_mode=write_mode,
+                write_batch_size=write_batch_size,
+            )
+    elif concurrent_sites:
+        with _timed(timings, "scrape + clean + save"):
+            parapharma_clean, univers_clean = _concurrent_scrape_and_clean(
+                max_pages_parapharma=max_pages_parapharma,
+                max_pages_univers=max_pages_univers,
+                scrape_concurrency=scrape_concurrency,
+                parse_workers=parse_workers,
+                page_cache=page_cache,
+                checkpoints=checkpoints,
+                incremental=incremental,
+                write_mode=write_mode,
+                write_batch_size=write_batch_size,
+                timings=timings,
+            )
     else:
-        print("⚠️ No cleaned products to save")
+        with _timed(timings, "scrape + clean + save"):
+            parapharma_clean, univers_clean = _scrape_and_clean(
+                max_pages_parapharma=max_pages_parapharma,
+                max_pages_univers=max_pages_univers,
+                scrape_concurrency=scrape_concurrency,
+                parse_workers=parse_workers,
+                page_cache=page_cache,
+                checkpoints=checkpoints,
+                incremental=incremental,
+                write_mode=write_mode,
+                write_batch_size=write_batch_size,
+            )
+    if page_cache is not None:
+        print(f"♻️ Page cache: {page_cache.hits} unchanged pages reused, {page_cache.misses} pages parsed")
+    if checkpoints is not None:
+        if checkpoints.restored:
+            print(f"⏭️ Resumed run {run_id!r}: {checkpoints.restored} pages restored from checkpoints")
+        checkpoints.clear()
+    if track_prices:
+        with _timed(timings, "price history"):
+            counts = record_prices(chain(parapharma_clean, univers_clean))
+        print(f"📈 Price history: {counts['changed']} products changed, {counts['unchanged']} unchanged")
+    for host, limits in get_rate_limiter().snapshot().items():
+        print(
+            f"🚦 {host}: {limits['rate']} req/s, up to {limits['concurrency']} in flight, "
+            f"throttled {limits['throttled']} times over {limits['requests']} requests"
+        )
     # Step 3: matching
     print("⚖️ Matching products...")
-    parapharma_clean = [d for d in cleaned if d.get("site") == "parapharma.ma"]
-    univers_clean = [d for d in cleaned if d.get("site") == "universparadiscount.ma"]
-    matches = match_products(parapharma_clean, univers_clean)
+    cache = EmbeddingCache() if use_embedding_cache else None
+    with _timed(timings, "match"):
+        matches = match_products(parapharma_clean, univers_clean, cache=cache)
+        if cache is not None:
+            cache.save()
+    if cache is not None:
+        print(f"🧠 Embedding cache: {cache.hits} hits, {cache.misses} misses ({len(cache)} entries stored)")
     print(f"✅ Found {len(matches)} matches")
-    matches_col = get_collection("matches")
-    if matches:
-        matches_col.delete_many({})
-        matches_col.insert_many(matches)
-        print(f"💾 Saved matches to matches collection")
-    else:
-        print("⚠️ No matches found to save")
+    with _timed(timings, "save matches"):
+        _save("matches", matches, write_mode=write_mode, batch_size=write_batch_size, label="matches")
+    if aggregate:
+        with _timed(timings, "aggregates"):
+            counts = refresh_aggregates(matches)
+        print(
+            f"📊 Aggregates: {counts['inserted']} new, {counts['updated']} changed, "
+            f"{counts['unchanged']} unchanged, {counts['removed']} removed groups"
+        )
+    if snapshot:
+        with _timed(timings, "snapshot"):
+            counts = write_snapshot(chain(parapharma_clean, univers_clean), matches)
+        if counts:
+            print(f"🗂️ Snapshot: {counts['products']} products and {counts['matches']} matches written to Parquet")
+    _print_timings(timings)
 
 if __name__ == "__main__":
     run_pipeline()
@@ -8,11 +8,17 @@ for the concatenated string of brand, clean_name and size and compare
 it against candidate Univers products with the same brand and size.
 Matches with cosine similarity above a configurable threshold are
 returned.
+
+By default matching runs in batched mode: every distinct matching
+string from both sites is embedded exactly once, in large batches, and
+each (brand, size) block is then scored with a single matrix product.
+The legacy per-product mode, which re-encodes each candidate group for
+every Parapharma product, is kept behind ``batched=False``.
 """
 
 from __future__ import annotations
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from collections import defaultdict
 import numpy as np
 
@@ -20,7 +26,8 @@ from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 
 from .utils.cleaning import clean_name
-from ..config import EMBEDDING_MODEL, SIMILARITY_THRESHOLD
+from .utils.embedding_cache import EmbeddingCache
+from ..config import EMBEDDING_MODEL, SIMILARITY_THRESHOLD, EMBEDDING_BATCH_SIZE
 
 
 def create_matching_string(product: Dict) -> str:
@@ -35,12 +42,122 @@ def create_matching_string(product: Dict) -> str:
     return " ".join(parts).strip()
 
 
+def _group_key(product: Dict) -> Tuple[str, str]:
+    """Return the lower‑cased (brand, size) blocking key of a product."""
+    return ((product.get("brand") or "").lower(), (product.get("size") or "").lower())
+
+
+def _encode_unique(
+    model: Optional[SentenceTransformer],
+    strings: List[str],
+    *,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    cache: Optional[EmbeddingCache] = None,
+) -> np.ndarray:
+    """Embed a list of distinct strings with L2‑normalised output.
+
+    If ``cache`` is given, cached vectors are reused and only misses are
+    encoded (and added to the cache).  The default model is loaded
+    lazily, only when there is something to encode.
+    """
+    if not strings:
+        return np.zeros((0, 0), dtype=np.float32)
+    vectors = None
+    missing = list(range(len(strings)))
+    if cache is not None:
+        vectors, missing = cache.lookup(strings)
+    if not missing:
+        return vectors
+    if model is None:
+        model = SentenceTransformer(EMBEDDING_MODEL)
+    to_encode = [strings[i] for i in missing]
+    encoded = np.asarray(
+        model.encode(to_encode, batch_size=batch_size, normalize_embeddings=True),
+        dtype=np.float32,
+    )
+    if cache is not None:
+        cache.add(to_encode, encoded)
+    if vectors is None:
+        vectors = np.zeros((len(strings), encoded.shape[1]), dtype=np.float32)
+    vectors[missing] = encoded
+    return vectors
+
+
+def _match_batched(
+    parapharma: List[Dict],
+    univers: List[Dict],
+    model: Optional[SentenceTransformer],
+    similarity_threshold: float,
+    batch_size: int,
+    cache: Optional[EmbeddingCache],
+) -> List[Dict]:
+    """Batched implementation of :func:`match_products`.
+
+    Only products whose (brand, size) key exists on both sides are
+    embedded.  Matching strings are deduplicated across both sites, so
+    the number of model calls scales with the number of unique strings
+    rather than with queries × bucket size.  Because the embeddings are
+    normalised, the cosine similarity of a block is a plain dot product.
+    """
+    grouped_b: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for j, p in enumerate(univers):
+        grouped_b[_group_key(p)].append(j)
+    grouped_a: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for i, p in enumerate(parapharma):
+        key = _group_key(p)
+        if key in grouped_b:
+            grouped_a[key].append(i)
+    if not grouped_a:
+        return []
+    # Assign one row per distinct matching string
+    row_of: Dict[str, int] = {}
+    rows_a: Dict[int, int] = {}
+    rows_b: Dict[int, int] = {}
+    for key, idx_a in grouped_a.items():
+        for i in idx_a:
+            rows_a[i] = row_of.setdefault(create_matching_string(parapharma[i]), len(row_of))
+        for j in grouped_b[key]:
+            rows_b[j] = row_of.setdefault(create_matching_string(univers[j]), len(row_of))
+    embeddings = _encode_unique(model, list(row_of), batch_size=batch_size, cache=cache)
+    best: Dict[int, Tuple[int, float]] = {}
+    for key, idx_a in grouped_a.items():
+        idx_b = grouped_b[key]
+        # Score each distinct string once.  Identical strings then share an
+        # identical score, and ordering Univers rows by first occurrence
+        # lets np.argmax reproduce the tie‑breaking of the per‑product loop
+        # (the earliest candidate with the highest score wins).
+        uniq_a, inverse_a = np.unique([rows_a[i] for i in idx_a], return_inverse=True)
+        uniq_b, first_b = np.unique([rows_b[j] for j in idx_b], return_index=True)
+        order = np.argsort(first_b)
+        uniq_b, first_b = uniq_b[order], first_b[order]
+        sim = embeddings[uniq_a] @ embeddings[uniq_b].T
+        best_cols = sim.argmax(axis=1)
+        best_scores = sim[np.arange(len(uniq_a)), best_cols]
+        for i, u in zip(idx_a, inverse_a.ravel()):
+            score = float(best_scores[u])
+            if score >= similarity_threshold:
+                best[i] = (idx_b[int(first_b[best_cols[u]])], score)
+    # Emit matches in Parapharma order, as the per‑product loop does
+    matches: List[Dict] = []
+    for i in sorted(best):
+        j, score = best[i]
+        matches.append({
+            "product_a": parapharma[i],
+            "product_b": univers[j],
+            "similarity": score,
+        })
+    return matches
+
+
 def match_products(
     parapharma: List[Dict],
     univers: List[Dict],
     *,
     model: SentenceTransformer | None = None,
     similarity_threshold: float = SIMILARITY_THRESHOLD,
+    batched: bool = True,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    cache: Optional[EmbeddingCache] = None,
 ) -> List[Dict]:
     """Find matches between Parapharma and Univers products.
 
@@ -55,6 +172,16 @@ def match_products(
         specified in :mod:`config` is loaded.
     similarity_threshold : float
         Minimum cosine similarity to consider a match.
+    batched : bool, optional
+        If ``True`` (default), embed each unique matching string once and
+        score every (brand, size) block with a single matrix product.  If
+        ``False``, use the legacy per‑product loop.
+    batch_size : int, optional
+        Batch size passed to ``SentenceTransformer.encode`` in batched mode.
+    cache : EmbeddingCache, optional
+        Persistent embedding cache used in batched mode.  Only cache
+        misses are encoded; the caller is responsible for calling
+        :meth:`EmbeddingCache.save`.
 
     Returns
     -------
@@ -63,19 +190,17 @@ def match_products(
         Parapharma product), ``product_b`` (a Univers product) and
         ``similarity`` (a float).
     """
+    if batched:
+        return _match_batched(parapharma, univers, model, similarity_threshold, batch_size, cache)
     if model is None:
         model = SentenceTransformer(EMBEDDING_MODEL)
     # Group Univers products by (brand, size)
     grouped: Dict[Tuple[str, str], List[Dict]] = defaultdict(list)
     for p in univers:
-        key = ((p.get("brand") or "").lower(), (p.get("size") or "").lower())
-        grouped[key].append(p)
+        grouped[_group_key(p)].append(p)
     matches: List[Dict] = []
     for pa in parapharma:
-        brand = (pa.get("brand") or "").lower()
-        size = (pa.get("size") or "").lower()
-        key = (brand, size)
-        candidates = grouped.get(key, [])
+        candidates = grouped.get(_group_key(pa), [])
         if not candidates:
             continue
         query_str = create_matching_string(pa)
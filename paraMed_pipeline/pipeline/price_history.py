@@ -0,0 +1,199 @@
+"""
+Price history of cleaned products.
+
+``para_univer_merged`` only holds the latest state of every product, so
+each refresh loses the previous prices.  :class:`PriceHistory` keeps
+them in two MongoDB collections:
+
+* a **bucketed history**, with one document per product per day holding
+  the list of price points recorded that day (``price``,
+  ``original_price``, ``discount``, ``availability`` and ``scraped_at``),
+  indexed by ``(product_key, day)``;
+* a **latest state** collection, one document per product keyed by
+  ``product_key``, used to decide whether anything changed.
+
+A point is only appended when one of the tracked values differs from the
+latest state, so a run where prices did not move writes nothing.
+Products are identified with :func:`.utils.db.document_key` (site and
+product URL).  :func:`get_price_series` returns the points of a product
+between two dates by reading only its day buckets through the index.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pymongo import ASCENDING, UpdateOne
+
+from ..config import PRICE_HISTORY_COLLECTION, PRICE_LATEST_COLLECTION, WRITE_BATCH_SIZE
+from .utils.db import document_key, get_collection
+
+# Values whose change is recorded as a new point
+TRACKED_FIELDS = ("price", "original_price", "discount", "availability")
+
+
+def _day(moment: datetime) -> datetime:
+    """Return midnight of the day of ``moment`` (the bucket boundary)."""
+    return datetime(moment.year, moment.month, moment.day)
+
+
+class PriceHistory:
+    """Append‑on‑change price history stored in day buckets.
+
+    Parameters
+    ----------
+    collection_name, latest_name : str, optional
+        Names of the history and latest‑state collections.
+    client : MongoClient, optional
+        Client passed to :func:`.utils.db.get_collection`.
+    db_name : str, optional
+        Database name passed to :func:`.utils.db.get_collection`.
+    """
+
+    def __init__(
+        self,
+        collection_name: str = PRICE_HISTORY_COLLECTION,
+        latest_name: str = PRICE_LATEST_COLLECTION,
+        *,
+        client=None,
+        db_name: Optional[str] = None,
+    ) -> None:
+        self.buckets = get_collection(collection_name, db_name=db_name, client=client)
+        self.latest = get_collection(latest_name, db_name=db_name, client=client)
+        self.buckets.create_index([("product_key", ASCENDING), ("day", ASCENDING)], unique=True)
+        self.buckets.create_index([("site", ASCENDING), ("day", ASCENDING)])
+
+    def record(
+        self,
+        docs: Iterable[Dict],
+        *,
+        key: Callable[[Dict], str] = document_key,
+        batch_size: int = WRITE_BATCH_SIZE,
+    ) -> Dict[str, int]:
+        """Append a point for every product whose tracked values changed.
+
+        Parameters
+        ----------
+        docs : iterable of dict
+            Cleaned products (consumed lazily).
+        key : callable, optional
+            Function returning the stable key of a product.
+        batch_size : int, optional
+            Products whose latest state is read, and written, per batch.
+
+        Returns
+        -------
+        dict
+            Counts of ``changed`` (including new) and ``unchanged``
+            products.
+        """
+        counts = {"changed": 0, "unchanged": 0}
+        it = iter(docs)
+        while True:
+            batch = list(islice(it, batch_size))
+            if not batch:
+                return counts
+            keys = [key(doc) for doc in batch]
+            state = {
+                d["_id"]: d
+                for d in self.latest.find({"_id": {"$in": list(set(keys))}}, {f: 1 for f in TRACKED_FIELDS})
+            }
+            bucket_ops: List[UpdateOne] = []
+            latest_ops: List[UpdateOne] = []
+            for k, doc in zip(keys, batch):
+                values = {f: doc.get(f) for f in TRACKED_FIELDS}
+                previous = state.get(k)
+                if previous is not None and all(previous.get(f) == v for f, v in values.items()):
+                    counts["unchanged"] += 1
+                    continue
+                counts["changed"] += 1
+                state[k] = values
+                scraped_at = doc.get("scraped_at")
+                if not isinstance(scraped_at, datetime):
+                    scraped_at = datetime.utcnow()
+                day = _day(scraped_at)
+                bucket_ops.append(UpdateOne(
+                    {"product_key": k, "day": day},
+                    {
+                        "$setOnInsert": {"site": doc.get("site")},
+                        "$push": {"points": {**values, "scraped_at": scraped_at}},
+                        "$inc": {"n_points": 1},
+                    },
+                    upsert=True,
+                ))
+                latest_ops.append(UpdateOne(
+                    {"_id": k},
+                    {"$set": {**values, "site": doc.get("site"), "scraped_at": scraped_at}},
+                    upsert=True,
+                ))
+            # History first: if the process dies in between, the next run
+            # sees the old state and records the point again.
+            if bucket_ops:
+                self.buckets.bulk_write(bucket_ops, ordered=True)
+                self.latest.bulk_write(latest_ops, ordered=False)
+
+    def series(
+        self,
+        product_key: str,
+        *,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict]:
+        """Return the price points of a product, oldest first.
+
+        Parameters
+        ----------
+        product_key : str
+            Key of the product (see :func:`.utils.db.document_key`).
+        start, end : datetime, optional
+            Only return points scraped within ``[start, end]``.
+
+        Returns
+        -------
+        list of dict
+            Points with ``scraped_at`` and the tracked values.
+        """
+        query: Dict = {"product_key": product_key}
+        day_range: Dict = {}
+        if start is not None:
+            day_range["$gte"] = _day(start)
+        if end is not None:
+            day_range["$lte"] = end
+        if day_range:
+            query["day"] = day_range
+        points = []
+        for bucket in self.buckets.find(query, {"points": 1}).sort("day", ASCENDING):
+            for point in bucket.get("points", []):
+                moment = point["scraped_at"]
+                if (start is None or moment >= start) and (end is None or moment <= end):
+                    points.append(point)
+        return points
+
+
+def record_prices(docs: Iterable[Dict], *, history: Optional[PriceHistory] = None) -> Dict[str, int]:
+    """Record the prices of cleaned products in the default history."""
+    return (history or PriceHistory()).record(docs)
+
+
+def get_price_series(
+    product_key: str,
+    *,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    history: Optional[PriceHistory] = None,
+) -> List[Dict]:
+    """Return the price points of a product from the default history.
+
+    See :meth:`PriceHistory.series`.
+    """
+    return (history or PriceHistory()).series(product_key, start=start, end=end)
+
+
+__all__ = [
+    "TRACKED_FIELDS",
+    "PriceHistory",
+    "record_prices",
+    "get_price_series",
+]
@@ -1,14 +1,21 @@
 """
 Scraper subpackage.
 
-Exports the `parapharma` and `univers` scraper modules for convenient
-import.  For example::
+Exports the `parapharma` and `univers` scraper modules, the shared
+fetch `engine` they plug into, the `staged` fetch/parse executor, the
+`distributed` work‑queue crawler, the `sitemap` incremental crawler
+and the HTML `parsing` backends, for convenient import.  For example::
 
     from paraMed_pipeline.pipeline.scrapers import parapharma
     products = parapharma.scrape_all(...)
 """
 
+from . import engine  # noqa: F401
+from . import parsing  # noqa: F401
+from . import staged  # noqa: F401
+from . import sitemap  # noqa: F401
 from . import parapharma  # noqa: F401
 from . import univers  # noqa: F401
+from . import distributed  # noqa: F401
 
-__all__ = ["parapharma", "univers"]
\ No newline at end of file
+__all__ = ["engine", "parsing", "staged", "sitemap", "parapharma", "univers", "distributed"]
\ No newline at end of file
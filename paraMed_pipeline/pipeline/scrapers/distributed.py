@@ -0,0 +1,295 @@
+"""
+Multi‑node scraping on top of the MongoDB work queue.
+
+The orchestrator enqueues the first page of every category into a
+:class:`~..utils.work_queue.WorkQueue`; any number of workers, on any
+machine that can reach the database, lease page tasks, scrape them with
+the shared :mod:`.engine` and store the products.  Completing a page
+enqueues the pages that follow it:
+
+* if the first page announced the category's page count, all remaining
+  pages (up to ``max_pages``) are enqueued at once and scraped in
+  parallel by whichever workers are free;
+* otherwise the next page is enqueued as long as the current one had
+  products, reproducing the sequential stop‑at‑first‑empty‑page loop.
+
+Once the queue has drained, :func:`collect_site` reads the stored
+products back in crawl order and cuts every category at its first
+failed or empty page, so the result is the same list the sequential
+scrapers return.
+
+Start a worker on each node with::
+
+    python -m paraMed_pipeline.pipeline.scrapers.distributed
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ...config import WORK_QUEUE_POLL_INTERVAL
+from ..utils.http_cache import PageCache
+from ..utils.work_queue import DONE, FAILED, RESULT_FIELDS, WorkQueue
+from .engine import SiteSpec, load_first_page, load_page
+from . import parapharma, univers
+
+# Sites a worker knows how to scrape, by the ``site`` value of their tasks
+SITES: Dict[str, SiteSpec] = {
+    parapharma.SITE.name: parapharma.SITE,
+    univers.SITE.name: univers.SITE,
+}
+
+
+def new_run_id() -> str:
+    """Return a unique identifier for a distributed crawl."""
+    return f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def default_worker_id() -> str:
+    """Return an identifier unique to this host, process and thread."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def enqueue_site(
+    queue: WorkQueue,
+    run_id: str,
+    site: SiteSpec,
+    categories: Iterable[Dict],
+    *,
+    max_pages: Optional[int] = None,
+) -> int:
+    """Enqueue the first page of every category of a site.
+
+    Returns the number of tasks added.
+    """
+    if max_pages is not None and max_pages < 1:
+        return 0
+    added = 0
+    for index, cat in enumerate(categories):
+        name = cat.get("name") or ""
+        url = cat.get("url") or ""
+        if not url:
+            continue
+        added += queue.enqueue(run_id, site.name, url, name, 1, category_index=index, max_pages=max_pages)
+    return added
+
+
+def _enqueue_next_pages(queue: WorkQueue, task: Dict, page_count: Optional[int]) -> None:
+    """Enqueue the pages that follow a completed, non‑empty page."""
+    page = task["page"]
+    max_pages = task.get("max_pages")
+    if page == 1 and page_count is not None:
+        last = page_count if max_pages is None else min(max_pages, page_count)
+        next_pages, sequential = range(2, last + 1), False
+    elif page == 1 or task.get("sequential"):
+        next_pages, sequential = [page + 1], True
+    else:
+        return
+    for next_page in next_pages:
+        if max_pages is not None and next_page > max_pages:
+            break
+        queue.enqueue(
+            task["run_id"], task["site"], task["category_url"], task["category_name"], next_page,
+            category_index=task["category_index"], max_pages=max_pages, sequential=sequential,
+        )
+
+
+def process_task(
+    queue: WorkQueue,
+    task: Dict,
+    worker_id: str,
+    *,
+    page_cache: Optional[PageCache] = None,
+) -> bool:
+    """Scrape the page of a leased task and report the outcome.
+
+    Returns ``True`` if the page was scraped and stored.
+    """
+    site = SITES[task["site"]]
+    try:
+        with queue.keep_alive(task, worker_id):
+            if task["page"] == 1:
+                products, page_count = load_first_page(
+                    site, task["category_url"], task["category_name"], page_cache=page_cache
+                )
+            else:
+                page_count = None
+                products = load_page(
+                    site, task["category_url"], task["category_name"], task["page"], page_cache=page_cache
+                )
+    except Exception as e:
+        queue.fail(task, worker_id, f"{type(e).__name__}: {e}")
+        return False
+    if products is None:
+        queue.fail(task, worker_id, "download failed")
+        return False
+    if not queue.complete(task, worker_id, products, page_count=page_count):
+        print(f"⚠️ Lost the lease on {task['_id']}; result discarded")
+        return False
+    if products:
+        _enqueue_next_pages(queue, task, page_count)
+    return True
+
+
+def run_worker(
+    queue: Optional[WorkQueue] = None,
+    *,
+    worker_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    max_idle: Optional[float] = None,
+    poll_interval: float = WORK_QUEUE_POLL_INTERVAL,
+    page_cache: Optional[PageCache] = None,
+) -> int:
+    """Lease and process page tasks until there is no more work.
+
+    Parameters
+    ----------
+    queue : WorkQueue, optional
+        Queue to work on.  Defaults to a queue on the default database.
+    worker_id : str, optional
+        Lease owner name.  Defaults to host, process and thread ids.
+    run_id : str, optional
+        Only work on this run, and return once it has drained.
+    max_idle : float, optional
+        Return after this many seconds without any task.  ``None`` (and
+        no ``run_id``) keeps polling forever.
+    poll_interval : float, optional
+        Seconds to wait when no task is available.
+    page_cache : PageCache, optional
+        Conditional‑GET cache used to load pages.
+
+    Returns
+    -------
+    int
+        Number of tasks completed by this worker.
+    """
+    queue = queue or WorkQueue()
+    worker_id = worker_id or default_worker_id()
+    completed = 0
+    idle_since = time.monotonic()
+    while True:
+        task = queue.lease(worker_id, run_id=run_id)
+        if task is None:
+            if run_id is not None and queue.is_drained(run_id):
+                return completed
+            if max_idle is not None and time.monotonic() - idle_since > max_idle:
+                return completed
+            time.sleep(poll_interval)
+            continue
+        completed += process_task(queue, task, worker_id, page_cache=page_cache)
+        idle_since = time.monotonic()
+
+
+def collect_site(queue: WorkQueue, run_id: str, site: SiteSpec) -> List[Dict]:
+    """Return the products scraped for one site, in sequential crawl order.
+
+    Each category is cut at its first page that failed or had no
+    products, exactly where the sequential loop would have stopped.
+    Only the rows of the attempt that completed each page are kept.
+    """
+    pages: Dict[int, Dict[int, Dict]] = {}
+    for task in queue.task_docs(run_id, site.name):
+        pages.setdefault(task["category_index"], {})[task["page"]] = task
+    last_page: Dict[int, int] = {}
+    for index, tasks in pages.items():
+        page = 1
+        while page in tasks and tasks[page]["status"] == DONE and tasks[page].get("n_products"):
+            page += 1
+        last_page[index] = page - 1
+        stopped = tasks.get(page)
+        if stopped is not None and stopped["status"] == FAILED:
+            print(f"⚠️ [{site.label}] {stopped['category_name']} page {page} failed: {stopped.get('error')}")
+    products: List[Dict] = []
+    for doc in queue.iter_results(run_id, site.name):
+        if doc["page"] > last_page.get(doc["category_index"], 0):
+            continue
+        # Rows left behind by an attempt that lost its lease
+        if doc.get("attempt") != pages[doc["category_index"]][doc["page"]].get("result_attempt"):
+            continue
+        products.append({k: v for k, v in doc.items() if k not in RESULT_FIELDS})
+    return products
+
+
+def scrape_distributed(
+    jobs: Iterable[Tuple[SiteSpec, Iterable[Dict], Optional[int]]],
+    *,
+    queue: Optional[WorkQueue] = None,
+    local_workers: int = 0,
+    run_id: Optional[str] = None,
+    page_cache: Optional[PageCache] = None,
+    timeout: Optional[float] = None,
+    purge: bool = True,
+) -> Dict[str, List[Dict]]:
+    """Crawl several sites through the work queue and wait for the result.
+
+    Parameters
+    ----------
+    jobs : iterable of (SiteSpec, categories, max_pages)
+        Sites to crawl with their categories and page limit.
+    queue : WorkQueue, optional
+        Queue to use.  Defaults to a queue on the default database.
+    local_workers : int, optional
+        Worker threads started in this process, in addition to any
+        remote workers polling the queue.  With ``0``, the crawl relies
+        entirely on remote workers.
+    run_id : str, optional
+        Identifier of the crawl.  Defaults to :func:`new_run_id`.
+    page_cache : PageCache, optional
+        Conditional‑GET cache used by the local workers.
+    timeout : float, optional
+        Give up waiting after this many seconds and collect what was
+        scraped so far.
+    purge : bool, optional
+        Delete the run's tasks and results once collected.
+
+    Returns
+    -------
+    dict
+        ``{site name: products}`` for every job.
+    """
+    queue = queue or WorkQueue()
+    run_id = run_id or new_run_id()
+    jobs = list(jobs)
+    for site, categories, max_pages in jobs:
+        added = enqueue_site(queue, run_id, site, categories, max_pages=max_pages)
+        print(f"📬 [{site.label}] Enqueued {added} categories for run {run_id}")
+    threads = [
+        threading.Thread(
+            target=run_worker,
+            kwargs={"queue": queue, "worker_id": f"{default_worker_id()}-{i}", "run_id": run_id,
+                    "page_cache": page_cache},
+            daemon=True,
+        )
+        for i in range(local_workers)
+    ]
+    for thread in threads:
+        thread.start()
+    if not queue.wait_until_drained(run_id, timeout=timeout):
+        print(f"⚠️ Run {run_id} did not drain within {timeout}s: {queue.counts(run_id)}")
+    for thread in threads:
+        thread.join(timeout=0 if timeout is not None else None)
+    results = {site.name: collect_site(queue, run_id, site) for site, _, _ in jobs}
+    if purge:
+        queue.purge(run_id)
+    return results
+
+
+__all__ = [
+    "SITES",
+    "new_run_id",
+    "enqueue_site",
+    "process_task",
+    "run_worker",
+    "collect_site",
+    "scrape_distributed",
+]
+
+
+if __name__ == "__main__":
+    run_worker()
@@ -0,0 +1,453 @@
+"""
+Shared page‑fetching engine for the site scrapers.
+
+Both scrapers follow the same pattern: build the URL of a listing page,
+download it, turn the HTML into product dictionaries and move on to the
+next page until a page yields no products.  This module holds the parts
+of that loop that are independent of the site, while each scraper module
+contributes a :class:`SiteSpec` describing its URL scheme and its HTML
+parser.
+
+Two drivers are provided:
+
+* :func:`iter_category_pages` – the original blocking loop, one page at
+  a time.
+* :class:`AsyncScrapeEngine` – an :mod:`asyncio` driver that crawls all
+  categories concurrently.  Blocking downloads run in a thread pool and
+  an :class:`asyncio.Semaphore` per host caps the number of requests in
+  flight against each site.
+
+Sites that advertise their page count (see ``SiteSpec.page_count``) do
+not need to be walked page by page: once the first page has told the
+engine how many pages the category has, the async driver requests all
+remaining pages at once, and both drivers skip the trailing request for
+the empty page past the end.  When the count cannot be read, the
+drivers fall back to stopping at the first empty page.
+
+Both drivers produce exactly the same product dictionaries, in the same
+order (categories in input order, pages in ascending order).  Either can
+be given a :class:`~..utils.http_cache.PageCache`, in which case pages
+are requested conditionally and unchanged pages reuse their previously
+parsed products, and a :class:`~..utils.checkpoint.CheckpointStore`, in
+which case every completed page is checkpointed and pages already
+checkpointed by an interrupted run are not fetched again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from ...config import SCRAPER_CONCURRENCY_PER_HOST
+from ..utils import http
+from ..utils.checkpoint import CheckpointStore
+from ..utils.http_cache import PageCache, hash_body
+
+
+@dataclass(frozen=True)
+class SiteSpec:
+    """Description of a scrapable site.
+
+    Attributes
+    ----------
+    name : str
+        Value stored in the ``site`` field of every product (e.g.
+        ``"parapharma.ma"``).
+    label : str
+        Short name used in log messages.
+    page_url : callable
+        ``page_url(category_url, page) -> str`` builds the URL of a
+        listing page (pages are numbered from 1).
+    parse_products : callable
+        ``parse_products(html, category_name) -> list of dict`` extracts
+        the products of one listing page.
+    stream_products : callable, optional
+        ``stream_products(url, category_name) -> iterator of dict or None``
+        downloads a page incrementally and yields its products as they
+        are parsed, or returns ``None`` if the download failed.  Sites
+        with very large pages provide it to keep memory flat.
+    page_count : callable, optional
+        ``page_count(html, n_products) -> int or None`` reads the total
+        number of pages of a category from the HTML of its first page,
+        given the number of products parsed from it.  Returns ``None``
+        when the page carries no pagination information.
+    parse_product_page : callable, optional
+        ``parse_product_page(html, product_url, category_name) -> dict or
+        None`` extracts one product, in the listing schema, from its own
+        page.  ``category_name`` may be ``None`` for products not seen
+        before.  Needed for incremental crawling (see :mod:`.sitemap`).
+    """
+
+    name: str
+    label: str
+    page_url: Callable[[str, int], str]
+    parse_products: Callable[[str, str], List[Dict]]
+    stream_products: Optional[Callable[[str, str], Optional[Iterator[Dict]]]] = None
+    page_count: Optional[Callable[[str, int], Optional[int]]] = None
+    parse_product_page: Optional[Callable[[str, str, Optional[str]], Optional[Dict]]] = None
+
+
+def fetch_html(url: str) -> Optional[str]:
+    """Download a page and return its text, or ``None`` on failure.
+
+    Requests go through the shared pooled session of :mod:`..utils.http`,
+    so transient errors are retried with backoff before giving up.
+    """
+    resp = http.fetch(url)
+    if resp is None:
+        return None
+    if resp.status_code != 200:
+        print(f"⚠️ HTTP {resp.status_code} for {url}")
+        return None
+    return resp.text
+
+
+def _load_page(
+    site: SiteSpec,
+    category_url: str,
+    category_name: str,
+    page: int,
+    *,
+    page_cache: Optional[PageCache],
+    stream: bool,
+    discover: bool,
+    checkpoints: Optional[CheckpointStore],
+) -> Tuple[Optional[List[Dict]], Optional[int]]:
+    """Implementation of :func:`load_page`, optionally reading the page count."""
+    if checkpoints is None:
+        return _fetch_page(
+            site, category_url, category_name, page,
+            page_cache=page_cache, stream=stream, discover=discover,
+        )
+    record = checkpoints.get(site.name, category_url, page)
+    if record is not None:
+        print(f"⏭️ [{site.label}] {category_name} page {page} restored from checkpoint")
+        return record["products"], record["page_count"]
+    products, page_count = _fetch_page(
+        site, category_url, category_name, page,
+        page_cache=page_cache, stream=stream, discover=discover,
+    )
+    if products is not None:
+        checkpoints.record(site.name, category_url, page, products, page_count=page_count)
+    return products, page_count
+
+
+def _fetch_page(
+    site: SiteSpec,
+    category_url: str,
+    category_name: str,
+    page: int,
+    *,
+    page_cache: Optional[PageCache],
+    stream: bool,
+    discover: bool,
+) -> Tuple[Optional[List[Dict]], Optional[int]]:
+    """Download and parse one page, optionally reading the page count."""
+    url = site.page_url(category_url, page)
+    print(f"📦 [{site.label}] Scraping {category_name} page {page}: {url}")
+    discover = discover and site.page_count is not None
+    if stream and site.stream_products is not None:
+        products = site.stream_products(url, category_name)
+        return (None if products is None else list(products)), None
+    if page_cache is None:
+        html = fetch_html(url)
+        if html is None:
+            return None, None
+        products = site.parse_products(html, category_name)
+        return products, site.page_count(html, len(products)) if discover else None
+    entry = page_cache.get(url)
+    resp = http.fetch(url, headers=page_cache.validators(entry))
+    if resp is None:
+        return None, None
+    if resp.status_code == 304 and entry is not None:
+        print(f"♻️ [{site.label}] {category_name} page {page} not modified")
+        return page_cache.reuse(entry), entry.get("page_count")
+    if resp.status_code != 200:
+        print(f"⚠️ HTTP {resp.status_code} for {url}")
+        return None, None
+    body_hash = hash_body(resp.content)
+    page_count = None
+    if entry is not None and entry.get("body_hash") == body_hash:
+        products = page_cache.reuse(entry)
+        page_count = entry.get("page_count")
+    else:
+        page_cache.record_miss()
+        products = site.parse_products(resp.text, category_name)
+        if discover:
+            page_count = site.page_count(resp.text, len(products))
+    page_cache.store(
+        url,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+        body_hash=body_hash,
+        products=products,
+        page_count=page_count,
+    )
+    return products, page_count
+
+
+def load_page(
+    site: SiteSpec,
+    category_url: str,
+    category_name: str,
+    page: int,
+    *,
+    page_cache: Optional[PageCache] = None,
+    stream: bool = False,
+    checkpoints: Optional[CheckpointStore] = None,
+) -> Optional[List[Dict]]:
+    """Fetch and parse one listing page.
+
+    Parameters
+    ----------
+    site : SiteSpec
+        Site description.
+    category_url, category_name : str
+        Category being scraped.
+    page : int
+        Page number (1‑based).
+    page_cache : PageCache, optional
+        Conditional‑GET cache.  When given, the request carries the
+        stored validators and the HTML is only parsed if the page
+        changed (neither ``304`` nor an identical body hash).
+    stream : bool, optional
+        Use the site's ``stream_products`` so the page text and parse
+        tree are never held in memory as a whole.  The page cache is not
+        consulted in this mode.
+    checkpoints : CheckpointStore, optional
+        If the page has a fresh checkpoint its products are returned
+        without any request; otherwise the downloaded page is
+        checkpointed.
+
+    Returns
+    -------
+    list of dict or None
+        The products found on the page (possibly empty), or ``None`` if
+        the page could not be downloaded.
+    """
+    products, _ = _load_page(
+        site, category_url, category_name, page,
+        page_cache=page_cache, stream=stream, discover=False, checkpoints=checkpoints,
+    )
+    return products
+
+
+def load_first_page(
+    site: SiteSpec,
+    category_url: str,
+    category_name: str,
+    *,
+    page_cache: Optional[PageCache] = None,
+    stream: bool = False,
+    checkpoints: Optional[CheckpointStore] = None,
+) -> Tuple[Optional[List[Dict]], Optional[int]]:
+    """Load page 1 of a category and read its total page count.
+
+    Same as :func:`load_page` for ``page=1``, but also returns the value
+    of ``site.page_count`` for the page (``None`` if the site does not
+    provide it, the page carries no pagination, or the page was
+    streamed).  With a page cache, the count is stored alongside the
+    products so unchanged first pages do not need to be parsed again;
+    checkpoints keep it too.
+    """
+    return _load_page(
+        site, category_url, category_name, 1,
+        page_cache=page_cache, stream=stream, discover=True, checkpoints=checkpoints,
+    )
+
+
+def iter_category_pages(
+    site: SiteSpec,
+    category_url: str,
+    category_name: str,
+    *,
+    max_pages: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    stream: bool = False,
+    checkpoints: Optional[CheckpointStore] = None,
+) -> Iterator[List[Dict]]:
+    """Yield the products of each page of a category, one page at a time.
+
+    Pagination stops at the first page that fails to download or yields
+    no products, after the last page announced by the first page, or
+    after ``max_pages`` pages.
+    """
+    if max_pages is not None and max_pages < 1:
+        return
+    products, page_count = load_first_page(
+        site, category_url, category_name,
+        page_cache=page_cache, stream=stream, checkpoints=checkpoints,
+    )
+    if not products:
+        return
+    yield products
+    if page_count is not None:
+        max_pages = page_count if max_pages is None else min(max_pages, page_count)
+    page = 2
+    while max_pages is None or page <= max_pages:
+        products = load_page(
+            site, category_url, category_name, page,
+            page_cache=page_cache, stream=stream, checkpoints=checkpoints,
+        )
+        if not products:
+            break
+        yield products
+        page += 1
+
+
+class AsyncScrapeEngine:
+    """Concurrent category crawler built on :mod:`asyncio`.
+
+    Parameters
+    ----------
+    per_host_limit : int, optional
+        Maximum number of requests in flight against a single host.
+    max_workers : int, optional
+        Size of the thread pool running the blocking downloads.  Defaults
+        to four hosts' worth of ``per_host_limit``.
+    page_cache : PageCache, optional
+        Conditional‑GET cache passed to :func:`load_page`.
+    stream : bool, optional
+        Parse pages incrementally (see :func:`load_page`).
+    checkpoints : CheckpointStore, optional
+        Checkpoint completed pages and skip those already checkpointed.
+    """
+
+    def __init__(
+        self,
+        *,
+        per_host_limit: int = SCRAPER_CONCURRENCY_PER_HOST,
+        max_workers: Optional[int] = None,
+        page_cache: Optional[PageCache] = None,
+        stream: bool = False,
+        checkpoints: Optional[CheckpointStore] = None,
+    ) -> None:
+        self.per_host_limit = max(1, per_host_limit)
+        self.max_workers = max_workers or self.per_host_limit * 4
+        self.page_cache = page_cache
+        self.stream = stream
+        self.checkpoints = checkpoints
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        sem = self._semaphores.get(host)
+        if sem is None:
+            sem = self._semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return sem
+
+    async def load_page(self, site: SiteSpec, category_url: str, category_name: str, page: int) -> Optional[List[Dict]]:
+        """Asynchronous counterpart of :func:`load_page`."""
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(site.page_url(category_url, page)):
+            return await loop.run_in_executor(
+                self._executor,
+                partial(
+                    load_page, page_cache=self.page_cache, stream=self.stream, checkpoints=self.checkpoints
+                ),
+                site, category_url, category_name, page,
+            )
+
+    async def load_first_page(
+        self, site: SiteSpec, category_url: str, category_name: str
+    ) -> Tuple[Optional[List[Dict]], Optional[int]]:
+        """Asynchronous counterpart of :func:`load_first_page`."""
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(site.page_url(category_url, 1)):
+            return await loop.run_in_executor(
+                self._executor,
+                partial(
+                    load_first_page, page_cache=self.page_cache, stream=self.stream, checkpoints=self.checkpoints
+                ),
+                site, category_url, category_name,
+            )
+
+    async def scrape_category(
+        self,
+        site: SiteSpec,
+        category_url: str,
+        category_name: str,
+        *,
+        max_pages: Optional[int] = None,
+    ) -> List[Dict]:
+        """Scrape all pages of one category.
+
+        If the first page announces the number of pages, the remaining
+        pages are requested concurrently (still bounded by the per‑host
+        limit) and the result is cut at the first page that failed or
+        came back empty.  Otherwise pages are walked one by one until an
+        empty page.
+        """
+        if max_pages is not None and max_pages < 1:
+            return []
+        first, page_count = await self.load_first_page(site, category_url, category_name)
+        if not first:
+            return []
+        results: List[Dict] = list(first)
+        if page_count is not None:
+            last = page_count if max_pages is None else min(max_pages, page_count)
+            pages = await asyncio.gather(*(
+                self.load_page(site, category_url, category_name, page)
+                for page in range(2, last + 1)
+            ))
+            for products in pages:
+                if not products:
+                    break
+                results.extend(products)
+            return results
+        page = 2
+        while max_pages is None or page <= max_pages:
+            products = await self.load_page(site, category_url, category_name, page)
+            if not products:
+                break
+            results.extend(products)
+            page += 1
+        return results
+
+    async def scrape_all(
+        self,
+        site: SiteSpec,
+        categories: Iterable[Dict],
+        *,
+        max_pages: Optional[int] = None,
+    ) -> List[Dict]:
+        """Scrape every category of a site concurrently."""
+        tasks = []
+        for cat in categories:
+            name = cat.get("name") or ""
+            url = cat.get("url") or ""
+            if not url:
+                continue
+            tasks.append(self.scrape_category(site, url, name, max_pages=max_pages))
+        per_category = await asyncio.gather(*tasks)
+        return [p for products in per_category for p in products]
+
+    def run(self, site: SiteSpec, categories: Iterable[Dict], *, max_pages: Optional[int] = None) -> List[Dict]:
+        """Blocking entry point: run :meth:`scrape_all` in a fresh event loop."""
+
+        async def main() -> List[Dict]:
+            # Semaphores are bound to the loop that created them
+            self._semaphores = {}
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                self._executor = executor
+                try:
+                    return await self.scrape_all(site, categories, max_pages=max_pages)
+                finally:
+                    self._executor = None
+
+        return asyncio.run(main())
+
+
+__all__ = [
+    "SiteSpec",
+    "fetch_html",
+    "load_page",
+    "load_first_page",
+    "iter_category_pages",
+    "AsyncScrapeEngine",
+]
@@ -3,24 +3,179 @@ Scraper for parapharma.ma.
 
 This module defines functions to fetch product listings from the
 parapharma e‑commerce site.  Each category is paginated; the scraper
-iterates over pages until no products are found or an optional
-``max_pages`` limit is reached.  The returned product dictionaries use
-a consistent schema ready for further cleaning and merging.
+reads the number of pages from the pagination block of the first page
+(see :func:`discover_page_count`) and fetches the remaining pages, or,
+when that block is missing, iterates over pages until no products are
+found.  An optional ``max_pages`` limit caps the crawl in both cases.
+The returned product dictionaries use a consistent schema ready for
+further cleaning and merging.
 """
 
 from __future__ import annotations
 
-import requests
-from bs4 import BeautifulSoup
+import math
+import re
 from datetime import datetime
-from typing import List, Dict, Iterable, Optional
+from typing import List, Dict, Iterable, Iterator, Optional
 
 from ..utils.cleaning import clean_price
+from ...config import SCRAPER_FETCH_WORKERS, PARSER_BACKENDS
+from ..utils.http_cache import PageCache
+from ..utils.checkpoint import CheckpointStore
+from .engine import SiteSpec, AsyncScrapeEngine, iter_category_pages
+from .staged import StagedScraper
+from . import sitemap
+from .parsing import select_cards
 
 DEFAULT_SITE = "parapharma.ma"
 
+# CSS selector of a product card, and the (tag, class) SoupStrainer filter
+# used to build only the card subtrees with the BeautifulSoup backends.
+CARD_SELECTOR = ".product-miniature"
+CARD_STRAINER = (None, "product-miniature")
 
-def scrape_category_page(category_url: str, category_name: str, *, max_pages: Optional[int] = None) -> List[Dict]:
+# PrestaShop pagination block: page links (``?page=N``) and the
+# "Affichage 1-24 de 312 article(s)" summary.
+PAGINATION_SELECTOR = "nav.pagination"
+PAGINATION_STRAINER = ("nav", "pagination")
+_PAGE_PARAM_RE = re.compile(r"[?&]page=(\d+)")
+_TOTAL_PRODUCTS_RE = re.compile(r"(\d+)\s*(?:article|produit)", re.IGNORECASE)
+
+
+def page_url(category_url: str, page: int) -> str:
+    """Return the URL of listing page ``page`` (1‑based) of a category."""
+    return f"{category_url}?page={page}"
+
+
+def parse_products(html: str, category_name: str, *, backend: Optional[str] = None) -> List[Dict]:
+    """Extract product dictionaries from the HTML of one listing page.
+
+    Parameters
+    ----------
+    html : str
+        Page source.
+    category_name : str
+        Category name stored in each product.
+    backend : str, optional
+        HTML parser backend (see :mod:`.parsing`).  Defaults to the
+        site's entry in ``config.PARSER_BACKENDS``.
+
+    Returns
+    -------
+    list of dict
+        Products found on the page; empty when the page has no products
+        (i.e. past the last page).
+    """
+    results: List[Dict] = []
+    product_cards = select_cards(
+        html,
+        CARD_SELECTOR,
+        backend=backend or PARSER_BACKENDS.get(DEFAULT_SITE),
+        strainer=CARD_STRAINER,
+    )
+    for card in product_cards:
+        try:
+            name_el = card.select_one("h2.h3.product-title")
+            name = name_el.get_text(strip=True) if name_el else ""
+            # Price (discounted or not)
+            price_el = card.select_one("span.price")
+            price = clean_price(price_el.get_text(strip=True)) if price_el else None
+            # Discount (if present)
+            discount_el = card.select_one("span.discount-amount.discount-product")
+            discount = None
+            original_price = price
+            is_discounted = False
+            if discount_el:
+                disc_value = clean_price(discount_el.get_text(strip=True))
+                if disc_value is not None and price is not None:
+                    discount = disc_value
+                    original_price = round(price + discount, 2)
+                    is_discounted = True
+            # Availability
+            out_of_stock = card.select_one("li.product-flag.out_of_stock") is not None
+            availability = "rupture" if out_of_stock else "disponible"
+            # Product URL
+            link_el = card.select_one("a")
+            product_url = None
+            if link_el and link_el.has_attr("href"):
+                href = link_el["href"]
+                product_url = href if href.startswith("http") else f"https://{DEFAULT_SITE}{href}"
+            # Image URL
+            img_el = card.select_one("img.img-fluid")
+            image_url = img_el["src"] if img_el and img_el.has_attr("src") else None
+            results.append({
+                "site": DEFAULT_SITE,
+                "category": category_name,
+                "name": name,
+                "price": price,
+                "discount": discount,
+                "original_price": original_price,
+                "is_discounted": is_discounted,
+                "availability": availability,
+                "product_url": product_url,
+                "image_url": image_url,
+                "scraped_at": datetime.utcnow().isoformat(),
+            })
+        except Exception as e:
+            print(f"⚠️ Error parsing product: {e}")
+    return results
+
+
+def discover_page_count(html: str, n_products: int, *, backend: Optional[str] = None) -> Optional[int]:
+    """Read the number of pages of a category from its first page.
+
+    The highest page number linked from the pagination list is used;
+    if the list is absent, the total product count of the summary line
+    is divided by the number of products on the page.
+
+    Parameters
+    ----------
+    html : str
+        Source of the first listing page.
+    n_products : int
+        Number of products parsed from that page.
+    backend : str, optional
+        HTML parser backend (see :mod:`.parsing`).
+
+    Returns
+    -------
+    int or None
+        Total number of pages, or ``None`` if the page has no
+        pagination block.
+    """
+    navs = select_cards(
+        html,
+        PAGINATION_SELECTOR,
+        backend=backend or PARSER_BACKENDS.get(DEFAULT_SITE),
+        strainer=PAGINATION_STRAINER,
+    )
+    if not navs:
+        return None
+    nav = navs[0]
+    pages: List[int] = []
+    for link in nav.select("ul.page-list a"):
+        match = _PAGE_PARAM_RE.search(link.get("href") or "")
+        if match:
+            pages.append(int(match.group(1)))
+        text = link.get_text(strip=True)
+        if text.isdigit():
+            pages.append(int(text))
+    if pages:
+        return max(pages)
+    match = _TOTAL_PRODUCTS_RE.search(nav.get_text())
+    if match and n_products > 0:
+        return max(1, math.ceil(int(match.group(1)) / n_products))
+    return None
+
+
+def scrape_category_page(
+    category_url: str,
+    category_name: str,
+    *,
+    max_pages: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    checkpoints: Optional[CheckpointStore] = None,
+) -> List[Dict]:
     """Scrape all products from a single category page.
 
     Parameters
@@ -31,8 +186,14 @@ def scrape_category_page(category_url: str, category_name: str, *, max_pages: Op
         Human‑readable category name.  Stored in each product under the
         ``"category"`` key.
     max_pages : int, optional
-        Maximum number of pages to scrape.  If ``None``, scrape until
-        there are no more products.
+        Maximum number of pages to scrape.  If ``None``, scrape every
+        page announced by the pagination block (or, without one, until
+        there are no more products).
+    page_cache : PageCache, optional
+        Conditional‑GET cache for listing pages.
+    checkpoints : CheckpointStore, optional
+        Record every completed page and skip pages already checkpointed
+        by an interrupted run.
 
     Returns
     -------
@@ -43,76 +204,23 @@ def scrape_category_page(category_url: str, category_name: str, *, max_pages: Op
         ``product_url``, ``image_url`` and ``scraped_at`` fields.
     """
     results: List[Dict] = []
-    page = 1
-    while True:
-        # Stop if we've reached the maximum page limit
-        if max_pages is not None and page > max_pages:
-            break
-        url = f"{category_url}?page={page}"
-        print(f"📦 [parapharma] Scraping {category_name} page {page}: {url}")
-        try:
-            resp = requests.get(url, timeout=30)
-        except Exception as e:
-            print(f"⚠️ Request failed: {e}")
-            break
-        if resp.status_code != 200:
-            print(f"⚠️ HTTP {resp.status_code} for {url}")
-            break
-        soup = BeautifulSoup(resp.text, "html.parser")
-        product_cards = soup.select(".product-miniature")
-        if not product_cards:
-            # No products found: end of pagination
-            break
-        for card in product_cards:
-            try:
-                name_el = card.select_one("h2.h3.product-title")
-                name = name_el.get_text(strip=True) if name_el else ""
-                # Price (discounted or not)
-                price_el = card.select_one("span.price")
-                price = clean_price(price_el.get_text(strip=True)) if price_el else None
-                # Discount (if present)
-                discount_el = card.select_one("span.discount-amount.discount-product")
-                discount = None
-                original_price = price
-                is_discounted = False
-                if discount_el:
-                    disc_value = clean_price(discount_el.get_text(strip=True))
-                    if disc_value is not None and price is not None:
-                        discount = disc_value
-                        original_price = round(price + discount, 2)
-                        is_discounted = True
-                # Availability
-                out_of_stock = card.select_one("li.product-flag.out_of_stock") is not None
-                availability = "rupture" if out_of_stock else "disponible"
-                # Product URL
-                link_el = card.select_one("a")
-                product_url = None
-                if link_el and link_el.has_attr("href"):
-                    href = link_el["href"]
-                    product_url = href if href.startswith("http") else f"https://{DEFAULT_SITE}{href}"
-                # Image URL
-                img_el = card.select_one("img.img-fluid")
-                image_url = img_el["src"] if img_el and img_el.has_attr("src") else None
-                results.append({
-                    "site": DEFAULT_SITE,
-                    "category": category_name,
-                    "name": name,
-                    "price": price,
-                    "discount": discount,
-                    "original_price": original_price,
-                    "is_discounted": is_discounted,
-                    "availability": availability,
-                    "product_url": product_url,
-                    "image_url": image_url,
-                    "scraped_at": datetime.utcnow().isoformat(),
-                })
-            except Exception as e:
-                print(f"⚠️ Error parsing product: {e}")
-        page += 1
+    pages = iter_category_pages(
+        SITE, category_url, category_name, max_pages=max_pages, page_cache=page_cache, checkpoints=checkpoints
+    )
+    for products in pages:
+        results.extend(products)
     return results
 
 
-def scrape_all(categories: Iterable[Dict], *, max_pages: Optional[int] = None) -> List[Dict]:
+def scrape_all(
+    categories: Iterable[Dict],
+    *,
+    max_pages: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    parse_workers: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    checkpoints: Optional[CheckpointStore] = None,
+) -> List[Dict]:
     """Scrape products from all categories.
 
     Parameters
@@ -121,21 +229,152 @@ def scrape_all(categories: Iterable[Dict], *, max_pages: Optional[int] = None) -
         An iterable of category dictionaries with ``"name"`` and ``"url"`` keys.
     max_pages : int, optional
         Maximum number of pages per category.
+    concurrency : int, optional
+        If given, crawl all categories concurrently with the asyncio
+        engine, allowing at most ``concurrency`` requests in flight
+        against the site.  Once a category's first page has given its
+        page count, its remaining pages are fetched concurrently.
+        ``None`` keeps the sequential loop.
+    parse_workers : int, optional
+        If given, use the staged executor: ``concurrency`` (or
+        ``config.SCRAPER_FETCH_WORKERS``) fetcher threads feed a bounded
+        queue drained by ``parse_workers`` parser processes.  The page
+        cache and checkpoints are not used in this mode.
+    page_cache : PageCache, optional
+        Conditional‑GET cache; unchanged pages reuse their previously
+        parsed products.
+    checkpoints : CheckpointStore, optional
+        Record every completed page and skip pages already checkpointed
+        by an interrupted run.
 
     Returns
     -------
     list of dict
         Consolidated list of product dictionaries from all categories.
     """
+    if parse_workers is not None:
+        staged = StagedScraper(fetch_workers=concurrency or SCRAPER_FETCH_WORKERS, parse_workers=parse_workers)
+        return staged.run(SITE, categories, max_pages=max_pages)
+    if concurrency is not None:
+        engine = AsyncScrapeEngine(per_host_limit=concurrency, page_cache=page_cache, checkpoints=checkpoints)
+        return engine.run(SITE, categories, max_pages=max_pages)
     all_products: List[Dict] = []
     for cat in categories:
         name = cat.get("name") or ""
         url = cat.get("url") or ""
         if not url:
             continue
-        products = scrape_category_page(url, name, max_pages=max_pages)
+        products = scrape_category_page(
+            url, name, max_pages=max_pages, page_cache=page_cache, checkpoints=checkpoints
+        )
         all_products.extend(products)
     return all_products
 
 
-__all__ = ["scrape_category_page", "scrape_all"]
\ No newline at end of file
+def parse_product_page(
+    html: str,
+    product_url: str,
+    category_name: Optional[str] = None,
+    *,
+    backend: Optional[str] = None,
+) -> Optional[Dict]:
+    """Extract one product from its own page (see :func:`.sitemap.parse_product_page`)."""
+    return sitemap.parse_product_page(html, product_url, DEFAULT_SITE, category_name, backend=backend)
+
+
+def scrape_incremental(
+    categories: Iterable[Dict],
+    *,
+    known: Optional[Dict[str, Dict]] = None,
+    **kwargs,
+) -> List[Dict]:
+    """Refresh stored products from the sitemap instead of crawling every page.
+
+    Only new products and products whose sitemap ``lastmod`` is newer
+    than their last fetch are fetched; a full
+    :func:`scrape_all` runs when one is due (see :mod:`.sitemap`).
+
+    Parameters
+    ----------
+    categories : iterable of dict
+        Categories used for full crawls.
+    known : dict, optional
+        Stored products keyed by ``product_url``.  Defaults to those in
+        ``para_univer_merged``.
+    **kwargs
+        Options of :func:`.sitemap.scrape_incremental` and of
+        :func:`scrape_all` (``max_pages``, ``concurrency``…).
+
+    Returns
+    -------
+    list of dict
+        Product dictionaries in the same schema as :func:`scrape_all`.
+    """
+    return sitemap.scrape_incremental(SITE, categories, scrape_all=scrape_all, known=known, **kwargs)
+
+
+def iter_all(
+    categories: Iterable[Dict],
+    *,
+    max_pages: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    checkpoints: Optional[CheckpointStore] = None,
+) -> Iterator[Dict]:
+    """Yield products from all categories, page by page.
+
+    This is the lazy counterpart of :func:`scrape_all`: categories and
+    pages are scraped sequentially and each page's products are yielded
+    as soon as it has been parsed, so downstream stages can start
+    before the crawl finishes.
+
+    Parameters
+    ----------
+    categories : iterable of dict
+        Category dictionaries with ``"name"`` and ``"url"`` keys.
+    max_pages : int, optional
+        Maximum number of pages per category.
+    page_cache : PageCache, optional
+        Conditional‑GET cache for listing pages.
+    checkpoints : CheckpointStore, optional
+        Record every completed page and skip pages already checkpointed
+        by an interrupted run.
+
+    Yields
+    ------
+    dict
+        Raw product dictionaries.
+    """
+    for cat in categories:
+        name = cat.get("name") or ""
+        url = cat.get("url") or ""
+        if not url:
+            continue
+        pages = iter_category_pages(
+            SITE, url, name, max_pages=max_pages, page_cache=page_cache, checkpoints=checkpoints
+        )
+        for products in pages:
+            yield from products
+
+
+SITE = SiteSpec(
+    name=DEFAULT_SITE,
+    label="parapharma",
+    page_url=page_url,
+    parse_products=parse_products,
+    parse_product_page=parse_product_page,
+    page_count=discover_page_count,
+)
+
+
+__all__ = [
+    "SITE",
+    "CARD_SELECTOR",
+    "page_url",
+    "parse_products",
+    "discover_page_count",
+    "scrape_category_page",
+    "scrape_all",
+    "parse_product_page",
+    "scrape_incremental",
+    "iter_all",
+]
\ No newline at end of file
@@ -0,0 +1,347 @@
+"""
+Pluggable HTML parser backends for product card extraction.
+
+Parsing listing pages with the pure‑Python ``html.parser`` is the main
+CPU cost of a scrape.  This module hides the parser behind a tiny node
+interface (:class:`Node`) so the site scrapers can extract product
+fields without knowing which library built the tree.  Three backends
+are supported:
+
+``"html.parser"``
+    BeautifulSoup with the standard library parser (always available).
+``"lxml"``
+    BeautifulSoup with the C ``lxml`` parser.
+``"selectolax"``
+    The lexbor engine of ``selectolax``, which parses and runs CSS
+    selectors in C.
+
+The BeautifulSoup backends only build the product‑card subtrees
+(via :class:`bs4.SoupStrainer`) instead of the whole document.  The
+backend of each site is chosen with ``config.PARSER_BACKENDS``; if the
+requested library is not installed, the scrapers fall back to
+``"html.parser"``.
+
+The node interface mirrors the BeautifulSoup calls the scrapers used
+before (``select_one``, ``get_text``, ``has_attr``…), so every backend
+produces the same product dictionaries on well‑formed pages.
+
+For very large pages, :func:`iter_card_fragments` splits a stream of
+text chunks into the raw HTML of each product card as soon as the card
+closes, using the incremental :class:`html.parser.HTMLParser`.  Only
+one card is ever held in memory, so the page never has to be loaded,
+or turned into a tree, as a whole.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # type: ignore # noqa: F401
+    _HAS_LXML = True
+except ImportError:
+    _HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser  # type: ignore
+except ImportError:
+    LexborHTMLParser = None
+
+BACKENDS: Tuple[str, ...] = ("html.parser", "lxml", "selectolax")
+DEFAULT_BACKEND = "html.parser"
+
+_warned: set = set()
+
+
+class Node(ABC):
+    """Backend‑independent view of an HTML element.
+
+    Only the operations needed by the scrapers are exposed.  Backends
+    implement the four abstract methods; the rest is built on them.
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def select_one(self, css: str) -> Optional["Node"]:
+        """Return the first descendant matching ``css``, or ``None``."""
+
+    @abstractmethod
+    def select(self, css: str) -> List["Node"]:
+        """Return every descendant matching ``css``."""
+
+    @abstractmethod
+    def get_text(self, strip: bool = False) -> str:
+        """Return the text content of the element."""
+
+    @abstractmethod
+    def get(self, attr: str, default: Optional[str] = None) -> Optional[str]:
+        """Return an attribute value, or ``default``."""
+
+    def has_attr(self, attr: str) -> bool:
+        return self.get(attr) is not None
+
+    def __getitem__(self, attr: str) -> str:
+        value = self.get(attr)
+        if value is None:
+            raise KeyError(attr)
+        return value
+
+    @property
+    def classes(self) -> List[str]:
+        return (self.get("class") or "").split()
+
+
+class _SoupNode(Node):
+    """:class:`Node` backed by a BeautifulSoup tag."""
+
+    __slots__ = ("_tag",)
+
+    def __init__(self, tag) -> None:
+        self._tag = tag
+
+    def select_one(self, css: str) -> Optional[Node]:
+        tag = self._tag.select_one(css)
+        return _SoupNode(tag) if tag is not None else None
+
+    def select(self, css: str) -> List[Node]:
+        return [_SoupNode(t) for t in self._tag.select(css)]
+
+    def get_text(self, strip: bool = False) -> str:
+        return self._tag.get_text(strip=strip)
+
+    def get(self, attr: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._tag.get(attr)
+        if value is None:
+            return default
+        # Multi‑valued attributes (e.g. class) come back as lists
+        return " ".join(value) if isinstance(value, list) else value
+
+    @property
+    def classes(self) -> List[str]:
+        return list(self._tag.get("class", []))
+
+
+class _LexborNode(Node):
+    """:class:`Node` backed by a selectolax lexbor node."""
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node) -> None:
+        self._node = node
+
+    def select_one(self, css: str) -> Optional[Node]:
+        node = self._node.css_first(css)
+        return _LexborNode(node) if node is not None else None
+
+    def select(self, css: str) -> List[Node]:
+        return [_LexborNode(n) for n in self._node.css(css)]
+
+    def get_text(self, strip: bool = False) -> str:
+        return self._node.text(deep=True, separator="", strip=strip)
+
+    def get(self, attr: str, default: Optional[str] = None) -> Optional[str]:
+        attrs = self._node.attributes
+        if attr not in attrs:
+            return default
+        # Valueless attributes are ``None`` in selectolax but "" in bs4
+        value = attrs[attr]
+        return "" if value is None else value
+
+
+def _has_class(css_class: str):
+    """Return a SoupStrainer predicate matching elements with ``css_class``.
+
+    Depending on the bs4 version, the strainer sees the raw ``class``
+    attribute either as a string or as a list of classes.
+    """
+
+    def match(value) -> bool:
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return css_class in classes
+
+    return match
+
+
+def resolve_backend(backend: Optional[str]) -> str:
+    """Return an installed backend, falling back to ``"html.parser"``."""
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parser backend {backend!r}; expected one of {BACKENDS}")
+    available = (
+        backend == "html.parser"
+        or (backend == "lxml" and _HAS_LXML)
+        or (backend == "selectolax" and LexborHTMLParser is not None)
+    )
+    if available:
+        return backend
+    if backend not in _warned:
+        _warned.add(backend)
+        print(f"⚠️ Parser backend {backend!r} is not installed; falling back to html.parser")
+    return DEFAULT_BACKEND
+
+
+def select_cards(
+    html: str,
+    selector: str,
+    *,
+    backend: Optional[str] = None,
+    strainer: Optional[Tuple[Optional[str], str]] = None,
+) -> List[Node]:
+    """Parse a page and return the nodes matching the card selector.
+
+    Parameters
+    ----------
+    html : str
+        Page source.
+    selector : str
+        CSS selector of a product card (e.g. ``".product-miniature"``).
+    backend : str, optional
+        One of :data:`BACKENDS`.  Defaults to ``"html.parser"``.
+    strainer : tuple, optional
+        ``(tag_name, css_class)`` restricting the BeautifulSoup backends
+        to the card subtrees (``tag_name`` may be ``None`` for any tag).
+        Must match at least every element matched by ``selector``.
+        Ignored by the selectolax backend.
+
+    Returns
+    -------
+    list of Node
+        Card nodes in document order.
+    """
+    backend = resolve_backend(backend)
+    if backend == "selectolax":
+        tree = LexborHTMLParser(html)
+        return [_LexborNode(n) for n in tree.css(selector)]
+    parse_only = None
+    if strainer:
+        name, css_class = strainer
+        parse_only = SoupStrainer(name, class_=_has_class(css_class))
+    soup = BeautifulSoup(html, backend, parse_only=parse_only)
+    return [_SoupNode(t) for t in soup.select(selector)]
+
+
+class _CardSplitter(HTMLParser):
+    """Event parser re‑emitting the raw markup of matching elements.
+
+    Markup outside the cards is discarded.  Inside a card, every event is
+    serialised back to HTML (start tags verbatim, entities unconverted)
+    so the fragment parses exactly like the original subtree.  Only
+    ``tag`` elements are counted to find the end of the card, which
+    keeps unclosed ``<p>``/``<li>`` elements from confusing the depth.
+    """
+
+    def __init__(self, tag: str, css_class: str) -> None:
+        super().__init__(convert_charrefs=False)
+        self.tag = tag
+        self.css_class = css_class
+        self.done: List[str] = []
+        self._parts: List[str] = []
+        self._depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self._depth:
+            self._parts.append(self.get_starttag_text())
+            if tag == self.tag:
+                self._depth += 1
+            return
+        if tag == self.tag:
+            classes = (dict(attrs).get("class") or "").split()
+            if self.css_class in classes:
+                self._parts = [self.get_starttag_text()]
+                self._depth = 1
+
+    def handle_startendtag(self, tag, attrs):
+        if self._depth:
+            self._parts.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if not self._depth:
+            return
+        self._parts.append(f"</{tag}>")
+        if tag == self.tag:
+            self._depth -= 1
+            if not self._depth:
+                self.done.append("".join(self._parts))
+                self._parts = []
+
+    def handle_data(self, data):
+        if self._depth:
+            self._parts.append(data)
+
+    def handle_entityref(self, name):
+        if self._depth:
+            self._parts.append(f"&{name};")
+
+    def handle_charref(self, name):
+        if self._depth:
+            self._parts.append(f"&#{name};")
+
+    def handle_comment(self, data):
+        if self._depth:
+            self._parts.append(f"<!--{data}-->")
+
+
+def iter_card_fragments(chunks: Iterable[str], tag: str, css_class: str) -> Iterator[str]:
+    """Yield the raw HTML of each ``<tag class="css_class">`` element.
+
+    Parameters
+    ----------
+    chunks : iterable of str
+        Decoded page text, in arbitrary pieces (e.g. from
+        ``Response.iter_content(decode_unicode=True)``).
+    tag, css_class : str
+        Element name and class identifying a card.
+
+    Yields
+    ------
+    str
+        One card fragment at a time, in document order, as soon as its
+        closing tag has been read.  Nested cards are part of their
+        outer card's fragment.
+    """
+    splitter = _CardSplitter(tag, css_class)
+    for chunk in chunks:
+        splitter.feed(chunk)
+        if splitter.done:
+            yield from splitter.done
+            splitter.done = []
+    splitter.close()
+    yield from splitter.done
+
+
+def iter_fragment_cards(fragments: Iterable[str], selector: str, *, backend: Optional[str] = None) -> Iterator[Node]:
+    """Parse HTML fragments one at a time and yield their card nodes.
+
+    Each BeautifulSoup tree is decomposed as soon as the caller has moved
+    past its cards.  bs4 trees are reference cycles, so without this they
+    would pile up until the next full garbage collection and memory would
+    grow with the page size.
+    """
+    backend = resolve_backend(backend)
+    for fragment in fragments:
+        if backend == "selectolax":
+            yield from (_LexborNode(n) for n in LexborHTMLParser(fragment).css(selector))
+            continue
+        soup = BeautifulSoup(fragment, backend)
+        try:
+            yield from (_SoupNode(t) for t in soup.select(selector))
+        finally:
+            soup.decompose()
+
+
+__all__ = [
+    "BACKENDS",
+    "DEFAULT_BACKEND",
+    "Node",
+    "resolve_backend",
+    "select_cards",
+    "iter_card_fragments",
+    "iter_fragment_cards",
+]
@@ -0,0 +1,404 @@
+"""
+Sitemap‑driven incremental crawling.
+
+Most products do not change between two runs, yet a full crawl requests
+every listing page of every category.  Both sites publish an XML
+sitemap giving each product URL with its ``lastmod`` date.  In
+incremental mode the scraper:
+
+1. reads the sitemap (following sitemap indexes, gzip or plain XML);
+2. compares it against the product URLs seen by the previous run and the
+   time each was last fetched;
+3. fetches only the product pages that are new or were modified after
+   they were last fetched, and parses them with the site's product page
+   parser;
+4. returns the products stored in ``para_univer_merged``, with changed
+   ones refreshed and new ones appended, in the same raw schema as the
+   listing scrapers.
+
+The sitemap cannot tell us about deleted products, so a full listing
+crawl still runs every ``config.SITEMAP_FULL_CRAWL_INTERVAL`` seconds
+(and whenever nothing is stored yet or the sitemap is unavailable).
+The time of the last full crawl of each site and the fetch time of each
+product URL are kept in a small JSON state file under
+``config.DATA_DIR``.  Fetch times are tracked per URL, rather than read
+from the stored products, because deduplication drops some URLs from
+``para_univer_merged`` and unchanged products are not rewritten there.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ...config import (
+    DATA_DIR,
+    PARSER_BACKENDS,
+    SCRAPER_CONCURRENCY_PER_HOST,
+    SITEMAP_FULL_CRAWL_INTERVAL,
+    SITEMAP_URLS,
+)
+from ..utils import http
+from ..utils.cleaning import clean_price
+from ..utils.db import get_collection
+from .engine import SiteSpec, fetch_html
+from .parsing import select_cards
+
+# Sitemap indexes nest at most a couple of levels; guard against loops
+_MAX_SITEMAP_DEPTH = 3
+
+# Serialises the read‑merge‑write of the state file across threads
+_state_lock = threading.Lock()
+
+# Fields of a stored (cleaned) product that make up the raw schema
+RAW_FIELDS = (
+    "site", "category", "name", "price", "discount", "original_price",
+    "is_discounted", "availability", "product_url", "image_url",
+)
+
+
+def _local(tag: str) -> str:
+    """Strip the XML namespace from a tag name."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """Parse a W3C datetime (``2024-05-01`` or ``2024-05-01T10:00:00+01:00``).
+
+    Returns a naive UTC datetime, comparable with the fetch times kept
+    by :class:`SitemapState`, or ``None`` if the value is missing or
+    invalid.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def iter_sitemap(url: str, *, _depth: int = 0) -> Iterator[Tuple[str, Optional[datetime]]]:
+    """Yield ``(url, lastmod)`` for every page listed by a sitemap.
+
+    Sitemap indexes are followed recursively.  Sitemaps that cannot be
+    downloaded or parsed are reported and skipped.
+    """
+    resp = http.fetch(url)
+    if resp is None or resp.status_code != 200:
+        print(f"⚠️ Could not download sitemap {url}")
+        return
+    content = resp.content
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError as e:
+        print(f"⚠️ Invalid sitemap {url}: {e}")
+        return
+    kind = _local(root.tag)
+    for entry in root:
+        fields = {_local(child.tag): (child.text or "").strip() for child in entry}
+        loc = fields.get("loc")
+        if not loc:
+            continue
+        if kind == "sitemapindex":
+            if _depth < _MAX_SITEMAP_DEPTH:
+                yield from iter_sitemap(loc, _depth=_depth + 1)
+        else:
+            yield loc, parse_lastmod(fields.get("lastmod"))
+
+
+def is_product_url(url: str) -> bool:
+    """Heuristic used to keep product pages out of the other sitemap entries.
+
+    PrestaShop product URLs end in ``.html``; categories, CMS pages and
+    the home page do not.
+    """
+    return url.split("?", 1)[0].endswith(".html")
+
+
+def parse_product_page(
+    html: str,
+    product_url: str,
+    site_name: str,
+    category_name: Optional[str] = None,
+    *,
+    backend: Optional[str] = None,
+) -> Optional[Dict]:
+    """Extract a raw product dictionary from a PrestaShop product page.
+
+    Visible elements of the product block are used first, with the
+    ``og:``/``product:`` meta tags as fallbacks.  ``category_name`` is
+    kept if given; otherwise the first category of the breadcrumb is
+    used.  Returns ``None`` if the page has no product name.
+    """
+    roots = select_cards(html, "html", backend=backend or PARSER_BACKENDS.get(site_name))
+    if not roots:
+        return None
+    root = roots[0]
+
+    def text(css: str) -> Optional[str]:
+        node = root.select_one(css)
+        return node.get_text(strip=True) if node else None
+
+    def meta(prop: str) -> Optional[str]:
+        node = root.select_one(f'meta[property="{prop}"]')
+        return node.get("content") if node else None
+
+    name = text("h1[itemprop=name]") or text("h1.product-title") or text("h1") or meta("og:title")
+    if not name:
+        return None
+    price = clean_price(text(".current-price span.price") or text(".current-price") or "")
+    if price is None:
+        try:
+            price = float(meta("product:price:amount") or "")
+        except ValueError:
+            price = None
+    regular = clean_price(text(".product-discount .regular-price") or text(".regular-price") or "")
+    original_price = price
+    discount = None
+    is_discounted = False
+    if regular is not None and price is not None and regular > price:
+        original_price = regular
+        discount = round(regular - price, 2)
+        is_discounted = True
+    availability_node = root.select_one('link[itemprop=availability]')
+    availability_text = (text("#product-availability") or "").lower()
+    out_of_stock = (
+        (availability_node is not None and "outofstock" in (availability_node.get("href") or "").lower())
+        or "rupture" in availability_text
+        or "épuisé" in availability_text
+    )
+    image = root.select_one(".product-cover img")
+    image_url = (image.get("src") if image else None) or meta("og:image")
+    if category_name is None:
+        crumbs = [c.get_text(strip=True) for c in root.select(".breadcrumb li")]
+        category_name = crumbs[1] if len(crumbs) > 2 else ""
+    return {
+        "site": site_name,
+        "category": category_name,
+        "name": name,
+        "price": price,
+        "discount": discount,
+        "original_price": original_price,
+        "is_discounted": is_discounted,
+        "availability": "rupture" if out_of_stock else "disponible",
+        "product_url": product_url,
+        "image_url": image_url,
+        "scraped_at": datetime.utcnow().isoformat(),
+    }
+
+
+class SitemapState:
+    """Crawl bookkeeping of each site, persisted as JSON.
+
+    For every site the state holds the time of the last full crawl and
+    the product URLs seen by the last run with the time each was last
+    fetched.
+
+    The sites of a run are refreshed from parallel threads, each possibly
+    with its own instance: writes re‑read the file and only replace the
+    entry of their site, under a lock shared by every instance.
+
+    Parameters
+    ----------
+    path : str or Path, optional
+        State file.  Defaults to ``DATA_DIR / "sitemap_state.json"``.
+    """
+
+    def __init__(self, path: Optional[os.PathLike] = None) -> None:
+        self.path = Path(path) if path is not None else DATA_DIR / "sitemap_state.json"
+        self._state: Dict[str, Dict] = self._load()
+
+    def _site(self, site: str) -> Dict:
+        entry = self._state.get(site)
+        if isinstance(entry, str):
+            # Older files only held the time of the last full crawl
+            entry = {"full_crawl_at": entry}
+        return entry or {}
+
+    def full_crawl_due(self, site: str, interval: float = SITEMAP_FULL_CRAWL_INTERVAL) -> bool:
+        """``True`` if the site was never fully crawled or not for ``interval`` seconds."""
+        last = self._site(site).get("full_crawl_at")
+        if last is None:
+            return True
+        return (datetime.utcnow() - datetime.fromisoformat(last)).total_seconds() >= interval
+
+    def fetched(self, site: str) -> Dict[str, datetime]:
+        """Return the product URLs seen by the last run with their fetch time."""
+        return {url: datetime.fromisoformat(at) for url, at in self._site(site).get("fetched", {}).items()}
+
+    def record_fetched(self, site: str, fetched: Dict[str, datetime]) -> None:
+        """Replace the product URLs of ``site`` and their fetch times."""
+        entry = self._site(site)
+        entry["fetched"] = {url: at.isoformat() for url, at in fetched.items()}
+        self._state[site] = entry
+        self._save(site)
+
+    def mark_full_crawl(self, site: str, urls: Iterable[str] = (), *, at: Optional[datetime] = None) -> None:
+        """Record that a full crawl of ``site``, started ``at``, just completed.
+
+        ``urls`` are the product URLs it returned; they replace the URLs
+        seen by previous runs, all fetched at ``at`` (default: now).
+        """
+        at = at or datetime.utcnow()
+        self._state[site] = {
+            "full_crawl_at": datetime.utcnow().isoformat(),
+            "fetched": {url: at.isoformat() for url in urls if url},
+        }
+        self._save(site)
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, site: str) -> None:
+        """Write the entry of ``site``, keeping the other sites' entries on disk."""
+        with _state_lock:
+            state = self._load()
+            state[site] = self._state[site]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(state, fh)
+            os.replace(tmp_path, self.path)
+
+
+def load_known(site: str, *, collection=None) -> Dict[str, Dict]:
+    """Return the stored products of a site keyed by ``product_url``."""
+    collection = collection if collection is not None else get_collection("para_univer_merged")
+    projection = {field: 1 for field in RAW_FIELDS + ("scraped_at",)}
+    known: Dict[str, Dict] = {}
+    for doc in collection.find({"site": site, "product_url": {"$ne": None}}, projection):
+        known.setdefault(doc["product_url"], doc)
+    return known
+
+
+def _to_raw(doc: Dict) -> Dict:
+    """Turn a stored, cleaned product back into the raw scraper schema."""
+    raw = {field: doc.get(field) for field in RAW_FIELDS}
+    scraped_at = doc.get("scraped_at")
+    raw["scraped_at"] = scraped_at.isoformat() if isinstance(scraped_at, datetime) else scraped_at
+    return raw
+
+
+def scrape_incremental(
+    site: SiteSpec,
+    categories: Iterable[Dict],
+    *,
+    scrape_all: Callable[..., List[Dict]],
+    known: Optional[Dict[str, Dict]] = None,
+    sitemap_url: Optional[str] = None,
+    state: Optional[SitemapState] = None,
+    full_crawl_interval: float = SITEMAP_FULL_CRAWL_INTERVAL,
+    concurrency: Optional[int] = None,
+    **crawl_kwargs,
+) -> List[Dict]:
+    """Refresh a site's products from its sitemap, or fully crawl it when due.
+
+    Parameters
+    ----------
+    site : SiteSpec
+        Site to refresh; must provide ``parse_product_page``.
+    categories : iterable of dict
+        Categories passed to ``scrape_all`` for a full crawl.
+    scrape_all : callable
+        The site's full listing crawler.
+    known : dict, optional
+        Stored products keyed by URL.  Defaults to :func:`load_known`.
+    sitemap_url : str, optional
+        Defaults to ``config.SITEMAP_URLS[site.name]``.
+    state : SitemapState, optional
+        Full‑crawl and fetch‑time bookkeeping.  Defaults to the shared
+        state file.
+    full_crawl_interval : float, optional
+        Seconds between two full crawls.
+    concurrency : int, optional
+        Product pages fetched at once (and passed on to ``scrape_all``).
+    **crawl_kwargs
+        Other options passed to ``scrape_all`` for a full crawl.
+
+    Returns
+    -------
+    list of dict
+        Raw product dictionaries covering the whole catalogue.
+    """
+    state = state or SitemapState()
+    categories = list(categories)
+    known = load_known(site.name) if known is None else known
+    fetched = state.fetched(site.name)
+    sitemap_url = sitemap_url or SITEMAP_URLS.get(site.name)
+    entries: List[Tuple[str, Optional[datetime]]] = []
+    incremental = known and fetched and sitemap_url and site.parse_product_page is not None
+    if incremental and not state.full_crawl_due(site.name, full_crawl_interval):
+        entries = [(url, lastmod) for url, lastmod in iter_sitemap(sitemap_url) if is_product_url(url)]
+    if not entries:
+        print(f"🔁 [{site.label}] Full crawl")
+        started = datetime.utcnow()
+        products = scrape_all(categories, concurrency=concurrency, **crawl_kwargs)
+        state.mark_full_crawl(site.name, (p.get("product_url") for p in products), at=started)
+        return products
+
+    def stale(url: str, lastmod: Optional[datetime]) -> bool:
+        fetched_at = fetched.get(url)
+        return fetched_at is None or lastmod is None or lastmod > fetched_at
+
+    to_fetch = list(dict.fromkeys(url for url, lastmod in entries if stale(url, lastmod)))
+    print(
+        f"🗺️ [{site.label}] Sitemap: {len(entries)} products, {len(to_fetch)} new or changed, "
+        f"{len(known)} stored"
+    )
+    category_names = {(c.get("name") or "").lower(): c.get("name") or "" for c in categories}
+
+    def refresh(url: str) -> Tuple[Optional[Dict], Optional[datetime]]:
+        fetched_at = datetime.utcnow()
+        html = fetch_html(url)
+        if html is None:
+            return None, None
+        doc = known.get(url)
+        category = doc.get("category") if doc is not None else None
+        product = site.parse_product_page(html, url, category)
+        if product is not None and doc is None:
+            # Use the configured spelling of a breadcrumb category
+            product["category"] = category_names.get(product["category"].lower(), product["category"])
+        return product, fetched_at
+
+    with ThreadPoolExecutor(max_workers=concurrency or SCRAPER_CONCURRENCY_PER_HOST) as executor:
+        results = dict(zip(to_fetch, executor.map(refresh, to_fetch)))
+    refreshed = {url: product for url, (product, _) in results.items()}
+    # Pages that could not be downloaded are fetched again next time
+    seen = {url for url, _ in entries}
+    fetched = {url: at for url, at in fetched.items() if url in seen}
+    fetched.update((url, at) for url, (_, at) in results.items() if at is not None)
+    state.record_fetched(site.name, fetched)
+    products = []
+    for url, doc in known.items():
+        products.append(refreshed.get(url) or _to_raw(doc))
+    for url in to_fetch:
+        if url not in known and refreshed.get(url) is not None:
+            products.append(refreshed[url])
+    return products
+
+
+__all__ = [
+    "parse_lastmod",
+    "iter_sitemap",
+    "is_product_url",
+    "parse_product_page",
+    "SitemapState",
+    "load_known",
+    "scrape_incremental",
+]
@@ -0,0 +1,169 @@
+"""
+Staged fetch/parse executor.
+
+Downloading listing pages is I/O‑bound while parsing them is CPU‑bound
+and limited by the GIL.  :class:`StagedScraper` separates the two:
+
+* a pool of **fetcher threads** walks the categories (one category per
+  thread at a time) and pushes raw HTML into a bounded
+  :class:`queue.Queue`;
+* a **dispatcher thread** takes pages off that queue and hands them to a
+  :class:`~concurrent.futures.ProcessPoolExecutor` of **parser
+  workers**, which run the site's ``parse_products`` in parallel.
+
+While page *N* of a category is being parsed, its fetcher already
+downloads page *N + 1*, so parse time no longer adds to fetch time.
+Pagination still stops at the first page that fails or parses to zero
+products; at most one page past the end is fetched speculatively.
+
+Backpressure keeps memory bounded: a fetcher blocks when the queue is
+full, and the dispatcher never has more than ``2 × parse_workers`` pages
+in the process pool.  At any moment at most ``queue_size +
+2 × parse_workers + 2 × fetch_workers`` pages of HTML are alive.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ...config import SCRAPER_FETCH_WORKERS, SCRAPER_PARSE_WORKERS, SCRAPER_QUEUE_SIZE
+from .engine import SiteSpec, fetch_html
+
+# Sentinel telling the dispatcher to stop
+_STOP = object()
+
+
+class StagedScraper:
+    """Producer/consumer scraper with separate fetch and parse stages.
+
+    Parameters
+    ----------
+    fetch_workers : int, optional
+        Number of fetcher threads, i.e. categories downloaded at once.
+    parse_workers : int, optional
+        Number of parser processes.
+    queue_size : int, optional
+        Capacity of the queue between fetchers and parsers, in pages.
+    """
+
+    def __init__(
+        self,
+        *,
+        fetch_workers: int = SCRAPER_FETCH_WORKERS,
+        parse_workers: int = SCRAPER_PARSE_WORKERS,
+        queue_size: int = SCRAPER_QUEUE_SIZE,
+    ) -> None:
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = max(1, parse_workers)
+        self.queue_size = max(1, queue_size)
+
+    # ------------------------------------------------------------------
+    # Stages
+
+    def _dispatch(self, pages: "queue.Queue", pool: ProcessPoolExecutor) -> None:
+        """Move pages from the queue into the process pool."""
+        in_flight = threading.BoundedSemaphore(2 * self.parse_workers)
+        while True:
+            item = pages.get()
+            if item is _STOP:
+                return
+            site, html, category_name, result = item
+            in_flight.acquire()
+            try:
+                fut = pool.submit(site.parse_products, html, category_name)
+            except Exception as e:
+                in_flight.release()
+                result.set_exception(e)
+                continue
+
+            def done(f: Future, result: Future = result) -> None:
+                in_flight.release()
+                if f.exception() is not None:
+                    result.set_exception(f.exception())
+                else:
+                    result.set_result(f.result())
+
+            fut.add_done_callback(done)
+
+    def _parse(self, pages: "queue.Queue", site: SiteSpec, html: str, category_name: str) -> Future:
+        """Queue a page for parsing and return a future of its products."""
+        result: Future = Future()
+        pages.put((site, html, category_name, result))
+        return result
+
+    def _fetch(self, site: SiteSpec, category_url: str, category_name: str, page: int) -> Optional[str]:
+        url = site.page_url(category_url, page)
+        print(f"📦 [{site.label}] Fetching {category_name} page {page}: {url}")
+        return fetch_html(url)
+
+    def _crawl_category(
+        self,
+        pages: "queue.Queue",
+        site: SiteSpec,
+        category_url: str,
+        category_name: str,
+        max_pages: Optional[int],
+    ) -> List[Dict]:
+        """Fetch the pages of one category, overlapping fetch and parse."""
+        results: List[Dict] = []
+        page = 1
+        html = self._fetch(site, category_url, category_name, page)
+        while html is not None:
+            parsed = self._parse(pages, site, html, category_name)
+            # Prefetch the next page while the current one is parsed
+            next_html = None
+            if max_pages is None or page + 1 <= max_pages:
+                next_html = self._fetch(site, category_url, category_name, page + 1)
+            try:
+                products = parsed.result()
+            except Exception as e:
+                print(f"⚠️ Error parsing {category_name} page {page}: {e}")
+                break
+            if not products:
+                break
+            results.extend(products)
+            page += 1
+            html = next_html
+        return results
+
+    # ------------------------------------------------------------------
+    # Entry point
+
+    def run(self, site: SiteSpec, categories: Iterable[Dict], *, max_pages: Optional[int] = None) -> List[Dict]:
+        """Scrape every category of a site.
+
+        Returns
+        -------
+        list of dict
+            Products in the same order as the sequential scraper
+            (categories in input order, pages ascending).
+        """
+        jobs: List[Tuple[str, str]] = []
+        for cat in categories:
+            name = cat.get("name") or ""
+            url = cat.get("url") or ""
+            if url:
+                jobs.append((url, name))
+        if not jobs:
+            return []
+        pages: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            dispatcher = threading.Thread(target=self._dispatch, args=(pages, pool), daemon=True)
+            dispatcher.start()
+            try:
+                with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetchers:
+                    futures = [
+                        fetchers.submit(self._crawl_category, pages, site, url, name, max_pages)
+                        for url, name in jobs
+                    ]
+                    per_category = [f.result() for f in futures]
+            finally:
+                pages.put(_STOP)
+                dispatcher.join()
+        return [p for products in per_category for p in products]
+
+
+__all__ = ["StagedScraper"]
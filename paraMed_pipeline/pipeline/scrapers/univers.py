@@ -6,21 +6,230 @@ Univers ParaDiscount site.  Similar to the parapharma scraper, it
 iterates over category pages until no products are found or an optional
 ``max_pages`` limit is reached.  The returned product dictionaries
 follow a consistent schema for further processing.
+
+Univers listings are requested with ``resultsPerPage=3846``, so a single
+response can hold thousands of product cards.  In streaming mode
+(:func:`stream_products`, :func:`iter_category_products` or
+``stream=True``) the response is read incrementally and each card is
+parsed as soon as it closes, so neither the full page text nor its parse
+tree is ever held in memory.
 """
 
 from __future__ import annotations
 
-import requests
-from bs4 import BeautifulSoup
+import codecs
 from datetime import datetime
-from typing import List, Dict, Iterable, Optional
+from typing import List, Dict, Iterable, Iterator, Optional
+
+import requests
 
+from ..utils import http
 from ..utils.cleaning import clean_price
+from ...config import SCRAPER_FETCH_WORKERS, PARSER_BACKENDS, UNIVERS_STREAMING, STREAM_CHUNK_SIZE
+from ..utils.http_cache import PageCache
+from ..utils.checkpoint import CheckpointStore
+from .engine import SiteSpec, AsyncScrapeEngine, iter_category_pages
+from .staged import StagedScraper
+from . import sitemap
+from .parsing import Node, select_cards, iter_card_fragments, iter_fragment_cards
 
 DEFAULT_SITE = "universparadiscount.ma"
 
+# CSS selector of a product card, and the (tag, class) SoupStrainer filter
+# used to build only the card subtrees with the BeautifulSoup backends.
+CARD_SELECTOR = "div.item"
+CARD_STRAINER = ("div", "item")
+
+
+def page_url(category_url: str, page: int) -> str:
+    """Return the URL of listing page ``page`` (1‑based) of a category."""
+    return f"{category_url}?resultsPerPage=3846&page={page}"
+
+
+def _parse_item(item: Node, category_name: str) -> Dict:
+    """Build the product dictionary of one ``div.item`` card."""
+    # Name and URL
+    name = None
+    name_tag = item.select_one(".product_name a")
+    if name_tag:
+        name = name_tag.get("title") or name_tag.get_text(strip=True)
+    product_url = None
+    if name_tag and name_tag.has_attr("href"):
+        href = name_tag["href"]
+        product_url = href if href.startswith("http") else f"https://{DEFAULT_SITE}{href}"
+    # Image
+    image_url = None
+    img_tag = item.select_one("img.ax-img-loader")
+    if img_tag and img_tag.has_attr("src"):
+        image_url = img_tag["src"]
+    # Category (fallback to provided category_name)
+    category_tag = item.select_one(".ax-product-cats a")
+    category = category_tag.get_text(strip=True) if category_tag else category_name
+    # Prices
+    original_price = None
+    discounted_price = None
+    orig_tag = item.select_one("span.regular-price")
+    if orig_tag:
+        original_price = clean_price(orig_tag.get_text())
+    disc_tag = item.select_one("span.price")
+    if disc_tag:
+        discounted_price = clean_price(disc_tag.get_text())
+    # Determine price, discount and flag
+    price = None
+    discount = None
+    is_discounted = False
+    # If both present and discount price is lower, use discounted
+    if discounted_price is not None and original_price is not None and discounted_price < original_price:
+        price = discounted_price
+        discount = round(original_price - discounted_price, 2)
+        is_discounted = True
+    else:
+        price = discounted_price or original_price
+        if original_price is not None and price is not None and original_price > price:
+            discount = round(original_price - price, 2)
+            is_discounted = True
+    # Flags
+    flags = item.select(".label-flag")
+    out_of_stock = any("type-out_of_stock" in f.classes for f in flags)
+    availability = "rupture" if out_of_stock else "disponible"
+    return {
+        "site": DEFAULT_SITE,
+        "category": category,
+        "name": name or "",
+        "price": price,
+        "discount": discount,
+        "original_price": original_price,
+        "is_discounted": is_discounted,
+        "availability": availability,
+        "product_url": product_url,
+        "image_url": image_url,
+        "scraped_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _parse_items(items: Iterable[Node], category_name: str) -> Iterator[Dict]:
+    """Parse cards one by one, skipping (and reporting) broken ones."""
+    for item in items:
+        try:
+            yield _parse_item(item, category_name)
+        except Exception as e:
+            print(f"⚠️ Error parsing univers product: {e}")
+
+
+def parse_products(html: str, category_name: str, *, backend: Optional[str] = None) -> List[Dict]:
+    """Extract product dictionaries from the HTML of one listing page.
+
+    Parameters
+    ----------
+    html : str
+        Page source.
+    category_name : str
+        Category name stored in each product.
+    backend : str, optional
+        HTML parser backend (see :mod:`.parsing`).  Defaults to the
+        site's entry in ``config.PARSER_BACKENDS``.
+
+    Returns
+    -------
+    list of dict
+        Products found on the page; empty when the page has no products
+        (i.e. past the last page).
+    """
+    items = select_cards(
+        html,
+        CARD_SELECTOR,
+        backend=backend or PARSER_BACKENDS.get(DEFAULT_SITE),
+        strainer=CARD_STRAINER,
+    )
+    return list(_parse_items(items, category_name))
+
+
+def _iter_response_products(resp: requests.Response, category_name: str, backend: Optional[str]) -> Iterator[Dict]:
+    """Parse a streamed response card by card, closing it when done."""
+    decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+
+    def chunks() -> Iterator[str]:
+        for raw in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            yield decoder.decode(raw)
+        yield decoder.decode(b"", final=True)
+
+    try:
+        fragments = iter_card_fragments(chunks(), *CARD_STRAINER)
+        cards = iter_fragment_cards(fragments, CARD_SELECTOR, backend=backend)
+        yield from _parse_items(cards, category_name)
+    except requests.RequestException as e:
+        print(f"⚠️ Stream interrupted for {resp.url}: {e}")
+    finally:
+        resp.close()
+
+
+def stream_products(url: str, category_name: str, *, backend: Optional[str] = None) -> Optional[Iterator[Dict]]:
+    """Download a listing page incrementally and yield its products.
+
+    Parameters
+    ----------
+    url : str
+        Full URL of the listing page.
+    category_name : str
+        Category name stored in each product.
+    backend : str, optional
+        Parser backend used for each card fragment.  Defaults to the
+        site's entry in ``config.PARSER_BACKENDS``.
+
+    Returns
+    -------
+    iterator of dict or None
+        A generator yielding product dictionaries as each card closes,
+        or ``None`` if the page could not be downloaded.
+    """
+    resp = http.fetch(url, stream=True)
+    if resp is None:
+        return None
+    if resp.status_code != 200:
+        print(f"⚠️ HTTP {resp.status_code} for {url}")
+        resp.close()
+        return None
+    return _iter_response_products(resp, category_name, backend or PARSER_BACKENDS.get(DEFAULT_SITE))
+
+
+def iter_category_products(
+    category_url: str,
+    category_name: str,
+    *,
+    max_pages: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> Iterator[Dict]:
+    """Yield the products of a category one at a time, streaming each page.
 
-def scrape_category_page(category_url: str, category_name: str, *, max_pages: Optional[int] = None) -> List[Dict]:
+    This is the memory‑bounded counterpart of :func:`scrape_category_page`:
+    products are yielded as soon as their card has been read, so peak
+    memory does not depend on the size of the page.
+    """
+    page = 1
+    while max_pages is None or page <= max_pages:
+        url = page_url(category_url, page)
+        print(f"📦 [univers] Streaming {category_name} page {page}: {url}")
+        products = stream_products(url, category_name, backend=backend)
+        if products is None:
+            break
+        found = False
+        for product in products:
+            found = True
+            yield product
+        if not found:
+            break
+        page += 1
+
+
+def scrape_category_page(
+    category_url: str,
+    category_name: str,
+    *,
+    max_pages: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    stream: bool = UNIVERS_STREAMING,
+    checkpoints: Optional[CheckpointStore] = None,
+) -> List[Dict]:
     """Scrape all products from a single category of the Univers site.
 
     Parameters
@@ -32,6 +241,15 @@ def scrape_category_page(category_url: str, category_name: str, *, max_pages: Op
     max_pages : int, optional
         Maximum number of pages to scrape.  ``None`` means scrape until
         no products are found.
+    page_cache : PageCache, optional
+        Conditional‑GET cache for listing pages.  Not used when
+        ``stream`` is true.
+    stream : bool, optional
+        Read and parse each page incrementally instead of loading the
+        whole response and its parse tree.
+    checkpoints : CheckpointStore, optional
+        Record every completed page and skip pages already checkpointed
+        by an interrupted run.
 
     Returns
     -------
@@ -42,90 +260,25 @@ def scrape_category_page(category_url: str, category_name: str, *, max_pages: Op
         ``product_url``, ``image_url`` and ``scraped_at``.
     """
     results: List[Dict] = []
-    page = 1
-    while True:
-        if max_pages is not None and page > max_pages:
-            break
-        url = f"{category_url}?resultsPerPage=3846&page={page}"
-        print(f"📦 [univers] Scraping {category_name} page {page}: {url}")
-        try:
-            resp = requests.get(url, timeout=30)
-        except Exception as e:
-            print(f"⚠️ Request failed: {e}")
-            break
-        if resp.status_code != 200:
-            print(f"⚠️ HTTP {resp.status_code} for {url}")
-            break
-        soup = BeautifulSoup(resp.text, "html.parser")
-        items = soup.select("div.item")
-        if not items:
-            break
-        for item in items:
-            try:
-                # Name and URL
-                name = None
-                name_tag = item.select_one(".product_name a")
-                if name_tag:
-                    name = name_tag.get("title") or name_tag.get_text(strip=True)
-                product_url = None
-                if name_tag and name_tag.has_attr("href"):
-                    href = name_tag["href"]
-                    product_url = href if href.startswith("http") else f"https://{DEFAULT_SITE}{href}"
-                # Image
-                image_url = None
-                img_tag = item.select_one("img.ax-img-loader")
-                if img_tag and img_tag.has_attr("src"):
-                    image_url = img_tag["src"]
-                # Category (fallback to provided category_name)
-                category_tag = item.select_one(".ax-product-cats a")
-                category = category_tag.get_text(strip=True) if category_tag else category_name
-                # Prices
-                original_price = None
-                discounted_price = None
-                orig_tag = item.select_one("span.regular-price")
-                if orig_tag:
-                    original_price = clean_price(orig_tag.get_text())
-                disc_tag = item.select_one("span.price")
-                if disc_tag:
-                    discounted_price = clean_price(disc_tag.get_text())
-                # Determine price, discount and flag
-                price = None
-                discount = None
-                is_discounted = False
-                # If both present and discount price is lower, use discounted
-                if discounted_price is not None and original_price is not None and discounted_price < original_price:
-                    price = discounted_price
-                    discount = round(original_price - discounted_price, 2)
-                    is_discounted = True
-                else:
-                    price = discounted_price or original_price
-                    if original_price is not None and price is not None and original_price > price:
-                        discount = round(original_price - price, 2)
-                        is_discounted = True
-                # Flags
-                flags = item.select(".label-flag")
-                out_of_stock = any("type-out_of_stock" in f.get("class", []) for f in flags)
-                availability = "rupture" if out_of_stock else "disponible"
-                results.append({
-                    "site": DEFAULT_SITE,
-                    "category": category,
-                    "name": name or "",
-                    "price": price,
-                    "discount": discount,
-                    "original_price": original_price,
-                    "is_discounted": is_discounted,
-                    "availability": availability,
-                    "product_url": product_url,
-                    "image_url": image_url,
-                    "scraped_at": datetime.utcnow().isoformat(),
-                })
-            except Exception as e:
-                print(f"⚠️ Error parsing univers product: {e}")
-        page += 1
+    pages = iter_category_pages(
+        SITE, category_url, category_name,
+        max_pages=max_pages, page_cache=page_cache, stream=stream, checkpoints=checkpoints,
+    )
+    for products in pages:
+        results.extend(products)
     return results
 
 
-def scrape_all(categories: Iterable[Dict], *, max_pages: Optional[int] = None) -> List[Dict]:
+def scrape_all(
+    categories: Iterable[Dict],
+    *,
+    max_pages: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    parse_workers: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    stream: bool = UNIVERS_STREAMING,
+    checkpoints: Optional[CheckpointStore] = None,
+) -> List[Dict]:
     """Scrape products from all Univers categories.
 
     Parameters
@@ -134,21 +287,162 @@ def scrape_all(categories: Iterable[Dict], *, max_pages: Optional[int] = None) -
         A sequence of categories with ``"name"`` and ``"url"`` fields.
     max_pages : int, optional
         Maximum number of pages per category.
+    concurrency : int, optional
+        If given, crawl all categories concurrently with the asyncio
+        engine, allowing at most ``concurrency`` requests in flight
+        against the site.  ``None`` keeps the sequential loop.
+    parse_workers : int, optional
+        If given, use the staged executor: ``concurrency`` (or
+        ``config.SCRAPER_FETCH_WORKERS``) fetcher threads feed a bounded
+        queue drained by ``parse_workers`` parser processes.  The page
+        cache, checkpoints and streaming mode are not used in this mode.
+    page_cache : PageCache, optional
+        Conditional‑GET cache; unchanged pages reuse their previously
+        parsed products.
+    stream : bool, optional
+        Parse pages incrementally (see :func:`stream_products`).
+    checkpoints : CheckpointStore, optional
+        Record every completed page and skip pages already checkpointed
+        by an interrupted run.
 
     Returns
     -------
     list of dict
         Combined list of products from all categories.
     """
+    if parse_workers is not None:
+        staged = StagedScraper(fetch_workers=concurrency or SCRAPER_FETCH_WORKERS, parse_workers=parse_workers)
+        return staged.run(SITE, categories, max_pages=max_pages)
+    if concurrency is not None:
+        engine = AsyncScrapeEngine(
+            per_host_limit=concurrency, page_cache=page_cache, stream=stream, checkpoints=checkpoints
+        )
+        return engine.run(SITE, categories, max_pages=max_pages)
     all_products: List[Dict] = []
     for cat in categories:
         name = cat.get("name") or ""
         url = cat.get("url") or ""
         if not url:
             continue
-        products = scrape_category_page(url, name, max_pages=max_pages)
+        products = scrape_category_page(
+            url, name, max_pages=max_pages, page_cache=page_cache, stream=stream, checkpoints=checkpoints
+        )
         all_products.extend(products)
     return all_products
 
 
-__all__ = ["scrape_category_page", "scrape_all"]
\ No newline at end of file
+def parse_product_page(
+    html: str,
+    product_url: str,
+    category_name: Optional[str] = None,
+    *,
+    backend: Optional[str] = None,
+) -> Optional[Dict]:
+    """Extract one product from its own page (see :func:`.sitemap.parse_product_page`)."""
+    return sitemap.parse_product_page(html, product_url, DEFAULT_SITE, category_name, backend=backend)
+
+
+def scrape_incremental(
+    categories: Iterable[Dict],
+    *,
+    known: Optional[Dict[str, Dict]] = None,
+    **kwargs,
+) -> List[Dict]:
+    """Refresh stored products from the sitemap instead of crawling every page.
+
+    Only new products and products whose sitemap ``lastmod`` is newer
+    than their last fetch are fetched; a full
+    :func:`scrape_all` runs when one is due (see :mod:`.sitemap`).
+
+    Parameters
+    ----------
+    categories : iterable of dict
+        Categories used for full crawls.
+    known : dict, optional
+        Stored products keyed by ``product_url``.  Defaults to those in
+        ``para_univer_merged``.
+    **kwargs
+        Options of :func:`.sitemap.scrape_incremental` and of
+        :func:`scrape_all` (``max_pages``, ``concurrency``…).
+
+    Returns
+    -------
+    list of dict
+        Product dictionaries in the same schema as :func:`scrape_all`.
+    """
+    return sitemap.scrape_incremental(SITE, categories, scrape_all=scrape_all, known=known, **kwargs)
+
+
+def iter_all(
+    categories: Iterable[Dict],
+    *,
+    max_pages: Optional[int] = None,
+    page_cache: Optional[PageCache] = None,
+    stream: bool = UNIVERS_STREAMING,
+    checkpoints: Optional[CheckpointStore] = None,
+) -> Iterator[Dict]:
+    """Yield products from all categories, page by page.
+
+    This is the lazy counterpart of :func:`scrape_all`: categories and
+    pages are scraped sequentially and each page's products are yielded
+    as soon as it has been parsed, so downstream stages can start
+    before the crawl finishes.
+
+    Parameters
+    ----------
+    categories : iterable of dict
+        Category dictionaries with ``"name"`` and ``"url"`` keys.
+    max_pages : int, optional
+        Maximum number of pages per category.
+    page_cache : PageCache, optional
+        Conditional‑GET cache for listing pages.
+    stream : bool, optional
+        Read each page incrementally and yield products as their cards
+        close, so not even a full page is held in memory.
+    checkpoints : CheckpointStore, optional
+        Record every completed page and skip pages already checkpointed
+        by an interrupted run.  Not used when ``stream`` is true.
+
+    Yields
+    ------
+    dict
+        Raw product dictionaries.
+    """
+    for cat in categories:
+        name = cat.get("name") or ""
+        url = cat.get("url") or ""
+        if not url:
+            continue
+        if stream:
+            yield from iter_category_products(url, name, max_pages=max_pages)
+            continue
+        pages = iter_category_pages(
+            SITE, url, name, max_pages=max_pages, page_cache=page_cache, checkpoints=checkpoints
+        )
+        for products in pages:
+            yield from products
+
+
+SITE = SiteSpec(
+    name=DEFAULT_SITE,
+    label="univers",
+    page_url=page_url,
+    parse_products=parse_products,
+    parse_product_page=parse_product_page,
+    stream_products=stream_products,
+)
+
+
+__all__ = [
+    "SITE",
+    "CARD_SELECTOR",
+    "page_url",
+    "parse_products",
+    "stream_products",
+    "iter_category_products",
+    "scrape_category_page",
+    "scrape_all",
+    "parse_product_page",
+    "scrape_incremental",
+    "iter_all",
+]
\ No newline at end of file
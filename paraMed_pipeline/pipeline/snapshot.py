@@ -0,0 +1,249 @@
+"""
+Parquet snapshots of cleaned products and matches.
+
+Dashboards and ad‑hoc analyses used to start from full MongoDB dumps of
+``para_univer_merged`` and ``matches``.  :func:`write_snapshot` stores
+the outcome of every run as Parquet datasets under
+``config.DATA_DIR / "snapshots"``, partitioned Hive‑style:
+
+* ``products/site=<site>/run_date=<YYYY-MM-DD>/``
+* ``matches/run_date=<YYYY-MM-DD>/`` (a match pairs products of both
+  sites, whose fields are flattened into ``a_*`` and ``b_*`` columns)
+
+Rows are sorted by main category and brand so that the row‑group
+statistics of the files let readers skip what they do not need.  A
+second run on the same day replaces that day's partitions.
+
+:func:`read_snapshot` memory‑maps the files and pushes filters on site,
+brand and main category down to the scan: partitions of other sites are
+never opened and row groups outside the requested brands or categories
+are skipped.
+
+``pyarrow`` is an optional dependency; without it snapshots are skipped
+with a warning.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.dataset as ds  # type: ignore
+    from pyarrow import fs  # type: ignore
+except ImportError:
+    pa = ds = fs = None
+
+from ..config import DATA_DIR
+
+# Rows per Parquet row group: small enough for brand/category statistics
+# to prune, large enough to keep scans sequential.
+ROW_GROUP_SIZE = 64 * 1024
+
+# Product fields copied into each side of a flattened match
+MATCH_PRODUCT_FIELDS = (
+    "site", "product_url", "name", "clean_name", "brand", "size", "main_category",
+    "price", "original_price", "discount", "availability",
+)
+
+_warned = False
+
+
+def _product_schema():
+    return pa.schema([
+        ("site", pa.string()),
+        ("product_url", pa.string()),
+        ("category", pa.string()),
+        ("main_category", pa.string()),
+        ("name", pa.string()),
+        ("clean_name", pa.string()),
+        ("brand", pa.string()),
+        ("size", pa.string()),
+        ("price", pa.float64()),
+        ("original_price", pa.float64()),
+        ("discount", pa.float64()),
+        ("is_discounted", pa.bool_()),
+        ("availability", pa.string()),
+        ("image_url", pa.string()),
+        ("scraped_at", pa.timestamp("us")),
+        ("run_date", pa.string()),
+    ])
+
+
+def _match_schema():
+    fields = []
+    product = {f.name: f.type for f in _product_schema()}
+    for side in ("a", "b"):
+        fields += [(f"{side}_{name}", product[name]) for name in MATCH_PRODUCT_FIELDS]
+    return pa.schema(fields + [("similarity", pa.float64()), ("run_date", pa.string())])
+
+
+def available() -> bool:
+    """``True`` if pyarrow is installed; warn once otherwise."""
+    global _warned
+    if pa is not None:
+        return True
+    if not _warned:
+        _warned = True
+        print("⚠️ pyarrow is not installed; Parquet snapshots are disabled")
+    return False
+
+
+def _default_directory() -> Path:
+    return DATA_DIR / "snapshots"
+
+
+def _flatten_match(match: Dict) -> Dict:
+    row = {"similarity": match.get("similarity")}
+    for side, key in (("a", "product_a"), ("b", "product_b")):
+        product = match.get(key) or {}
+        for name in MATCH_PRODUCT_FIELDS:
+            row[f"{side}_{name}"] = product.get(name)
+    return row
+
+
+def _write(table, base: Path, partitions: List[str]) -> None:
+    ds.write_dataset(
+        table,
+        base,
+        format="parquet",
+        partitioning=ds.partitioning(table.select(partitions).schema, flavor="hive"),
+        existing_data_behavior="delete_matching",
+        basename_template="part-{i}.parquet",
+        max_rows_per_group=ROW_GROUP_SIZE,
+        min_rows_per_group=min(ROW_GROUP_SIZE, max(1, table.num_rows)),
+    )
+
+
+def write_snapshot(
+    products: Iterable[Dict],
+    matches: Iterable[Dict] = (),
+    *,
+    run_date: Optional[date] = None,
+    directory: Optional[os.PathLike] = None,
+) -> Dict[str, int]:
+    """Write a run's cleaned products and matches as Parquet datasets.
+
+    Parameters
+    ----------
+    products : iterable of dict
+        Cleaned products (see :func:`.transform.merge_and_clean`).
+        Bookkeeping fields such as ``_id`` are ignored.
+    matches : iterable of dict
+        Matches returned by :func:`.matcher.match_products`.
+    run_date : date, optional
+        Partition date.  Defaults to today (UTC).
+    directory : str or Path, optional
+        Root of the snapshots.  Defaults to ``DATA_DIR / "snapshots"``.
+
+    Returns
+    -------
+    dict
+        Number of ``products`` and ``matches`` rows written (empty if
+        pyarrow is not installed).
+    """
+    if not available():
+        return {}
+    base = Path(directory) if directory is not None else _default_directory()
+    day = (run_date or datetime.utcnow().date()).isoformat()
+    rows = sorted(
+        ({**doc, "run_date": day} for doc in products),
+        key=lambda doc: (doc.get("site") or "", doc.get("main_category") or "", doc.get("brand") or ""),
+    )
+    counts = {"products": len(rows), "matches": 0}
+    if rows:
+        _write(pa.Table.from_pylist(rows, schema=_product_schema()), base / "products", ["site", "run_date"])
+    match_rows = [{**_flatten_match(m), "run_date": day} for m in matches]
+    counts["matches"] = len(match_rows)
+    if match_rows:
+        match_rows.sort(key=lambda row: (row["a_main_category"] or "", row["a_brand"] or ""))
+        _write(pa.Table.from_pylist(match_rows, schema=_match_schema()), base / "matches", ["run_date"])
+    return counts
+
+
+def snapshot_dates(kind: str = "products", *, directory: Optional[os.PathLike] = None) -> List[str]:
+    """Return the run dates with a snapshot of ``kind``, oldest first."""
+    base = (Path(directory) if directory is not None else _default_directory()) / kind
+    if not base.exists():
+        return []
+    return sorted({p.name.split("=", 1)[1] for p in base.rglob("run_date=*") if p.is_dir()})
+
+
+def _isin(name: str, values: Optional[Sequence[str]]):
+    if values is None:
+        return None
+    return ds.field(name).isin(list(values))
+
+
+def read_snapshot(
+    kind: str = "products",
+    *,
+    run_date: Optional[str] = "latest",
+    sites: Optional[Sequence[str]] = None,
+    brands: Optional[Sequence[str]] = None,
+    main_categories: Optional[Sequence[str]] = None,
+    columns: Optional[List[str]] = None,
+    directory: Optional[os.PathLike] = None,
+):
+    """Load a filtered snapshot as a ``pyarrow.Table``.
+
+    Files are memory‑mapped and the filters are pushed down to the scan:
+    ``sites`` and ``run_date`` select partitions, ``brands`` and
+    ``main_categories`` skip row groups using the Parquet statistics.
+    For matches, the filters apply to either side of the pair.
+
+    Parameters
+    ----------
+    kind : {"products", "matches"}, optional
+        Dataset to read.
+    run_date : str, optional
+        ``"YYYY-MM-DD"``, ``"latest"`` (default) or ``None`` for every run.
+    sites, brands, main_categories : sequence of str, optional
+        Keep only rows with these values.
+    columns : list of str, optional
+        Columns to load (all by default).
+    directory : str or Path, optional
+        Root of the snapshots.  Defaults to ``DATA_DIR / "snapshots"``.
+
+    Returns
+    -------
+    pyarrow.Table
+        The selected rows; call ``.to_pandas()`` for a DataFrame.
+    """
+    if kind not in ("products", "matches"):
+        raise ValueError(f"kind must be 'products' or 'matches', not {kind!r}")
+    if pa is None:
+        raise ImportError("pyarrow is required to read snapshots")
+    base = (Path(directory) if directory is not None else _default_directory()) / kind
+    if run_date == "latest":
+        dates = snapshot_dates(kind, directory=directory)
+        if not dates:
+            raise FileNotFoundError(f"No {kind} snapshot under {base}")
+        run_date = dates[-1]
+    dataset = ds.dataset(
+        str(base), format="parquet", partitioning="hive", filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
+    conditions = [ds.field("run_date") == run_date] if run_date is not None else []
+    filters = {"site": sites, "brand": brands, "main_category": main_categories}
+    for name, values in filters.items():
+        if values is None:
+            continue
+        if kind == "products":
+            conditions.append(_isin(name, values))
+        else:
+            conditions.append(_isin(f"a_{name}", values) | _isin(f"b_{name}", values))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression)
+
+
+__all__ = [
+    "available",
+    "write_snapshot",
+    "snapshot_dates",
+    "read_snapshot",
+]
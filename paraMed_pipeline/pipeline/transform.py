@@ -13,16 +13,47 @@ derived from the ``image_url`` using
 ``utils.cleaning.clean_name_from_image_url``.  This ensures that
 ``clean_name`` values are consistent across scraped products and
 improves duplicate detection.
+
+:func:`iter_merge_and_clean` is the lazy form of :func:`merge_and_clean`:
+it consumes its inputs as iterators and yields cleaned documents one at
+a time, so cleaning can overlap with scraping and nothing forces the
+whole catalogue into memory.
+
+:func:`merge_and_clean` can also run on a columnar engine backed by
+pandas (an optional dependency): documents are loaded as columns,
+prices, discounts and availability are computed on whole columns,
+string normalisation runs once per distinct value and duplicates are
+dropped with a hash‑based ``duplicated``.  Its output is the same as
+the document‑by‑document path.
+
+With ``workers`` greater than one, :func:`merge_and_clean` splits large
+inputs into chunks of ``chunk_size`` raw documents and cleans them in a
+process pool.  Each chunk is deduplicated by its worker; the parent then
+merges the chunks in input order and drops the ``(site, clean_name)``
+keys already seen in earlier chunks, so the first occurrence is kept as
+in a serial run.
 """
 
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Iterable, List, Dict, Tuple, Optional, Set
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, List, Dict, Tuple, Optional, Set
 
+try:
+    import numpy as np  # type: ignore
+    import pandas as pd  # type: ignore
+except ImportError:
+    np = pd = None
+
+from ..config import TRANSFORM_ENGINE, TRANSFORM_COLUMNAR_MIN_ROWS, TRANSFORM_WORKERS, TRANSFORM_CHUNK_SIZE
 from .utils.cleaning import (
     clean_name,
     extract_brand,
+    get_brand_index,
+    set_brand_index,
     extract_size,
     normalize_availability,
     map_category,
@@ -40,11 +71,318 @@ def _parse_datetime(value: Optional[str]) -> datetime:
     return datetime.utcnow()
 
 
+def _clean_identity(doc: Dict) -> Tuple[str, str, str]:
+    """Return ``(site, name_raw, clean_name)`` for a raw document.
+
+    These three values are all that is needed for deduplication, so they
+    are computed before the rest of the document is normalised.
+    """
+    site: str = (doc.get("site") or "").strip().lower()
+    name_raw: str = doc.get("name") or ""
+    # Recover the full name from the image URL if the visible name is truncated.
+    # Parapharma product listings sometimes include an ellipsis ("...")
+    # when the name overflows.  In these cases the image filename often
+    # encodes the full product name.  We check for this pattern and
+    # replace the raw name accordingly.
+    if site == "parapharma.ma" and name_raw.endswith("..."):
+        img_url = doc.get("image_url") or ""
+        recovered = clean_name_from_image_url(img_url)
+        if recovered and recovered.lower() not in name_raw.lower():
+            name_raw = recovered
+    return site, name_raw, clean_name(name_raw)
+
+
+def _clean_document(doc: Dict, site: str, name_raw: str, clean: str) -> Dict:
+    """Normalise a raw document whose identity has already been computed."""
+    product_url = doc.get("product_url") or doc.get("url") or None
+    category = (doc.get("category") or "").strip().lower()
+    main_category = map_category(category)
+    # Prices
+    price = doc.get("price")
+    original_price = doc.get("original_price")
+    # Determine discount and flag
+    discount = None
+    is_discounted = False
+    if original_price is not None and price is not None:
+        disc = original_price - price
+        if disc > 0:
+            discount = round(disc, 2)
+            is_discounted = True
+    # Availability
+    raw_avail = doc.get("availability")
+    if raw_avail is None and doc.get("is_out_of_stock") is not None:
+        raw_avail = "out_of_stock" if doc.get("is_out_of_stock") else "in_stock"
+    availability = normalize_availability(raw_avail)
+    image_url = doc.get("image_url")
+    scraped_at_str = doc.get("scraped_at")
+    scraped_at = _parse_datetime(scraped_at_str)
+    brand = extract_brand(clean)
+    size = extract_size(clean)
+    return {
+        "site": site,
+        "product_url": product_url,
+        "category": category,
+        "main_category": main_category,
+        "name": name_raw,
+        "clean_name": clean,
+        "brand": brand,
+        "size": size,
+        "price": price,
+        "original_price": original_price,
+        "discount": discount,
+        "is_discounted": is_discounted,
+        "availability": availability,
+        "image_url": image_url,
+        "scraped_at": scraped_at,
+    }
+
+
+def iter_merge_and_clean(
+    parapharma_docs: Iterable[Dict],
+    univers_docs: Iterable[Dict],
+    *,
+    deduplicate: bool = True,
+) -> Iterator[Dict]:
+    """Lazily merge and normalise product documents.
+
+    Takes the same arguments as :func:`merge_and_clean` but consumes the
+    inputs as iterators (Parapharma first, then Univers) and yields each
+    cleaned document as soon as it is ready.  Only the set of
+    ``(site, clean_name)`` keys seen so far is kept in memory.
+    """
+    seen_keys: Set[Tuple[str, str]] = set()
+    for doc in chain(parapharma_docs, univers_docs):
+        site, name_raw, clean = _clean_identity(doc)
+        if deduplicate:
+            key = (site, clean)
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+        yield _clean_document(doc, site, name_raw, clean)
+
+
+# Fields of a cleaned document, in output order
+FIELDS = (
+    "site", "product_url", "category", "main_category", "name", "clean_name",
+    "brand", "size", "price", "original_price", "discount", "is_discounted",
+    "availability", "image_url", "scraped_at",
+)
+
+ENGINES = ("auto", "python", "pandas")
+
+_warned: Set[str] = set()
+
+
+# Raw fields read by the columnar engine once duplicates are dropped
+_RAW_FIELDS = (
+    "product_url", "url", "category", "price", "original_price",
+    "availability", "is_out_of_stock", "scraped_at",
+)
+
+
+def _column(docs: List[Dict], field: str):
+    """Return ``doc.get(field)`` for every document as an object array."""
+    values = np.empty(len(docs), dtype=object)
+    values[:] = [doc.get(field) for doc in docs]
+    return values
+
+
+def _columns(docs: List[Dict], fields: Tuple[str, ...]) -> Dict:
+    """Load raw documents into a DataFrame and return its object columns.
+
+    Missing fields are ``None``, as with ``doc.get(field)``.
+    """
+    frame = pd.DataFrame(docs, columns=list(fields), dtype=object)
+    columns = {}
+    for field in fields:
+        values = frame[field].to_numpy(dtype=object, copy=True)
+        values[pd.isna(values)] = None
+        columns[field] = values
+    return columns
+
+
+def _per_distinct(values, func: Callable):
+    """Apply ``func`` once per distinct value of an object array.
+
+    Missing values are passed to ``func`` as ``None``.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    results = np.empty(len(uniques), dtype=object)
+    results[:] = [func(None if v is None or v != v else v) for v in uniques]
+    return results[codes]
+
+
+def _recover_name(site: str, name_raw: str, image_url: Optional[str]) -> str:
+    """Return the name recovered from the image URL, as in :func:`_clean_identity`."""
+    recovered = clean_name_from_image_url(image_url or "")
+    if recovered and recovered.lower() not in name_raw.lower():
+        return recovered
+    return name_raw
+
+
+def _discounts(price, original_price) -> Tuple:
+    """Return the ``discount`` and ``is_discounted`` columns."""
+    prices = pd.to_numeric(pd.Series(price), errors="coerce").to_numpy(dtype=float)
+    originals = pd.to_numeric(pd.Series(original_price), errors="coerce").to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        diff = originals - prices
+        is_discounted = diff > 0
+    discount = np.full(len(diff), None, dtype=object)
+    if is_discounted.any():
+        floats = all(
+            pd.api.types.infer_dtype(column, skipna=True) in ("floating", "empty")
+            for column in (price, original_price)
+        )
+        if floats:
+            # Python's round(), which differs from np.round, once per value
+            discount[is_discounted] = _per_distinct(diff[is_discounted].astype(object), lambda d: round(d, 2))
+        else:
+            # Integers (or mixed types) keep the exact arithmetic of the dict path
+            discount[is_discounted] = [
+                round(o - p, 2)
+                for o, p in zip(original_price[is_discounted], price[is_discounted])
+            ]
+    return discount, is_discounted
+
+
+def _merge_and_clean_columnar(docs: List[Dict], *, deduplicate: bool = True) -> List[Dict]:
+    """Columnar implementation of :func:`merge_and_clean` using pandas."""
+    if not docs:
+        return []
+    # Identity columns first, so the other fields are only loaded for the
+    # documents that survive deduplication
+    site = _per_distinct(_column(docs, "site"), lambda v: (v or "").strip().lower())
+    name_raw = _per_distinct(_column(docs, "name"), lambda v: v or "")
+    image_url = _column(docs, "image_url")
+    # Truncated Parapharma names: only these few rows are handled one by one
+    for i in np.flatnonzero(site == "parapharma.ma"):
+        if name_raw[i].endswith("..."):
+            name_raw[i] = _recover_name(site[i], name_raw[i], image_url[i])
+    clean = _per_distinct(name_raw, clean_name)
+    if deduplicate:
+        keep = ~pd.DataFrame({"site": site, "clean_name": clean}).duplicated(keep="first").to_numpy()
+        if not keep.all():
+            docs = [doc for doc, kept in zip(docs, keep) if kept]
+            site, name_raw, clean, image_url = site[keep], name_raw[keep], clean[keep], image_url[keep]
+    raw = _columns(docs, _RAW_FIELDS)
+    product_url, url = raw["product_url"], raw["url"]
+    # ``product_url or url or None``; URLs are strings or missing
+    product_url = np.where((product_url != None) & (product_url != ""), product_url,  # noqa: E711
+                           np.where((url != None) & (url != ""), url, None))  # noqa: E711
+    category = _per_distinct(raw["category"], lambda v: (v or "").strip().lower())
+    main_category = _per_distinct(category, map_category)
+    price, original_price = raw["price"], raw["original_price"]
+    discount, is_discounted = _discounts(price, original_price)
+    availability = np.where(
+        raw["availability"] == None,  # noqa: E711 (element‑wise)
+        _per_distinct(
+            raw["is_out_of_stock"],
+            lambda v: normalize_availability(None if v is None else ("out_of_stock" if v else "in_stock")),
+        ),
+        _per_distinct(raw["availability"], normalize_availability),
+    )
+    scraped_at = _per_distinct(raw["scraped_at"], _parse_datetime)
+    brand = _per_distinct(clean, extract_brand)
+    size = _per_distinct(clean, extract_size)
+    columns = (
+        site, product_url, category, main_category, name_raw, clean, brand, size, price,
+        original_price, discount, is_discounted, availability, image_url, scraped_at,
+    )
+    # tolist() turns numpy scalars back into plain Python values
+    return [
+        {
+            "site": s, "product_url": pu, "category": c, "main_category": mc, "name": n,
+            "clean_name": cn, "brand": b, "size": sz, "price": p, "original_price": op,
+            "discount": d, "is_discounted": isd, "availability": a, "image_url": iu,
+            "scraped_at": t,
+        }
+        for s, pu, c, mc, n, cn, b, sz, p, op, d, isd, a, iu, t in zip(*(col.tolist() for col in columns))
+    ]
+
+
+def resolve_engine(engine: Optional[str], n_docs: int) -> str:
+    """Return the engine to use for ``n_docs`` documents.
+
+    ``"auto"`` picks ``"pandas"`` from ``config.TRANSFORM_COLUMNAR_MIN_ROWS``
+    documents on, when pandas is installed.  ``"pandas"`` falls back to
+    ``"python"`` with a warning if it is not.
+    """
+    engine = engine or TRANSFORM_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown transform engine {engine!r}; expected one of {ENGINES}")
+    if engine == "auto":
+        return "pandas" if pd is not None and n_docs >= TRANSFORM_COLUMNAR_MIN_ROWS else "python"
+    if engine == "pandas" and pd is None:
+        if engine not in _warned:
+            _warned.add(engine)
+            print("⚠️ pandas is not installed; cleaning with the python engine")
+        return "python"
+    return engine
+
+
+def _clean_chunk(docs: List[Dict], deduplicate: bool, engine: Optional[str]) -> List[Dict]:
+    """Clean one chunk of raw documents (runs in a worker process)."""
+    return merge_and_clean(docs, (), deduplicate=deduplicate, engine=engine, workers=1)
+
+
+def iter_parallel_merge_and_clean(
+    docs: Iterable[Dict],
+    *,
+    workers: int,
+    chunk_size: int = TRANSFORM_CHUNK_SIZE,
+    deduplicate: bool = True,
+    engine: Optional[str] = None,
+) -> Iterator[Dict]:
+    """Clean raw documents in a process pool, yielding them in input order.
+
+    The input is consumed lazily: at most two chunks per worker are in
+    flight, so memory stays bounded for inputs of any size.  Workers
+    start with the brand index of the calling process.
+
+    Parameters
+    ----------
+    docs : iterable of dict
+        Raw documents (Parapharma first, then Univers).
+    workers : int
+        Number of worker processes.
+    chunk_size : int, optional
+        Raw documents per task.
+    deduplicate : bool, optional
+        Drop duplicate ``(site, clean_name)`` keys, across chunks too.
+    engine : str, optional
+        Engine used by the workers (see :func:`resolve_engine`).
+    """
+    it = iter(docs)
+    seen_keys: Set[Tuple[str, str]] = set()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=set_brand_index, initargs=(get_brand_index(),)
+    ) as pool:
+        pending: deque = deque()
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(islice(it, chunk_size))
+                if not chunk:
+                    break
+                pending.append(pool.submit(_clean_chunk, chunk, deduplicate, engine))
+            if not pending:
+                return
+            for doc in pending.popleft().result():
+                if deduplicate:
+                    key = (doc["site"], doc["clean_name"])
+                    if key in seen_keys:
+                        continue
+                    seen_keys.add(key)
+                yield doc
+
+
 def merge_and_clean(
     parapharma_docs: Iterable[Dict],
     univers_docs: Iterable[Dict],
     *,
     deduplicate: bool = True,
+    engine: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = TRANSFORM_CHUNK_SIZE,
 ) -> List[Dict]:
     """Merge and normalise product documents from Parapharma and Univers.
 
@@ -57,6 +395,18 @@ def merge_and_clean(
     deduplicate : bool, optional
         If ``True``, remove duplicates within each site based on
         ``clean_name``.  Only the first occurrence is kept.
+    engine : {"auto", "python", "pandas"}, optional
+        ``"python"`` cleans one document at a time; ``"pandas"`` uses the
+        columnar implementation, which is faster on large inputs and
+        returns the same documents.  Defaults to
+        ``config.TRANSFORM_ENGINE`` (see :func:`resolve_engine`).
+    workers : int, optional
+        Clean chunks of the input in this many processes (see
+        :func:`iter_parallel_merge_and_clean`).  Defaults to
+        ``config.TRANSFORM_WORKERS``.  With ``1``, or an input of at most
+        one chunk, documents are cleaned in this process.
+    chunk_size : int, optional
+        Raw documents per chunk in parallel mode.
 
     Returns
     -------
@@ -67,79 +417,22 @@ def merge_and_clean(
         ``is_discounted``, ``availability``, ``image_url`` and
         ``scraped_at`` (as datetime).
     """
-    cleaned: List[Dict] = []
-    seen_keys: Set[Tuple[str, str]] = set()
-
-    def process(doc: Dict) -> Optional[Dict]:
-        site: str = (doc.get("site") or "").strip().lower()
-        name_raw: str = doc.get("name") or ""
-        # Recover the full name from the image URL if the visible name is truncated.
-        # Parapharma product listings sometimes include an ellipsis ("...")
-        # when the name overflows.  In these cases the image filename often
-        # encodes the full product name.  We check for this pattern and
-        # replace the raw name accordingly.
-        if site == "parapharma.ma" and name_raw.endswith("..."):
-            img_url = doc.get("image_url") or ""
-            recovered = clean_name_from_image_url(img_url)
-            if recovered and recovered.lower() not in name_raw.lower():
-                name_raw = recovered
-        clean = clean_name(name_raw)
-        if deduplicate:
-            key = (site, clean)
-            if key in seen_keys:
-                return None
-            seen_keys.add(key)
-        product_url = doc.get("product_url") or doc.get("url") or None
-        category = (doc.get("category") or "").strip().lower()
-        main_category = map_category(category)
-        # Prices
-        price = doc.get("price")
-        original_price = doc.get("original_price")
-        # Determine discount and flag
-        discount = None
-        is_discounted = False
-        if original_price is not None and price is not None:
-            disc = original_price - price
-            if disc > 0:
-                discount = round(disc, 2)
-                is_discounted = True
-        # Availability
-        raw_avail = doc.get("availability")
-        if raw_avail is None and doc.get("is_out_of_stock") is not None:
-            raw_avail = "out_of_stock" if doc.get("is_out_of_stock") else "in_stock"
-        availability = normalize_availability(raw_avail)
-        image_url = doc.get("image_url")
-        scraped_at_str = doc.get("scraped_at")
-        scraped_at = _parse_datetime(scraped_at_str)
-        brand = extract_brand(clean)
-        size = extract_size(clean)
-        return {
-            "site": site,
-            "product_url": product_url,
-            "category": category,
-            "main_category": main_category,
-            "name": name_raw,
-            "clean_name": clean,
-            "brand": brand,
-            "size": size,
-            "price": price,
-            "original_price": original_price,
-            "discount": discount,
-            "is_discounted": is_discounted,
-            "availability": availability,
-            "image_url": image_url,
-            "scraped_at": scraped_at,
-        }
-
-    for doc in parapharma_docs:
-        item = process(doc)
-        if item:
-            cleaned.append(item)
-    for doc in univers_docs:
-        item = process(doc)
-        if item:
-            cleaned.append(item)
-    return cleaned
+    docs = list(chain(parapharma_docs, univers_docs))
+    workers = TRANSFORM_WORKERS if workers is None else workers
+    if workers > 1 and len(docs) > chunk_size:
+        return list(iter_parallel_merge_and_clean(
+            docs, workers=workers, chunk_size=chunk_size, deduplicate=deduplicate, engine=engine
+        ))
+    if resolve_engine(engine, len(docs)) == "pandas":
+        return _merge_and_clean_columnar(docs, deduplicate=deduplicate)
+    return list(iter_merge_and_clean(docs, (), deduplicate=deduplicate))
 
 
-__all__ = ["merge_and_clean"]
\ No newline at end of file
+__all__ = [
+    "merge_and_clean",
+    "iter_merge_and_clean",
+    "iter_parallel_merge_and_clean",
+    "resolve_engine",
+    "ENGINES",
+    "FIELDS",
+]
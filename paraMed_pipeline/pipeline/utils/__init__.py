@@ -2,11 +2,33 @@
 Utility subpackage.
 
 Provides database helpers (:mod:`db`), text cleaning and extraction
-functions (:mod:`cleaning`) and category mapping (:mod:`category_mapping`).
+functions (:mod:`cleaning`), category mapping (:mod:`category_mapping`),
+the persistent embedding cache (:mod:`embedding_cache`), the shared
+HTTP session (:mod:`http`), the conditional‑GET page cache
+(:mod:`http_cache`), the adaptive per‑host rate limiter
+(:mod:`rate_limit`), crash‑safe scrape checkpoints
+(:mod:`checkpoint`) and the MongoDB page work queue
+(:mod:`work_queue`).
 """
 
 from . import db  # noqa: F401
 from . import cleaning  # noqa: F401
 from . import category_mapping  # noqa: F401
+from . import embedding_cache  # noqa: F401
+from . import http  # noqa: F401
+from . import http_cache  # noqa: F401
+from . import rate_limit  # noqa: F401
+from . import checkpoint  # noqa: F401
+from . import work_queue  # noqa: F401
 
-__all__ = ["db", "cleaning", "category_mapping"]
\ No newline at end of file
+__all__ = [
+    "db",
+    "cleaning",
+    "category_mapping",
+    "embedding_cache",
+    "http",
+    "http_cache",
+    "rate_limit",
+    "checkpoint",
+    "work_queue",
+]
\ No newline at end of file
@@ -4,9 +4,10 @@ Mapping of raw categories to higher‑level categories.
 This dictionary maps substrings of scraped category labels to a
 canonical set of high‑level categories used for analysis and matching.
 If a key appears in the scraped category string (case‑insensitive and
-accent‑insensitive), the value is returned as the new category.  The
-order of keys does not matter because the mapping is searched
-sequentially for any occurrence.
+accent‑insensitive), the value is returned as the new category.  When
+several keys occur in a label, the key listed first wins; a key listed
+twice keeps its first position and its last value (see
+``utils.cleaning.map_category``).
 
 Extend this mapping as new categories emerge.
 """
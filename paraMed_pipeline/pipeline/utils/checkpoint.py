@@ -0,0 +1,148 @@
+"""
+Crash‑safe checkpoints for long scrape runs.
+
+A full crawl takes hundreds of page requests, and until now its results
+only lived in memory until the final write to MongoDB.  A
+:class:`CheckpointStore` records the products of every completed
+``(site, category, page)`` as soon as the page has been parsed, so a run
+that dies half way can be restarted in *resume* mode and only fetch the
+pages it had not finished.
+
+Checkpoints of a run are appended to a single JSON‑lines file under
+``config.DATA_DIR / "checkpoints"``; every record is flushed and synced
+to disk before the scraper moves on, and a truncated last line (the
+process died while writing it) is discarded on load.  Records older than
+``max_age`` seconds are treated as missing so stale pages are fetched
+again.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ...config import DATA_DIR, CHECKPOINT_MAX_AGE
+
+Key = Tuple[str, str, int]
+
+
+class CheckpointStore:
+    """Append‑only store of completed pages for one run.
+
+    Parameters
+    ----------
+    run_id : str, optional
+        Name of the run; a resumed run must use the same id.
+    directory : str or Path, optional
+        Where checkpoint files are kept.  Defaults to
+        ``DATA_DIR / "checkpoints"``.
+    max_age : float, optional
+        Age in seconds after which a checkpoint is ignored.
+    resume : bool, optional
+        Load the checkpoints already recorded for ``run_id``.  When
+        ``False`` any previous checkpoints of the run are discarded.
+
+    Attributes
+    ----------
+    restored : int
+        Number of pages served from checkpoints.
+    """
+
+    def __init__(
+        self,
+        run_id: str = "default",
+        *,
+        directory: Optional[os.PathLike] = None,
+        max_age: float = CHECKPOINT_MAX_AGE,
+        resume: bool = False,
+    ) -> None:
+        directory = Path(directory) if directory is not None else DATA_DIR / "checkpoints"
+        self.path = directory / f"{run_id}.jsonl"
+        self.max_age = max_age
+        self.restored = 0
+        self._entries: Dict[Key, Dict] = {}
+        self._lock = threading.Lock()
+        if resume:
+            self._load()
+        else:
+            self.clear()
+
+    def _load(self) -> None:
+        try:
+            fh = open(self.path, "rb")
+        except OSError:
+            return
+        valid_size = 0
+        with fh:
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Partial line left by a crash mid‑write
+                    break
+                key = (record["site"], record["category_url"], record["page"])
+                self._entries[key] = record
+                valid_size += len(line)
+        # Drop the torn tail so new records start on a line of their own
+        if valid_size < self.path.stat().st_size:
+            os.truncate(self.path, valid_size)
+
+    def get(self, site: str, category_url: str, page: int) -> Optional[Dict]:
+        """Return the fresh checkpoint of a page, or ``None``.
+
+        The record holds ``products`` (possibly empty) and ``page_count``.
+        """
+        record = self._entries.get((site, category_url, page))
+        if record is None or time.time() - record["completed_at"] > self.max_age:
+            return None
+        with self._lock:
+            self.restored += 1
+        return record
+
+    def record(
+        self,
+        site: str,
+        category_url: str,
+        page: int,
+        products: List[Dict],
+        *,
+        page_count: Optional[int] = None,
+    ) -> None:
+        """Durably record the products of a completed page."""
+        record = {
+            "site": site,
+            "category_url": category_url,
+            "page": page,
+            "page_count": page_count,
+            "completed_at": time.time(),
+            "products": products,
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line)
+                fh.flush()
+                os.fsync(fh.fileno())
+            self._entries[(site, category_url, page)] = record
+
+    def clear(self) -> None:
+        """Forget every checkpoint of the run (e.g. once it has completed)."""
+        with self._lock:
+            self._entries.clear()
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+__all__ = ["CheckpointStore"]
@@ -16,42 +16,108 @@ from the associated image URL, which encodes a slugified version of
 the product name.  The ``clean_name_from_image_url`` function
 extracts the slug from the URL, converts hyphens to spaces and
 returns a title‑cased version.
+
+:func:`map_category` matches every key of ``category_mapping`` in a
+single pass over the category text with an Aho–Corasick automaton built
+once from the normalised keys, and memoises the result per raw category.
+:func:`extract_brand` looks brands up in a token trie (:class:`BrandIndex`)
+that can be reloaded from the MongoDB brand dictionary at run time.
+
+Regular expressions are compiled once at import time, and
+:func:`clean_name` strips accents and punctuation with a single
+``str.translate`` over a lazily filled translation table.  Cleaned
+names are memoised in a bounded LRU cache, and :func:`normalize_names`
+returns the clean name, size and brand of a whole batch of raw names.
 """
 
 from __future__ import annotations
 
 import re
+import threading
 import unicodedata
+from collections import deque
 from datetime import datetime
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple, Union
 
 # Note: these imports reference project configuration.  They may be
 # unavailable when this stub is used in isolation, but are required in
 # the full pipeline.  Comment them out if running this file alone.
 try:
     from .category_mapping import category_mapping  # type: ignore
-    from ...config import KNOWN_BRANDS, BRAND_BLACKLIST  # type: ignore
+    from ...config import KNOWN_BRANDS, BRAND_BLACKLIST, BRANDS_COLLECTION, NORMALIZE_CACHE_SIZE  # type: ignore
 except Exception:
     category_mapping = {}
     KNOWN_BRANDS: Tuple[str, ...] = tuple()
     BRAND_BLACKLIST: Tuple[str, ...] = tuple()
+    BRANDS_COLLECTION = "brands"
+    NORMALIZE_CACHE_SIZE = 65536
 
 __all__ = [
     "clean_name",
+    "NormalizedName",
+    "normalize_name",
+    "normalize_names",
     "extract_size",
     "extract_brand",
+    "BrandIndex",
+    "rebuild_brand_index",
+    "get_brand_index",
+    "set_brand_index",
+    "reload_brands",
     "normalize_availability",
     "clean_price",
     "map_category",
+    "rebuild_category_matcher",
     "clean_name_from_image_url",
 ]
 
 
+# Whitespace between a number and a unit (ml, g, mg, l)
+_UNIT_GAP_RE = re.compile(r"(?<=\d)\s+(?=ml|g|mg|l)")
+_SPACES_RE = re.compile(r"\s+")
+_SIZE_RE = re.compile(r"(\d+(?:\.\d+)?)(ml|mg|g|l)")
+_PRICE_JUNK_RE = re.compile(r"[^\d,]")
+_IMAGE_SLUG_RE = re.compile(r"/([\w\-]+)\.[a-zA-Z0-9]+$")
+_KEPT = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
+
+_AVAILABILITY = {
+    "in_stock": "disponible",
+    "disponible": "disponible",
+    "out_of_stock": "indisponible",
+    "rupture": "indisponible",
+    "indisponible": "indisponible",
+}
+
+
 def _strip_accents(text: str) -> str:
     """Remove accents from a unicode string."""
     return unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8")
 
 
+class _NameTable(dict):
+    """``str.translate`` table folding accents, separators and symbols.
+
+    Entries are computed on first use: a character is decomposed and
+    stripped of non‑ASCII marks like :func:`_strip_accents`, then
+    whitespace, hyphens and underscores become spaces, lowercase letters
+    and digits are kept and anything else is dropped.
+    """
+
+    def __missing__(self, codepoint: int) -> str:
+        out = []
+        for ch in _strip_accents(chr(codepoint)):
+            if ch.isspace() or ch in "-_":
+                out.append(" ")
+            elif ch in _KEPT:
+                out.append(ch)
+        value = self[codepoint] = "".join(out)
+        return value
+
+
+_NAME_TABLE = _NameTable()
+
+
 def clean_name(name: Optional[str]) -> str:
     """Normalise a product name.
 
@@ -73,17 +139,57 @@ def clean_name(name: Optional[str]) -> str:
     """
     if not name:
         return ""
-    text = name.lower().strip()
-    text = _strip_accents(text)
-    # Replace hyphens and underscores with a space
-    text = re.sub(r"[\s\-_]+", " ", text)
-    # Remove any character that is not alphanumeric or space
-    text = re.sub(r"[^a-z0-9 ]", "", text)
+    return _clean_name_cached(name)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _clean_name_cached(name: str) -> str:
+    # Strip accents, turn separators into spaces and drop other symbols
+    text = name.lower().strip().translate(_NAME_TABLE)
     # Join numbers with units (ml, g, mg, l)
-    text = re.sub(r"(\d+)\s*(ml|g|mg|l)", r"\1\2", text)
+    text = _UNIT_GAP_RE.sub("", text)
     # Collapse multiple spaces
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+class NormalizedName(NamedTuple):
+    """Clean name, size and brand derived from a raw product name."""
+
+    clean_name: str
+    size: str
+    brand: Optional[str]
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_cached(name: str) -> NormalizedName:
+    clean = clean_name(name)
+    return NormalizedName(clean, extract_size(clean), extract_brand(clean))
+
+
+def normalize_name(name: Optional[str]) -> NormalizedName:
+    """Return the clean name, size and brand of a raw product name.
+
+    Equivalent to :func:`clean_name` followed by :func:`extract_size` and
+    :func:`extract_brand` on the result, memoised per raw name.
+    """
+    return _normalize_cached(name or "")
+
+
+def normalize_names(names: Iterable[Optional[str]]) -> List[NormalizedName]:
+    """Normalise a batch of raw product names.
+
+    Parameters
+    ----------
+    names : iterable of str
+        Raw product names (``None`` is treated as empty).
+
+    Returns
+    -------
+    list of NormalizedName
+        ``(clean_name, size, brand)`` for every name, in input order.
+        Repeated names are only processed once.
+    """
+    return [_normalize_cached(name or "") for name in names]
 
 
 def clean_name_from_image_url(url: str) -> Optional[str]:
@@ -112,7 +218,7 @@ def clean_name_from_image_url(url: str) -> Optional[str]:
     # Match the final path component before the extension.  We allow
     # letters, numbers, underscores and hyphens.  For example:
     # https://example.com/images/omeprazole-20-mg.webp -> omeprazole-20-mg
-    match = re.search(r"/([\w\-]+)\.[a-zA-Z0-9]+$", url)
+    match = _IMAGE_SLUG_RE.search(url)
     if match:
         slug = match.group(1)
         # Replace hyphens and underscores with spaces and title case
@@ -133,20 +239,146 @@ def extract_size(clean_text: str) -> str:
     str
         The first size token found, or an empty string if none present.
     """
-    match = re.search(r"(\d+(?:\.\d+)?)(ml|mg|g|l)", clean_text)
+    match = _SIZE_RE.search(clean_text)
     return match.group(0) if match else ""
 
 
+class BrandIndex:
+    """Token‑level prefix trie of known brands.
+
+    Brands are normalised with :func:`clean_name` and split into tokens,
+    so a lookup walks the leading tokens of a cleaned name once and
+    returns the longest brand it completes, whatever the order of the
+    brand list.  Matches end on token boundaries (``"nuxe"`` does not
+    match ``"nuxellence"``).
+
+    Parameters
+    ----------
+    brands : iterable of str
+        Brand names.
+    """
+
+    def __init__(self, brands: Iterable[str]) -> None:
+        self.root: Dict = {}
+        self.size = 0
+        for brand in brands:
+            tokens = clean_name(brand).split()
+            if not tokens:
+                continue
+            node = self.root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            if None not in node:
+                node[None] = " ".join(tokens)
+                self.size += 1
+
+    def longest_prefix(self, tokens: List[str]) -> Optional[str]:
+        """Return the longest brand formed by the first ``tokens``, or ``None``."""
+        node = self.root
+        found = None
+        for token in tokens:
+            node = node.get(token)
+            if node is None:
+                break
+            found = node.get(None, found)
+        return found
+
+    def __len__(self) -> int:
+        return self.size
+
+
+_brand_index = BrandIndex(KNOWN_BRANDS)
+
+
+def rebuild_brand_index(brands: Optional[Iterable[str]] = None) -> BrandIndex:
+    """Replace the brand trie used by :func:`extract_brand`.
+
+    Parameters
+    ----------
+    brands : iterable of str, optional
+        New brand list.  Defaults to ``config.KNOWN_BRANDS``.
+
+    Returns
+    -------
+    BrandIndex
+        The new index.  It is swapped in with a single assignment, so
+        concurrent lookups see either the old or the new trie.
+    """
+    global _brand_index
+    _brand_index = BrandIndex(KNOWN_BRANDS if brands is None else brands)
+    _normalize_cached.cache_clear()
+    return _brand_index
+
+
+def get_brand_index() -> BrandIndex:
+    """Return the brand trie currently used by :func:`extract_brand`."""
+    return _brand_index
+
+
+def set_brand_index(index: BrandIndex) -> None:
+    """Use ``index`` for :func:`extract_brand` (e.g. in a worker process)."""
+    global _brand_index
+    _brand_index = index
+    _normalize_cached.cache_clear()
+
+
+def reload_brands(collection=None, *, field: str = "name") -> int:
+    """Rebuild the brand trie from the MongoDB brand dictionary.
+
+    The brands of ``config.KNOWN_BRANDS`` are kept and the ``field`` of
+    every document of the brand collection is added to them.
+
+    Parameters
+    ----------
+    collection : Collection, optional
+        Brand collection.  Defaults to ``config.BRANDS_COLLECTION``.
+    field : str, optional
+        Document field holding the brand name.
+
+    Returns
+    -------
+    int
+        Number of brands in the new index.
+    """
+    if collection is None:
+        # Imported here so the cleaning helpers do not require pymongo
+        from .db import get_collection
+
+        collection = get_collection(BRANDS_COLLECTION)
+    names = [doc[field] for doc in collection.find({field: {"$type": "string"}}, {field: 1})]
+    return len(rebuild_brand_index(list(KNOWN_BRANDS) + names))
+
+
+# Tries built for ``brands=`` arguments, keyed by the identity of the
+# object (kept alive alongside), so a lookup does not hash the brand list
+_brand_indexes: Dict[int, Tuple[object, BrandIndex]] = {}
+_brand_indexes_lock = threading.Lock()
+
+
+def _brand_index_for(brands: Union[BrandIndex, Iterable[str]]) -> BrandIndex:
+    if isinstance(brands, BrandIndex):
+        return brands
+    entry = _brand_indexes.get(id(brands))
+    if entry is not None and entry[0] is brands:
+        return entry[1]
+    index = BrandIndex(brands)
+    with _brand_indexes_lock:
+        if len(_brand_indexes) >= 8:
+            del _brand_indexes[next(iter(_brand_indexes))]
+        _brand_indexes[id(brands)] = (brands, index)
+    return index
+
+
 def extract_brand(
     clean_text: str,
     *,
-    brands: Tuple[str, ...] = tuple(KNOWN_BRANDS),
+    brands: Optional[Union[BrandIndex, Iterable[str]]] = None,
     blacklist: Tuple[str, ...] = tuple(BRAND_BLACKLIST)
 ) -> Optional[str]:
     """Extract the brand name from a cleaned product name.
 
-    The function tries to match the beginning of ``clean_text`` to one of
-    the known brands (longest names first).  If no known brand matches,
+    The function matches the leading tokens of ``clean_text`` against the
+    known brands and keeps the longest match.  If no known brand matches,
     simple heuristics are applied: use the first token, or the first
     numeric token plus the next token.  Blacklisted tokens are ignored.
 
@@ -154,9 +386,12 @@ def extract_brand(
     ----------
     clean_text : str
         The cleaned product name.
-    brands : tuple of str, optional
-        A tuple of known brands.  The list should be sorted from longest
-        to shortest names to ensure proper prefix matching.
+    brands : BrandIndex or iterable of str, optional
+        Known brands, in any order.  Defaults to the current brand index
+        (``config.KNOWN_BRANDS``, plus the MongoDB brand dictionary once
+        :func:`reload_brands` has been called).  A list is indexed once
+        per object, so changes made to it in place are not seen; pass a
+        prebuilt :class:`BrandIndex` for large or changing lists.
     blacklist : tuple of str, optional
         A set of tokens that should never be considered a brand.
 
@@ -167,12 +402,9 @@ def extract_brand(
     """
     text = clean_text.lower().strip()
     tokens = text.split()
-    matched_brand = None
-    # 1. Check for known brand prefixes
-    for brand in brands:
-        if text.startswith(brand):
-            matched_brand = brand
-            break
+    index = _brand_index if brands is None else _brand_index_for(brands)
+    # 1. Longest known brand at the start of the name
+    matched_brand = index.longest_prefix(tokens)
     # 2. Apply heuristics if no known brand
     if not matched_brand and tokens:
         if len(tokens) >= 2:
@@ -213,14 +445,7 @@ def normalize_availability(value: Optional[str]) -> str:
     """
     if not value:
         return "indisponible"
-    mapping = {
-        "in_stock": "disponible",
-        "disponible": "disponible",
-        "out_of_stock": "indisponible",
-        "rupture": "indisponible",
-        "indisponible": "indisponible",
-    }
-    return mapping.get(value.strip().lower(), "indisponible")
+    return _AVAILABILITY.get(value.strip().lower(), "indisponible")
 
 
 def clean_price(value: Optional[str]) -> Optional[float]:
@@ -243,7 +468,7 @@ def clean_price(value: Optional[str]) -> Optional[float]:
     if value is None:
         return None
     # Remove everything except digits and commas
-    cleaned = re.sub(r"[^\d,]", "", value)
+    cleaned = _PRICE_JUNK_RE.sub("", value)
     cleaned = cleaned.replace(",", ".")
     try:
         return float(cleaned)
@@ -251,6 +476,89 @@ def clean_price(value: Optional[str]) -> Optional[float]:
         return None
 
 
+class _CategoryMatcher:
+    """Aho–Corasick automaton over the normalised keys of a category mapping.
+
+    Every state stores the smallest insertion index of the keys ending
+    there or at any of its suffix states, so one scan of the text yields
+    the first key, in mapping order, that occurs anywhere in it.
+    """
+
+    def __init__(self, mapping: Mapping[str, str]) -> None:
+        self.values: List[str] = []
+        self.goto: List[Dict[str, int]] = [{}]
+        self.best: List[Optional[int]] = [None]
+        for key, mapped in mapping.items():
+            key_norm = clean_name(key)
+            if not key_norm:
+                continue
+            index = len(self.values)
+            self.values.append(mapped)
+            node = 0
+            for ch in key_norm:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = self.goto[node][ch] = len(self.goto)
+                    self.goto.append({})
+                    self.best.append(None)
+                node = nxt
+            # Keys normalising to the same text: the earlier one wins
+            if self.best[node] is None:
+                self.best[node] = index
+        # Breadth‑first pass: failure links and inherited best matches
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0)
+                inherited = self.best[self.fail[child]]
+                if inherited is not None and (self.best[child] is None or inherited < self.best[child]):
+                    self.best[child] = inherited
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the value of the first mapping key found in ``text``."""
+        goto, fail, best = self.goto, self.fail, self.best
+        node = 0
+        found: Optional[int] = None
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            index = best[node]
+            if index is not None and (found is None or index < found):
+                found = index
+                if found == 0:
+                    break
+        return None if found is None else self.values[found]
+
+
+_category_matcher = _CategoryMatcher(category_mapping)
+
+
+def rebuild_category_matcher(mapping: Optional[Mapping[str, str]] = None) -> None:
+    """Rebuild the category automaton, e.g. after editing the mapping.
+
+    Parameters
+    ----------
+    mapping : dict, optional
+        New mapping.  Defaults to ``category_mapping`` (re‑read, so
+        in‑place edits are picked up).
+    """
+    global _category_matcher
+    _category_matcher = _CategoryMatcher(category_mapping if mapping is None else mapping)
+    _map_category_cached.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def _map_category_cached(cat: str) -> str:
+    return _category_matcher.match(clean_name(cat)) or "Autres"
+
+
 def map_category(cat: Optional[str]) -> str:
     """Map a raw category string to a canonical category.
 
@@ -260,6 +568,16 @@ def map_category(cat: Optional[str]) -> str:
     :func:`clean_name`.  If no mapping matches, the category ``"Autres"``
     is returned.
 
+    All keys are searched at once with an Aho–Corasick automaton.  When
+    several keys occur in the category, the one inserted first in
+    ``category_mapping`` wins, as with a sequential scan of the mapping.
+    A key repeated in the mapping keeps the position of its first
+    occurrence and the value of its last one: ``"fonds de teint"`` is
+    listed under both Visage and Maquillage, so it sits among the Visage
+    keys but maps to ``"Maquillage"``.  Results are memoised per raw
+    category; call :func:`rebuild_category_matcher` after changing the
+    mapping.
+
     Parameters
     ----------
     cat : str, optional
@@ -274,11 +592,4 @@ def map_category(cat: Optional[str]) -> str:
     """
     if not cat:
         return "Autres"
-    # Normalise the input category (lowercase, accentless, no symbols)
-    text = clean_name(cat)
-    for key, mapped in category_mapping.items():
-        # Normalise mapping keys to handle accents and case consistently
-        key_norm = clean_name(key)
-        if key_norm and key_norm in text:
-            return mapped
-    return "Autres"
\ No newline at end of file
+    return _map_category_cached(cat)
@@ -7,19 +7,84 @@ variables with sensible defaults, so you can override the connection
 URI or database name without modifying code.  To change the defaults,
 create a `.env` file in your project and set `MONGO_URI` or
 `MONGO_DB_NAME` accordingly.
+
+Clients are cached per connection URI and process (:func:`get_client`),
+so every thread shares one connection pool while a forked worker opens
+its own; pool sizes and the write concern come from ``config`` and can
+be overridden with environment variables of the same name.
+:func:`ensure_indexes` creates, once per process, the indexes used to
+look up, join and filter cleaned products.
+
+For refreshing a collection in place, :func:`upsert_by_key` writes only
+the documents whose content changed, keyed by a stable identifier, and
+removes those that disappeared, instead of wiping and re‑inserting the
+whole collection.
 """
 
+import hashlib
+import json
 import os
-from typing import Optional
-from pymongo import MongoClient
+import threading
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from pymongo import ASCENDING, MongoClient, UpdateOne
 from dotenv import load_dotenv
 
+from ...config import (
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_WRITE_CONCERN,
+    MONGO_JOURNAL,
+)
+
 # Load environment variables from a .env file if present
 load_dotenv()
 
+# Indexes of cleaned product collections: lookups by site and URL (keyed
+# upserts, sitemap crawls), the brand/size blocking of the matcher, and
+# analytics filters by category and freshness.
+PRODUCT_INDEXES: List[List[Tuple[str, int]]] = [
+    [("site", ASCENDING), ("product_url", ASCENDING)],
+    [("brand", ASCENDING), ("size", ASCENDING)],
+    [("main_category", ASCENDING)],
+    [("scraped_at", ASCENDING)],
+]
+
+_clients: Dict[Tuple[str, int], MongoClient] = {}
+_indexed = set()
+_lock = threading.Lock()
+
+
+def client_options() -> Dict:
+    """Return the ``MongoClient`` pool and write concern options.
+
+    Values come from ``config`` unless overridden by the environment
+    variable of the same name.
+    """
+    w = os.getenv("MONGO_WRITE_CONCERN", MONGO_WRITE_CONCERN)
+    journal = os.getenv("MONGO_JOURNAL", str(MONGO_JOURNAL))
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", MONGO_MAX_POOL_SIZE)),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", MONGO_MIN_POOL_SIZE)),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", MONGO_MAX_IDLE_TIME_MS)),
+        "serverSelectionTimeoutMS": int(
+            os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", MONGO_SERVER_SELECTION_TIMEOUT_MS)
+        ),
+        "w": int(w) if str(w).isdigit() else w,
+        "journal": str(journal).lower() in ("1", "true", "yes"),
+    }
+
 
 def get_client(uri: Optional[str] = None) -> MongoClient:
-    """Return a MongoDB client.
+    """Return the shared MongoDB client for a connection URI.
+
+    A ``MongoClient`` owns a connection pool and monitoring threads, so
+    one client is created per URI and reused by every caller.  Clients
+    are not fork‑safe; like the HTTP session they are cached per process
+    id, so a forked worker gets a client of its own.
 
     Parameters
     ----------
@@ -31,13 +96,29 @@ def get_client(uri: Optional[str] = None) -> MongoClient:
     Returns
     -------
     MongoClient
-        A connected MongoDB client instance.
+        A connected MongoDB client instance, configured with
+        :func:`client_options`.
     """
     mongo_uri = uri or os.getenv("MONGO_URI", "mongodb://localhost:27017")
-    client = MongoClient(mongo_uri)
+    key = (mongo_uri, os.getpid())
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = MongoClient(mongo_uri, **client_options())
     return client
 
 
+def close_clients() -> None:
+    """Close the clients opened by this process and forget them."""
+    pid = os.getpid()
+    with _lock:
+        for key in [k for k in _clients if k[1] == pid]:
+            _clients.pop(key).close()
+        _indexed.clear()
+
+
 def get_db(db_name: Optional[str] = None, *, client: Optional[MongoClient] = None):
     """Return the default database handle.
 
@@ -82,8 +163,197 @@ def get_collection(collection_name: str, *, db_name: Optional[str] = None, clien
     return db[collection_name]
 
 
+def ensure_indexes(collection, indexes: Optional[List[List[Tuple[str, int]]]] = None) -> None:
+    """Create the indexes of a product collection if they do not exist.
+
+    ``create_index`` is a no‑op for an index that already exists, and
+    each collection is only checked once per process.
+
+    Parameters
+    ----------
+    collection : Collection
+        Collection holding cleaned products.
+    indexes : list, optional
+        Index key lists.  Defaults to :data:`PRODUCT_INDEXES`.
+    """
+    key = (os.getpid(), id(collection.database.client), collection.full_name)
+    if key in _indexed:
+        return
+    for keys in indexes if indexes is not None else PRODUCT_INDEXES:
+        collection.create_index(keys)
+    _indexed.add(key)
+
+
+def insert_in_batches(collection, docs: Iterable[Dict], *, batch_size: int = 1000) -> int:
+    """Insert documents from an iterable in bounded batches.
+
+    The iterable is consumed lazily, so at most ``batch_size`` documents
+    are buffered at a time regardless of how many are produced.
+
+    Parameters
+    ----------
+    collection : Collection
+        Target collection.
+    docs : iterable of dict
+        Documents to insert (e.g. a generator).
+    batch_size : int, optional
+        Number of documents per ``insert_many`` call.
+
+    Returns
+    -------
+    int
+        Total number of documents inserted.
+    """
+    total = 0
+    it = iter(docs)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return total
+        collection.insert_many(batch, ordered=False)
+        total += len(batch)
+
+
+def document_key(doc: Dict) -> str:
+    """Return the stable key of a cleaned product.
+
+    Products are identified by site and ``product_url``; products
+    without a URL fall back to their ``clean_name``.  Match documents
+    (with ``product_a`` and ``product_b``) are keyed by the pair.
+    """
+    if "product_a" in doc and "product_b" in doc:
+        return f"{document_key(doc['product_a'])}=>{document_key(doc['product_b'])}"
+    site = doc.get("site") or ""
+    if doc.get("product_url"):
+        return f"{site}|{doc['product_url']}"
+    return f"{site}|name:{doc.get('clean_name') or doc.get('name') or ''}"
+
+
+def _content(value):
+    """Drop bookkeeping fields (``_``‑prefixed and ``scraped_at``) at any depth."""
+    if isinstance(value, dict):
+        return {k: _content(v) for k, v in value.items() if not k.startswith("_") and k != "scraped_at"}
+    if isinstance(value, list):
+        return [_content(v) for v in value]
+    return value
+
+
+def content_hash(doc: Dict) -> str:
+    """Hash the content of a document, ignoring ``_id``, keys and timestamps."""
+    payload = json.dumps(_content(doc), sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def upsert_by_key(
+    collection,
+    docs: Iterable[Dict],
+    *,
+    key: Callable[[Dict], str] = document_key,
+    batch_size: int = 1000,
+    on_missing: str = "delete",
+) -> Dict[str, int]:
+    """Refresh a collection in place from a full set of documents.
+
+    Each document is stored with its key (``_key``) and content hash
+    (``_hash``).  The existing hashes are read once; then only new or
+    changed documents are written, as unordered ``bulk_write`` batches
+    of ``UpdateOne(upsert=True)``.  Documents whose key is no longer
+    present are deleted (``on_missing="delete"``) or flagged with
+    ``removed_at`` (``on_missing="mark"``).  Readers never see an empty
+    collection, and an unchanged refresh writes nothing.
+
+    Documents written by a plain ``insert_many`` (without ``_key``) are
+    deleted on the first keyed refresh, once the keyed documents are
+    written.
+
+    Parameters
+    ----------
+    collection : Collection
+        Target collection.
+    docs : iterable of dict
+        The complete new content (consumed lazily).
+    key : callable, optional
+        Function returning the stable key of a document.  Keys repeated
+        within ``docs`` are disambiguated with a prefix of the content
+        hash.
+    batch_size : int, optional
+        Operations per ``bulk_write`` call.
+    on_missing : {"delete", "mark"}, optional
+        What to do with documents that disappeared.
+
+    Returns
+    -------
+    dict
+        Counts of ``inserted``, ``updated``, ``unchanged`` and ``removed``
+        documents.
+    """
+    if on_missing not in ("delete", "mark"):
+        raise ValueError(f"on_missing must be 'delete' or 'mark', not {on_missing!r}")
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    # Partial, so documents inserted later in "replace" mode (no _key) are allowed
+    collection.create_index(
+        [("_key", ASCENDING)], unique=True, partialFilterExpression={"_key": {"$exists": True}}
+    )
+    # key -> content hash, or None for documents flagged as removed
+    existing = {
+        d["_key"]: None if "removed_at" in d else d.get("_hash")
+        for d in collection.find({"_key": {"$exists": True}}, {"_key": 1, "_hash": 1, "removed_at": 1})
+    }
+    seen = set()
+    batch = []
+
+    def flush() -> None:
+        if batch:
+            collection.bulk_write(batch, ordered=False)
+            batch.clear()
+
+    for doc in docs:
+        h = content_hash(doc)
+        base = k = key(doc)
+        n = 1
+        while k in seen:
+            n += 1
+            k = f"{base}#{h[:12]}" if n == 2 else f"{base}#{h[:12]}-{n - 1}"
+        seen.add(k)
+        if k in existing and existing[k] == h:
+            counts["unchanged"] += 1
+            continue
+        counts["updated" if k in existing else "inserted"] += 1
+        fields = {f: v for f, v in doc.items() if f != "_id"}
+        fields.update(_key=k, _hash=h)
+        update = {"$set": fields}
+        if on_missing == "mark":
+            update["$unset"] = {"removed_at": ""}
+        batch.append(UpdateOne({"_key": k}, update, upsert=True))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    # Key-less documents are superseded by the keyed ones just written
+    counts["removed"] += collection.delete_many({"_key": {"$exists": False}}).deleted_count
+    missing = [k for k in existing if k not in seen]
+    for start in range(0, len(missing), batch_size):
+        chunk = missing[start:start + batch_size]
+        if on_missing == "delete":
+            counts["removed"] += collection.delete_many({"_key": {"$in": chunk}}).deleted_count
+        else:
+            result = collection.update_many(
+                {"_key": {"$in": chunk}, "removed_at": {"$exists": False}},
+                {"$set": {"removed_at": datetime.utcnow()}},
+            )
+            counts["removed"] += result.modified_count
+    return counts
+
+
 __all__ = [
+    "PRODUCT_INDEXES",
+    "client_options",
     "get_client",
+    "close_clients",
     "get_db",
     "get_collection",
+    "ensure_indexes",
+    "insert_in_batches",
+    "document_key",
+    "content_hash",
+    "upsert_by_key",
 ]
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Persistent on‑disk embedding cache.
+
+Most product names are unchanged between two pipeline runs, so their
+embeddings can be reused instead of being recomputed by the sentence
+transformer.  This module stores embeddings under ``config.DATA_DIR``
+as a memory‑mapped ``float32`` matrix (``.npy``) plus a JSON index
+mapping each matching string to its row.  One cache directory exists
+per embedding model, so switching ``EMBEDDING_MODEL`` never mixes
+vectors from different models.
+
+The cache is bounded by ``EMBEDDING_CACHE_MAX_ENTRIES``: when it grows
+beyond that size, the least recently used strings are evicted the next
+time it is saved.  Saving writes a new matrix file first and then
+atomically replaces the index, so a crash never leaves the index
+pointing at a partially written matrix.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ...config import DATA_DIR, EMBEDDING_MODEL, EMBEDDING_CACHE_MAX_ENTRIES
+
+INDEX_FILE = "index.json"
+
+
+def _model_slug(model_name: str) -> str:
+    """Turn a model name into a safe directory name."""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model_name).strip("_") or "default"
+
+
+class EmbeddingCache:
+    """Size‑bounded embedding store keyed by matching string.
+
+    Parameters
+    ----------
+    model_name : str, optional
+        Name of the embedding model.  Each model gets its own cache
+        directory.  Defaults to ``config.EMBEDDING_MODEL``.
+    directory : str or Path, optional
+        Root directory of the cache.  Defaults to ``DATA_DIR / "embeddings"``.
+    max_entries : int, optional
+        Maximum number of strings kept on disk.  Least recently used
+        entries are evicted on :meth:`save`.
+
+    Attributes
+    ----------
+    hits, misses : int
+        Number of strings found in / missing from the cache since the
+        object was created.
+    """
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        *,
+        directory: Optional[os.PathLike] = None,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+    ) -> None:
+        root = Path(directory) if directory is not None else DATA_DIR / "embeddings"
+        self.model_name = model_name
+        self.directory = root / _model_slug(model_name)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # text -> [row, last_used]; row is -1 for vectors not yet on disk
+        self._rows: Dict[str, List[int]] = {}
+        self._pending: Dict[str, np.ndarray] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_file: Optional[str] = None
+        self._dim: Optional[int] = None
+        self._clock = 0
+        self._dirty = False
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Persistence
+
+    def _load(self) -> None:
+        index_path = self.directory / INDEX_FILE
+        if not index_path.exists():
+            return
+        try:
+            with open(index_path, "r", encoding="utf-8") as fh:
+                index = json.load(fh)
+            if index.get("model") != self.model_name:
+                return
+            matrix_file = index["matrix"]
+            matrix = np.load(self.directory / matrix_file, mmap_mode="r")
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable embedding cache in {self.directory}: {e}")
+            return
+        self._matrix = matrix
+        self._matrix_file = matrix_file
+        self._dim = int(matrix.shape[1]) if matrix.ndim == 2 else None
+        self._clock = int(index.get("clock", 0))
+        self._rows = {text: [int(row), int(used)] for text, (row, used) in index.get("rows", {}).items()}
+        # Every load starts a new "generation" for LRU bookkeeping
+        self._clock += 1
+
+    def save(self) -> None:
+        """Write new vectors and usage information to disk.
+
+        Entries beyond ``max_entries`` are evicted, least recently used
+        first.  Does nothing if the cache has not changed.
+        """
+        if not self._dirty:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = sorted(self._rows.items(), key=lambda kv: kv[1][1], reverse=True)
+        entries = entries[: self.max_entries]
+        matrix_file = f"vectors-{self._clock}.npy"
+        if self._pending or len(entries) != len(self._rows) or self._matrix is None:
+            dim = self._dim or 0
+            out = np.lib.format.open_memmap(
+                self.directory / matrix_file, mode="w+", dtype=np.float32, shape=(len(entries), dim)
+            )
+            rows: Dict[str, List[int]] = {}
+            for new_row, (text, (row, used)) in enumerate(entries):
+                out[new_row] = self._pending[text] if row < 0 else self._matrix[row]
+                rows[text] = [new_row, used]
+            out.flush()
+            del out
+        else:
+            # Only usage counters changed: keep the current matrix
+            matrix_file = self._matrix_file
+            rows = dict(entries)
+        index = {"model": self.model_name, "matrix": matrix_file, "clock": self._clock, "rows": rows}
+        tmp_path = self.directory / (INDEX_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(index, fh)
+        os.replace(tmp_path, self.directory / INDEX_FILE)
+        old_file = self._matrix_file
+        self._matrix = np.load(self.directory / matrix_file, mmap_mode="r")
+        self._matrix_file = matrix_file
+        self._rows = rows
+        self._pending = {}
+        self._dirty = False
+        # Never reuse the file name of the matrix that is now mapped
+        self._clock += 1
+        if old_file and old_file != matrix_file:
+            try:
+                os.remove(self.directory / old_file)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Lookup and insertion
+
+    def lookup(self, strings: Sequence[str]) -> Tuple[Optional[np.ndarray], List[int]]:
+        """Look up embeddings for a sequence of strings.
+
+        Parameters
+        ----------
+        strings : sequence of str
+            Matching strings to look up.
+
+        Returns
+        -------
+        tuple
+            ``(vectors, missing)`` where ``vectors`` is an array with one
+            row per input string (rows of misses are left as zeros), or
+            ``None`` if the cache is empty, and ``missing`` lists the
+            positions of strings that must be encoded.
+        """
+        missing: List[int] = []
+        vectors = np.zeros((len(strings), self._dim), dtype=np.float32) if self._dim else None
+        for pos, text in enumerate(strings):
+            entry = self._rows.get(text)
+            if entry is None or vectors is None:
+                missing.append(pos)
+                continue
+            row = entry[0]
+            vectors[pos] = self._pending[text] if row < 0 else self._matrix[row]
+            if entry[1] != self._clock:
+                entry[1] = self._clock
+                self._dirty = True
+        self.hits += len(strings) - len(missing)
+        self.misses += len(missing)
+        return vectors, missing
+
+    def add(self, strings: Sequence[str], vectors: np.ndarray) -> None:
+        """Store freshly computed embeddings.
+
+        Parameters
+        ----------
+        strings : sequence of str
+            Matching strings, aligned with ``vectors``.
+        vectors : numpy.ndarray
+            2‑D array of embeddings, one row per string.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(strings):
+            return
+        if self._dim is None:
+            self._dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self._dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match cache dimension {self._dim}")
+        for text, vec in zip(strings, vectors):
+            self._pending[text] = vec
+            self._rows[text] = [-1, self._clock]
+        self._dirty = True
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current number of entries."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._rows)}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+__all__ = ["EmbeddingCache"]
@@ -0,0 +1,208 @@
+"""
+Shared HTTP session helpers.
+
+All scraper traffic goes through a single :class:`requests.Session` per
+process so that TCP/TLS connections are kept alive and reused across
+pages instead of being re‑established for every request.  The session
+mounts an :class:`~requests.adapters.HTTPAdapter` whose connection pool
+size is configurable (``config.HTTP_POOL_SIZE``) and advertises gzip
+and, when a brotli decoder is installed, brotli transfer encoding.
+
+:func:`fetch` adds bounded retries on top of the session: connection
+errors, timeouts and transient status codes (429, 500, 502, 503, 504)
+are retried with exponential backoff and full jitter, honouring any
+``Retry-After`` header sent by the server.  This keeps a single
+transient 502 from truncating a whole category.  Every attempt also
+goes through the adaptive per‑host limiter of :mod:`.rate_limit`, which
+paces requests and shrinks its window when the host pushes back.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ...config import (
+    HTTP_POOL_SIZE,
+    HTTP_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    RATE_LIMIT_ENABLED,
+)
+from .rate_limit import RateLimiter, get_rate_limiter
+
+# urllib3 transparently decodes brotli responses when one of these
+# packages is installed; only advertise ``br`` in that case.
+try:
+    import brotli  # type: ignore # noqa: F401
+    _HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # type: ignore # noqa: F401
+        _HAS_BROTLI = True
+    except ImportError:
+        _HAS_BROTLI = False
+
+ACCEPT_ENCODING = "gzip, deflate, br" if _HAS_BROTLI else "gzip, deflate"
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_sessions: Dict[int, requests.Session] = {}
+_lock = threading.Lock()
+
+
+def create_session(*, pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """Create a new session with a pooled adapter and compression enabled.
+
+    Parameters
+    ----------
+    pool_size : int, optional
+        Maximum number of connections kept open per host.
+
+    Returns
+    -------
+    requests.Session
+        A configured session.  Retries are handled by :func:`fetch`, so
+        the adapter itself does not retry.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process‑wide shared session.
+
+    Sessions are cached per process id so that a forked worker never
+    reuses connections inherited from its parent.
+    """
+    pid = os.getpid()
+    session = _sessions.get(pid)
+    if session is None:
+        with _lock:
+            session = _sessions.get(pid)
+            if session is None:
+                session = _sessions[pid] = create_session()
+    return session
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    """Parse a ``Retry-After`` header (seconds or HTTP date) into seconds."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def backoff_delay(attempt: int, *, base: float = HTTP_BACKOFF_BASE, cap: float = HTTP_BACKOFF_MAX) -> float:
+    """Exponential backoff with full jitter for retry number ``attempt`` (0‑based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def fetch(
+    url: str,
+    *,
+    session: Optional[requests.Session] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    timeout: float = HTTP_TIMEOUT,
+    max_retries: int = HTTP_MAX_RETRIES,
+    stream: bool = False,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> Optional[requests.Response]:
+    """GET a URL through the shared session, retrying transient failures.
+
+    Parameters
+    ----------
+    url : str
+        URL to fetch.
+    session : requests.Session, optional
+        Session to use.  Defaults to :func:`get_session`.
+    headers : mapping, optional
+        Extra request headers.
+    timeout : float, optional
+        Per‑attempt timeout in seconds.
+    max_retries : int, optional
+        Number of retries after the first attempt.
+    stream : bool, optional
+        Passed to :meth:`requests.Session.get`; the caller must then
+        consume or close the response.
+    rate_limiter : RateLimiter, optional
+        Limiter pacing the requests.  Defaults to the shared
+        :func:`~.rate_limit.get_rate_limiter` when
+        ``config.RATE_LIMIT_ENABLED`` is set, otherwise requests are
+        not paced.
+
+    Returns
+    -------
+    requests.Response or None
+        The final response (which may still carry an error status if
+        retries were exhausted or the status is not retryable), or
+        ``None`` if every attempt raised a network error.
+    """
+    session = session or get_session()
+    if rate_limiter is None and RATE_LIMIT_ENABLED:
+        rate_limiter = get_rate_limiter()
+    host = rate_limiter.for_url(url) if rate_limiter is not None else None
+    for attempt in range(max_retries + 1):
+        last_attempt = attempt == max_retries
+        started = host.acquire() if host is not None else 0.0
+        try:
+            resp = session.get(url, headers=headers, timeout=timeout, stream=stream)
+        except requests.RequestException as e:
+            if host is not None:
+                host.release(started, error=True)
+            if last_attempt:
+                print(f"⚠️ Request failed after {attempt + 1} attempts: {e}")
+                return None
+            delay = backoff_delay(attempt)
+            print(f"⚠️ Request failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        except BaseException:
+            # Never leak an in‑flight slot, even on KeyboardInterrupt
+            if host is not None:
+                host.release(started, error=True)
+            raise
+        retry_after = _retry_after(resp)
+        if host is not None:
+            host.release(started, status=resp.status_code)
+            if retry_after is not None and resp.status_code in RETRY_STATUSES:
+                host.pause(min(retry_after, HTTP_BACKOFF_MAX))
+        if resp.status_code not in RETRY_STATUSES or last_attempt:
+            return resp
+        delay = backoff_delay(attempt)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, HTTP_BACKOFF_MAX))
+        print(f"⚠️ HTTP {resp.status_code} for {url}; retrying in {delay:.1f}s")
+        resp.close()
+        time.sleep(delay)
+    return None
+
+
+__all__ = [
+    "ACCEPT_ENCODING",
+    "RETRY_STATUSES",
+    "create_session",
+    "get_session",
+    "backoff_delay",
+    "fetch",
+]
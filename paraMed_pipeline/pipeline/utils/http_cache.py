@@ -0,0 +1,130 @@
+"""
+Conditional‑GET cache for listing pages.
+
+Most category pages do not change between two hourly runs.  This module
+keeps, for every page URL, the validators returned by the server
+(``ETag`` and ``Last-Modified``), a SHA‑256 hash of the body and the
+product list that was parsed from it.  On the next run the scraper
+sends ``If-None-Match``/``If-Modified-Since``; when the server answers
+``304 Not Modified``, or returns a body whose hash is unchanged, the
+stored product list is reused and the HTML is not parsed again.
+
+Entries are stored as one JSON file per URL under
+``config.DATA_DIR / "http_cache"`` and written atomically, so concurrent
+scrapers working on different pages never corrupt each other's entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ...config import DATA_DIR
+
+
+def hash_body(content: bytes) -> str:
+    """Return the hex SHA‑256 digest of a response body."""
+    return hashlib.sha256(content).hexdigest()
+
+
+class PageCache:
+    """On‑disk store of page validators and parsed products.
+
+    Parameters
+    ----------
+    directory : str or Path, optional
+        Where entries are stored.  Defaults to ``DATA_DIR / "http_cache"``.
+
+    Attributes
+    ----------
+    hits : int
+        Number of pages served from the cache (304 or identical body).
+    misses : int
+        Number of pages that had to be parsed.
+
+    Both counters are updated under a lock, as one cache is shared by the
+    fetcher threads of a crawl.
+    """
+
+    def __init__(self, directory: Optional[os.PathLike] = None) -> None:
+        self.directory = Path(directory) if directory is not None else DATA_DIR / "http_cache"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for ``url``, or ``None``."""
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    @staticmethod
+    def validators(entry: Optional[Dict]) -> Dict[str, str]:
+        """Build conditional request headers from a cached entry."""
+        headers: Dict[str, str] = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def reuse(self, entry: Dict) -> List[Dict]:
+        """Return the cached products of an entry with a fresh ``scraped_at``."""
+        with self._lock:
+            self.hits += 1
+        now = datetime.utcnow().isoformat()
+        return [{**p, "scraped_at": now} for p in entry.get("products", [])]
+
+    def record_miss(self) -> None:
+        """Count a page that had to be parsed."""
+        with self._lock:
+            self.misses += 1
+
+    def store(
+        self,
+        url: str,
+        *,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        body_hash: str,
+        products: List[Dict],
+        page_count: Optional[int] = None,
+    ) -> None:
+        """Persist validators, body hash and parsed products for ``url``.
+
+        ``page_count`` is the total page count read from a category's
+        first page, kept so that it survives a ``304`` response.
+        """
+        path = self._path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": body_hash,
+            "stored_at": datetime.utcnow().isoformat(),
+            "products": products,
+        }
+        if page_count is not None:
+            entry["page_count"] = page_count
+        tmp_path = path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(entry, fh, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+__all__ = ["PageCache", "hash_body"]
@@ -0,0 +1,223 @@
+"""
+Adaptive per‑host rate limiting.
+
+Concurrent scraping must stay within what the source sites tolerate,
+and what they tolerate is not known in advance.  This module gives every
+host a :class:`HostLimiter` combining two controls:
+
+* a **token bucket** bounding the request rate (requests per second,
+  with a small burst allowance), and
+* a **concurrency window** bounding the number of requests in flight.
+
+Both adapt with AIMD (additive increase, multiplicative decrease), as in
+TCP congestion control: every healthy response raises the rate and the
+window by a small step, while a ``429``/``503`` response, a network
+error or a response slower than the latency target cuts both by a
+constant factor.  Only one cut is applied per "round trip": responses
+to requests that were already in flight when the limit was cut do not
+cut it again.  A ``Retry-After`` header pauses the whole host for the
+requested time.
+
+Limiters are shared by all threads of a process through
+:func:`get_rate_limiter`; :meth:`RateLimiter.snapshot` reports the
+current rate and window of every host for monitoring.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from ...config import (
+    RATE_LIMIT_INITIAL_RATE,
+    RATE_LIMIT_MIN_RATE,
+    RATE_LIMIT_MAX_RATE,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_INITIAL_CONCURRENCY,
+    RATE_LIMIT_MAX_CONCURRENCY,
+    RATE_LIMIT_DECREASE_FACTOR,
+    RATE_LIMIT_LATENCY_TARGET,
+)
+
+# Responses telling us to slow down
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+class HostLimiter:
+    """Token bucket and AIMD concurrency window for one host.
+
+    Parameters
+    ----------
+    rate : float, optional
+        Initial request rate in requests per second.
+    min_rate, max_rate : float, optional
+        Bounds of the adapted rate.
+    burst : float, optional
+        Bucket capacity, i.e. how many requests may be sent back to back.
+    concurrency : float, optional
+        Initial number of requests allowed in flight.
+    max_concurrency : float, optional
+        Upper bound of the window (the lower bound is one request).
+    decrease_factor : float, optional
+        Factor applied to the rate and the window on a throttling signal.
+    latency_target : float, optional
+        Responses slower than this many seconds count as a throttling
+        signal.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float = RATE_LIMIT_INITIAL_RATE,
+        min_rate: float = RATE_LIMIT_MIN_RATE,
+        max_rate: float = RATE_LIMIT_MAX_RATE,
+        burst: float = RATE_LIMIT_BURST,
+        concurrency: float = RATE_LIMIT_INITIAL_CONCURRENCY,
+        max_concurrency: float = RATE_LIMIT_MAX_CONCURRENCY,
+        decrease_factor: float = RATE_LIMIT_DECREASE_FACTOR,
+        latency_target: float = RATE_LIMIT_LATENCY_TARGET,
+    ) -> None:
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.burst = max(1.0, burst)
+        self.max_concurrency = max(1.0, max_concurrency)
+        self.concurrency = min(max(1.0, concurrency), self.max_concurrency)
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; return its start time.
+
+        The returned value must be passed back to :meth:`release`.
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                elif self.in_flight >= int(self.concurrency):
+                    self._cond.wait()
+                elif self._tokens < 1.0:
+                    self._cond.wait((1.0 - self._tokens) / self.rate)
+                else:
+                    self._tokens -= 1.0
+                    self.in_flight += 1
+                    self.requests += 1
+                    return now
+
+    def release(self, started: float, *, status: Optional[int] = None, error: bool = False) -> None:
+        """Report the outcome of a request started at ``started``.
+
+        Parameters
+        ----------
+        started : float
+            Value returned by :meth:`acquire`.
+        status : int, optional
+            HTTP status of the response.
+        error : bool, optional
+            ``True`` if the request raised a network error or timed out.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self.in_flight -= 1
+            if error or status in THROTTLE_STATUSES or now - started > self.latency_target:
+                # One cut per round trip: ignore signals from requests that
+                # were sent before the previous cut.
+                if started >= self._last_decrease:
+                    self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                    self.concurrency = max(1.0, self.concurrency * self.decrease_factor)
+                    self._tokens = min(self._tokens, 1.0)
+                    self._last_decrease = now
+                    self.throttled += 1
+            elif status is not None and status < 500:
+                # Roughly +1 request/s and +1 slot per window of responses
+                self.rate = min(self.max_rate, self.rate + 1.0 / self.concurrency)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request to the host for ``seconds`` (``Retry-After``)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return the current limits and counters of the host."""
+        with self._cond:
+            return {
+                "rate": round(self.rate, 2),
+                "concurrency": int(self.concurrency),
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            }
+
+
+class RateLimiter:
+    """Registry of :class:`HostLimiter` objects, one per host.
+
+    Keyword arguments are passed to every new :class:`HostLimiter`.
+    """
+
+    def __init__(self, **host_options) -> None:
+        self.host_options = host_options
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> HostLimiter:
+        """Return the limiter of the host serving ``url``."""
+        host = urlparse(url).netloc
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            with self._lock:
+                limiter = self._hosts.get(host)
+                if limiter is None:
+                    limiter = self._hosts[host] = HostLimiter(**self.host_options)
+        return limiter
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return ``{host: HostLimiter.snapshot()}`` for every host seen so far."""
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: limiter.snapshot() for host, limiter in hosts.items()}
+
+
+_limiters: Dict[int, RateLimiter] = {}
+_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process‑wide shared rate limiter.
+
+    Like the HTTP session, it is cached per process id so that a forked
+    worker starts with fresh locks and counters.
+    """
+    pid = os.getpid()
+    limiter = _limiters.get(pid)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.get(pid)
+            if limiter is None:
+                limiter = _limiters[pid] = RateLimiter()
+    return limiter
+
+
+__all__ = ["HostLimiter", "RateLimiter", "THROTTLE_STATUSES", "get_rate_limiter"]
@@ -0,0 +1,333 @@
+"""
+MongoDB‑backed work queue for page‑level scraping tasks.
+
+Spreading a crawl over several machines needs a place where pending
+pages are listed and handed out to exactly one worker at a time.  This
+module keeps one document per ``(run, site, category, page)`` task in a
+MongoDB collection and implements the usual lease protocol on top of
+atomic ``find_one_and_update`` calls:
+
+* :meth:`WorkQueue.enqueue` upserts a task, so enqueueing is idempotent.
+* :meth:`WorkQueue.lease` claims the next available task for a worker
+  for ``visibility_timeout`` seconds.  A task whose lease expired (the
+  worker died or stalled) becomes available to other workers again.
+* :meth:`WorkQueue.heartbeat` extends a lease; :meth:`WorkQueue.keep_alive`
+  does so from a background thread while a task is being processed.
+* :meth:`WorkQueue.complete` stores the task's products in a results
+  collection, tagged with the attempt number, and marks it done with
+  that ``result_attempt``; :meth:`WorkQueue.fail` puts it back with
+  a backoff delay, or marks it failed after ``max_attempts`` attempts.
+* :meth:`WorkQueue.wait_until_drained` blocks until every task of a run
+  is either done or failed.
+
+Task and result collections are obtained through :mod:`.db`, so the
+queue works against any MongoDB deployment (or an in‑memory stand‑in
+such as ``mongomock`` passed as ``client``).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from pymongo import ASCENDING, ReturnDocument
+
+from .db import get_collection
+from .http import backoff_delay
+from ...config import (
+    WORK_QUEUE_COLLECTION,
+    WORK_QUEUE_RESULTS_COLLECTION,
+    WORK_QUEUE_VISIBILITY_TIMEOUT,
+    WORK_QUEUE_HEARTBEAT_INTERVAL,
+    WORK_QUEUE_MAX_ATTEMPTS,
+    WORK_QUEUE_POLL_INTERVAL,
+)
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# Fields of a result document that belong to the queue, not to the product
+RESULT_FIELDS = ("_id", "task_id", "run_id", "attempt", "category_index", "page", "position")
+
+
+def task_id(run_id: str, site: str, category_url: str, page: int) -> str:
+    """Return the identifier of a page task."""
+    return f"{run_id}|{site}|{category_url}|{page}"
+
+
+class WorkQueue:
+    """Lease‑based queue of page tasks stored in MongoDB.
+
+    Parameters
+    ----------
+    collection_name, results_name : str, optional
+        Names of the task and result collections.
+    client : MongoClient, optional
+        Client passed to :func:`.db.get_collection`.
+    db_name : str, optional
+        Database name passed to :func:`.db.get_collection`.
+    visibility_timeout : float, optional
+        Seconds a lease lasts without a heartbeat.
+    max_attempts : int, optional
+        Number of leases after which a failing task is given up.
+    """
+
+    def __init__(
+        self,
+        collection_name: str = WORK_QUEUE_COLLECTION,
+        results_name: str = WORK_QUEUE_RESULTS_COLLECTION,
+        *,
+        client=None,
+        db_name: Optional[str] = None,
+        visibility_timeout: float = WORK_QUEUE_VISIBILITY_TIMEOUT,
+        max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS,
+    ) -> None:
+        self.tasks = get_collection(collection_name, db_name=db_name, client=client)
+        self.results = get_collection(results_name, db_name=db_name, client=client)
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.tasks.create_index([("status", ASCENDING), ("available_at", ASCENDING)])
+        self.tasks.create_index([("run_id", ASCENDING), ("status", ASCENDING)])
+        self.results.create_index([("task_id", ASCENDING)])
+        self.results.create_index(
+            [("run_id", ASCENDING), ("site", ASCENDING), ("category_index", ASCENDING),
+             ("page", ASCENDING), ("position", ASCENDING)]
+        )
+
+    def enqueue(
+        self,
+        run_id: str,
+        site: str,
+        category_url: str,
+        category_name: str,
+        page: int,
+        *,
+        category_index: int = 0,
+        max_pages: Optional[int] = None,
+        sequential: bool = False,
+    ) -> bool:
+        """Add a page task unless it already exists; return ``True`` if added.
+
+        ``category_index`` orders categories when results are collected,
+        ``max_pages`` is the crawl's page limit and ``sequential`` marks
+        pages discovered one at a time (the category's page count is
+        unknown), whose completion should enqueue the next page.
+        """
+        now = datetime.utcnow()
+        result = self.tasks.update_one(
+            {"_id": task_id(run_id, site, category_url, page)},
+            {"$setOnInsert": {
+                "run_id": run_id,
+                "site": site,
+                "category_url": category_url,
+                "category_name": category_name,
+                "category_index": category_index,
+                "page": page,
+                "max_pages": max_pages,
+                "sequential": sequential,
+                "status": PENDING,
+                "attempts": 0,
+                "available_at": now,
+                "lease_owner": None,
+                "lease_expires": None,
+                "error": None,
+                "created_at": now,
+            }},
+            upsert=True,
+        )
+        return result.upserted_id is not None
+
+    def _reap(self, now: datetime) -> None:
+        """Mark expired leases that used up their attempts as failed."""
+        self.tasks.update_many(
+            {"status": LEASED, "lease_expires": {"$lt": now}, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {"status": FAILED, "error": "lease expired", "lease_owner": None}},
+        )
+
+    def lease(self, worker_id: str, *, run_id: Optional[str] = None) -> Optional[Dict]:
+        """Claim the next available task for ``worker_id``.
+
+        Pending tasks whose backoff has elapsed and leased tasks whose
+        lease expired are eligible.  Returns the task document, or
+        ``None`` if nothing is available right now.
+        """
+        now = datetime.utcnow()
+        self._reap(now)
+        query: Dict = {
+            "$or": [
+                {"status": PENDING, "available_at": {"$lte": now}},
+                {"status": LEASED, "lease_expires": {"$lt": now}, "attempts": {"$lt": self.max_attempts}},
+            ]
+        }
+        if run_id is not None:
+            query["run_id"] = run_id
+        return self.tasks.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": LEASED,
+                    "lease_owner": worker_id,
+                    "lease_expires": now + timedelta(seconds=self.visibility_timeout),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def heartbeat(self, task: Dict, worker_id: str) -> bool:
+        """Extend the lease of ``task``; ``False`` if the worker lost it."""
+        result = self.tasks.update_one(
+            {"_id": task["_id"], "status": LEASED, "lease_owner": worker_id},
+            {"$set": {"lease_expires": datetime.utcnow() + timedelta(seconds=self.visibility_timeout)}},
+        )
+        return result.matched_count == 1
+
+    @contextmanager
+    def keep_alive(
+        self, task: Dict, worker_id: str, *, interval: float = WORK_QUEUE_HEARTBEAT_INTERVAL
+    ) -> Iterator[None]:
+        """Send heartbeats for ``task`` from a background thread while in the block."""
+        stop = threading.Event()
+
+        def beat() -> None:
+            while not stop.wait(interval):
+                if not self.heartbeat(task, worker_id):
+                    return
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, task: Dict, worker_id: str, products: List[Dict], **fields) -> bool:
+        """Store the products of ``task`` and mark it done.
+
+        Extra keyword arguments are saved on the task document (e.g. the
+        page count).  Returns ``False`` without storing anything if the
+        lease was lost to another worker in the meantime.
+
+        Result rows carry the attempt number and the task records it as
+        ``result_attempt``, so rows of an attempt that lost its lease
+        between the inserts and the final update are removed, and are
+        ignored by readers if the worker dies before removing them.
+        """
+        if not self.heartbeat(task, worker_id):
+            return False
+        attempt = task["attempts"]
+        # Earlier attempts may have stored part of their results; later
+        # ones (if this lease expired meanwhile) keep theirs
+        self.results.delete_many({"task_id": task["_id"], "attempt": {"$lt": attempt}})
+        if products:
+            self.results.insert_many([
+                {
+                    **product,
+                    "task_id": task["_id"],
+                    "run_id": task["run_id"],
+                    "attempt": attempt,
+                    "site": task["site"],
+                    "category_index": task["category_index"],
+                    "page": task["page"],
+                    "position": position,
+                }
+                for position, product in enumerate(products)
+            ])
+        result = self.tasks.update_one(
+            {"_id": task["_id"], "lease_owner": worker_id, "attempts": attempt},
+            {"$set": {
+                "status": DONE,
+                "n_products": len(products),
+                "result_attempt": attempt,
+                "lease_owner": None,
+                "lease_expires": None,
+                "completed_at": datetime.utcnow(),
+                **fields,
+            }},
+        )
+        if result.matched_count != 1:
+            self.results.delete_many({"task_id": task["_id"], "attempt": attempt})
+            return False
+        return True
+
+    def fail(self, task: Dict, worker_id: str, error: str) -> None:
+        """Release ``task`` after a failed attempt.
+
+        The task is retried after an exponential backoff, or marked
+        failed once it has been attempted ``max_attempts`` times.
+        """
+        attempts = task.get("attempts", 1)
+        if attempts >= self.max_attempts:
+            update = {"status": FAILED}
+        else:
+            delay = backoff_delay(attempts - 1)
+            update = {"status": PENDING, "available_at": datetime.utcnow() + timedelta(seconds=delay)}
+        self.tasks.update_one(
+            {"_id": task["_id"], "lease_owner": worker_id},
+            {"$set": {**update, "error": error, "lease_owner": None, "lease_expires": None}},
+        )
+
+    def counts(self, run_id: Optional[str] = None) -> Dict[str, int]:
+        """Return the number of tasks per status (optionally for one run)."""
+        query = {} if run_id is None else {"run_id": run_id}
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for doc in self.tasks.aggregate([{"$match": query}, {"$group": {"_id": "$status", "n": {"$sum": 1}}}]):
+            counts[doc["_id"]] = doc["n"]
+        return counts
+
+    def is_drained(self, run_id: str) -> bool:
+        """``True`` when no task of the run is pending or leased."""
+        self._reap(datetime.utcnow())
+        return self.tasks.count_documents({"run_id": run_id, "status": {"$in": [PENDING, LEASED]}}) == 0
+
+    def wait_until_drained(
+        self,
+        run_id: str,
+        *,
+        poll_interval: float = WORK_QUEUE_POLL_INTERVAL,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Block until every task of ``run_id`` is done or failed.
+
+        Returns ``False`` if ``timeout`` seconds elapsed first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_drained(run_id):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+        return True
+
+    def task_docs(self, run_id: str, site: str) -> List[Dict]:
+        """Return the tasks of one site in a run."""
+        return list(self.tasks.find({"run_id": run_id, "site": site}))
+
+    def iter_results(self, run_id: str, site: str) -> Iterator[Dict]:
+        """Yield stored result documents of one site, in crawl order."""
+        cursor = self.results.find({"run_id": run_id, "site": site}).sort(
+            [("category_index", ASCENDING), ("page", ASCENDING), ("position", ASCENDING)]
+        )
+        yield from cursor
+
+    def purge(self, run_id: str) -> None:
+        """Delete every task and result of a run."""
+        self.tasks.delete_many({"run_id": run_id})
+        self.results.delete_many({"run_id": run_id})
+
+
+__all__ = [
+    "WorkQueue",
+    "task_id",
+    "RESULT_FIELDS",
+    "PENDING",
+    "LEASED",
+    "DONE",
+    "FAILED",
+]